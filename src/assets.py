@@ -0,0 +1,150 @@
+import threading
+
+import pygame
+
+from const import ROOT_DIR
+
+
+TEXTURES_DIR = ROOT_DIR + '/assets/textures/'
+FONTS_DIR = ROOT_DIR + '/assets/fonts/'
+SOUNDS_DIR = ROOT_DIR + '/assets/sounds/'
+
+
+class AssetManager:
+    """
+    Loads textures, fonts and sounds the first time they are needed, or ahead of time on a background thread.
+
+    Assets are cached by name once loaded. Loading is guarded by a lock, as initializing the pygame font and mixer
+        modules and constructing fonts and sounds are not thread-safe; getting an asset that is being loaded
+        on another thread waits for it to be cached.
+    """
+
+    def __init__(self, images: tuple[str, ...], fonts: tuple[tuple[str, int], ...], sounds: tuple[str, ...]):
+        """
+        Initializes an AssetManager object without loading any assets.
+
+        Params:
+            tuple[str, ...]: The names of the textures that can be preloaded, without the .png extension.
+            tuple[tuple[str, int], ...]: The names of the fonts that can be preloaded, without the .ttf extension,
+                with their sizes.
+            tuple[str, ...]: The names of the sounds that can be preloaded, without the .mp3 extension.
+        """
+        self.image_names: tuple[str, ...] = images
+        self.font_names: tuple[tuple[str, int], ...] = fonts
+        self.sound_names: tuple[str, ...] = sounds
+        self.images: dict[str, pygame.Surface] = {}
+        self.fonts: dict[tuple[str, int], pygame.font.Font] = {}
+        self.sounds: dict[str, pygame.mixer.Sound | None] = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    def preload(self, sounds: bool = True) -> threading.Thread:
+        """
+        Starts loading every texture and font, and optionally every sound, on a background thread.
+
+        Params:
+            bool: True iff sounds should be loaded as well.
+
+        Returns:
+            Thread: The thread loading the assets.
+        """
+        thread = threading.Thread(target=self.load_all, args=(sounds,), daemon=True)
+        thread.start()
+        return thread
+
+    def preload_sounds(self) -> threading.Thread:
+        """
+        Starts loading every sound on a background thread.
+
+        Returns:
+            Thread: The thread loading the sounds.
+        """
+        thread = threading.Thread(target=self.load_sounds, daemon=True)
+        thread.start()
+        return thread
+
+    def load_all(self, sounds: bool = True):
+        """
+        Loads every texture and font, and optionally every sound. Assets that fail to load are skipped,
+            so that the error is raised when they are needed instead.
+
+        Params:
+            bool: True iff sounds should be loaded as well.
+        """
+        for name in self.image_names:
+            try:
+                self.get_image(name)
+            except (pygame.error, OSError):
+                continue
+        for name, size in self.font_names:
+            try:
+                self.get_font(name, size)
+            except (pygame.error, OSError):
+                continue
+        if sounds:
+            self.load_sounds()
+
+    def load_sounds(self):
+        """
+        Loads every sound.
+        """
+        for name in self.sound_names:
+            self.get_sound(name)
+
+    def get_image(self, name: str) -> pygame.Surface:
+        """
+        Params:
+            str: The name of the texture, without the .png extension.
+
+        Returns:
+            Surface: The texture.
+        """
+        image = self.images.get(name)
+        if image is None:
+            with self.lock:
+                image = self.images.get(name)
+                if image is None:
+                    image = pygame.image.load(TEXTURES_DIR + name + '.png')
+                    self.images[name] = image
+        return image
+
+    def get_font(self, name: str, size: int) -> pygame.font.Font:
+        """
+        Params:
+            str: The name of the font, without the .ttf extension.
+            int: The font size.
+
+        Returns:
+            Font: The font.
+        """
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            with self.lock:
+                font = self.fonts.get(key)
+                if font is None:
+                    if not pygame.font.get_init():
+                        pygame.font.init()
+                    font = pygame.font.Font(FONTS_DIR + name + '.ttf', size)
+                    self.fonts[key] = font
+        return font
+
+    def get_sound(self, name: str) -> pygame.mixer.Sound | None:
+        """
+        Params:
+            str: The name of the sound, without the .mp3 extension.
+
+        Returns:
+            Sound | None: The sound, or None if there is no audio device to play it on.
+        """
+        if name in self.sounds:
+            return self.sounds[name]
+        with self.lock:
+            if name not in self.sounds:
+                try:
+                    if not pygame.mixer.get_init():
+                        pygame.mixer.init()
+                    self.sounds[name] = pygame.mixer.Sound(SOUNDS_DIR + name + '.mp3')
+                # the game is still playable without sound
+                except pygame.error:
+                    self.sounds[name] = None
+            return self.sounds[name]
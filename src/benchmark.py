@@ -0,0 +1,423 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# pygame runs without a window or audio device, and without printing its greeting over the JSON output
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+from board import Board
+from const import DIFFICULTIES, ROOT_DIR
+from data import Data
+from enums import TileStates
+from game import Game
+from generator import plant_no_guess
+from profiler import summarize_times
+
+
+# custom sizes are filled with mines at the density of expert
+EXPERT_DENSITY = DIFFICULTIES['expert']['num_mines'] / (DIFFICULTIES['expert']['rows'] * DIFFICULTIES['expert']['cols'])
+SCALED_SIZES = {
+    'large': (100, 100),
+    'huge': (1000, 1000),
+    'giant': (2000, 2000)
+}
+BASELINE_PATH = ROOT_DIR + '/data/benchmark_baseline.json'
+# a result this much slower than the baseline is reported as a regression, and this much faster as an improvement
+DEFAULT_THRESHOLD = 0.2
+# random tiles tried when looking for a tile to chord before the board is planted again
+MAX_PROBES = 200
+
+
+def get_sizes() -> dict[str, tuple[int, int, int]]:
+    """
+    Returns:
+        dict[str, tuple[int, int, int]]: The number of rows, columns and mines of every size benchmarked,
+            from beginner up to millions of tiles.
+    """
+    sizes = {name: (data['rows'], data['cols'], data['num_mines']) for name, data in DIFFICULTIES.items()}
+    for name, (rows, cols) in SCALED_SIZES.items():
+        sizes[name] = (rows, cols, round(rows * cols * EXPERT_DENSITY))
+    return sizes
+
+
+def time_operation(setup, operation, min_time: float) -> float:
+    """
+    Runs an operation until it has taken at least min_time in total, preparing each run without timing it.
+
+    Params:
+        Any: A function that prepares a run and returns the argument of the operation.
+        Any: The function to time, called with the value returned by setup.
+        float: The minimum total time to run the operation for, in seconds.
+
+    Returns:
+        float: The mean time of one run, in seconds.
+    """
+    total = 0.0
+    runs = 0
+    while runs == 0 or total < min_time:
+        argument = setup()
+        start = time.perf_counter()
+        operation(argument)
+        total += time.perf_counter() - start
+        runs += 1
+    return total / runs
+
+
+def find_chord_tile(board: Board, rng: random.Random) -> tuple[int, int] | None:
+    """
+    Helper function to find a random hidden numbered tile with a hidden safe neighbor, which can be uncovered and chorded.
+
+    Params:
+        Board: A planted Board.
+        Random: The random number generator of the benchmark.
+
+    Returns:
+        tuple[int, int] | None: The tile position, or None if none was found within MAX_PROBES tries.
+    """
+    for _ in range(MAX_PROBES):
+        i = rng.randrange(board.size)
+        if board.mines[i] or board.states[i] != TileStates.HIDDEN:
+            continue
+        if board.counts[i] > 0 and any(not board.mines[j] and board.states[j] == TileStates.HIDDEN
+                                       for j in board.get_neighbor_indices(i)):
+            return board.position(i)
+    return None
+
+
+def bench_plant_mines(rows: int, cols: int, num_mines: int, rng: random.Random, min_time: float) -> float:
+    """
+    Times planting mines and counting adjacent mines on a Board reset with a new seed.
+    """
+    board = Board(rows, cols, num_mines)
+    center = (cols // 2, rows // 2)
+
+    def setup():
+        board.reset(rng.getrandbits(32))
+        return center
+
+    return time_operation(setup, board.plant_mines, min_time)
+
+
+def bench_uncover(rows: int, cols: int, num_mines: int, rng: random.Random, min_time: float) -> float:
+    """
+    Times the worst case of uncover: a board without mines, which opens completely from a single tile.
+    """
+    board = Board(rows, cols, 0)
+    center = (cols // 2, rows // 2)
+
+    def setup():
+        board.reset()
+        board.load_mines([])
+        return center
+
+    return time_operation(setup, board.uncover, min_time)
+
+
+def bench_chord(rows: int, cols: int, num_mines: int, rng: random.Random, min_time: float) -> float:
+    """
+    Times chording a numbered tile whose adjacent mines are flagged, which uncovers its hidden neighbors.
+    """
+    board = Board(rows, cols, num_mines)
+
+    def setup():
+        pos = None if board.game_over or not board.started else find_chord_tile(board, rng)
+        while pos is None:
+            board.reset(rng.getrandbits(32))
+            board.plant_mines((cols // 2, rows // 2), board.get_safe_zone((cols // 2, rows // 2)))
+            pos = find_chord_tile(board, rng)
+        i = board.index(pos)
+        board.states[i] = TileStates.UNCOVERED + board.counts[i]
+        for neighbor in board.get_neighbors(pos):
+            if board.is_mine(neighbor) and board.get_state(neighbor) == TileStates.HIDDEN:
+                board.toggle_flag(neighbor)
+        return pos
+
+    return time_operation(setup, board.chord, min_time)
+
+
+def bench_plant_no_guess(rows: int, cols: int, num_mines: int, rng: random.Random, min_time: float) -> float:
+    """
+    Times planting a layout that can be solved without guessing from a random first click.
+    """
+    board = Board(rows, cols, num_mines)
+
+    def setup():
+        board.reset(rng.getrandbits(32))
+        return (rng.randrange(cols), rng.randrange(rows))
+
+    return time_operation(setup, lambda pos: plant_no_guess(board, pos), min_time)
+
+
+def create_game(rows: int, cols: int, num_mines: int, rng: random.Random, folder: str) -> Game:
+    """
+    Helper function to load a Game of the given size with its first tile revealed in the middle of the view.
+
+    Params:
+        int: The number of rows in the field.
+        int: The number of columns in the field.
+        int: The number of mines in the field.
+        Random: The random number generator of the benchmark.
+        str: The folder the Game saves data in.
+
+    Returns:
+        Game: The loaded Game.
+    """
+    file_io = Data(use_statistics=False, folder=folder)
+    # sounds are not loaded, and every other asset is loaded before timing starts
+    file_io.write_settings({'sound_enabled': False, 'no_guess': {}})
+    game = Game(file_io)
+    game.assets.load_all(False)
+    game.load('custom', (rows, cols, num_mines))
+    game.restart(rng.getrandbits(32))
+    game.make_move('reveal', (game.view_cols // 2, game.view_rows // 2))
+    game.render()
+    return game
+
+
+def bench_check_tile_press(rows: int, cols: int, num_mines: int, rng: random.Random, min_time: float,
+                           folder: str) -> float:
+    """
+    Times finding the tiles pressed by a chord (left and right mouse buttons held), moving between two tiles
+        so that the pressed tiles are found again every time.
+    """
+    game = create_game(rows, cols, num_mines, rng, folder)
+    size = game.tile_size
+    positions = [(game.field_rect.x + x*size + size // 2, game.field_rect.y + y*size + size // 2)
+                 for x, y in ((game.view_cols // 2, game.view_rows // 2), (game.view_cols // 2 + 1, game.view_rows // 2))]
+    chord_press = (True, False, True)
+    turn = [0]
+
+    def setup():
+        turn[0] = 1 - turn[0]
+        return positions[turn[0]]
+
+    result = time_operation(setup, lambda mouse_pos: game.check_tile_press(chord_press, mouse_pos), min_time)
+    pygame.display.quit()
+    return result
+
+
+def bench_render(rows: int, cols: int, num_mines: int, rng: random.Random, min_time: float, folder: str) -> float:
+    """
+    Times drawing the window after a random tile in view is flagged or unflagged, which changes one tile and the
+        flag counter. Flags never run out or end the game, so every sample does the same work.
+    """
+    game = create_game(rows, cols, num_mines, rng, folder)
+
+    def setup():
+        while True:
+            pos = (rng.randrange(game.view_cols), rng.randrange(game.view_rows))
+            if game.board.get_state(pos) in (TileStates.HIDDEN, TileStates.FLAG):
+                game.make_move('flag', pos)
+                return None
+
+    result = time_operation(setup, lambda _: game.render(), min_time)
+    pygame.display.quit()
+    return result
+
+
+def bench_render_full(rows: int, cols: int, num_mines: int, rng: random.Random, min_time: float,
+                      folder: str) -> float:
+    """
+    Times redrawing the whole window, as after it is uncovered or the game is restarted.
+    """
+    game = create_game(rows, cols, num_mines, rng, folder)
+
+    def setup():
+        game.full_redraw = True
+
+    result = time_operation(setup, lambda _: game.render(), min_time)
+    pygame.display.quit()
+    return result
+
+
+def bench_add_score(rows: int, cols: int, num_mines: int, rng: random.Random, min_time: float,
+                    folder: str) -> float:
+    """
+    Times adding a score that makes the high scores, including writing it to disk.
+    """
+    difficulty = next(name for name, data in DIFFICULTIES.items()
+                      if (data['rows'], data['cols'], data['num_mines']) == (rows, cols, num_mines))
+    file_io = Data(use_statistics=False, folder=folder)
+    # every new time is the best so far, so that each one is kept and written
+    best = [1000.0]
+
+    def setup():
+        best[0] -= rng.random() / 1000
+        return best[0]
+
+    return time_operation(setup, lambda time_taken: file_io.add_score(time_taken, difficulty, 'bench'), min_time)
+
+
+# each benchmark takes the number of rows, columns and mines, a random number generator, the minimum time of a sample
+# and, for those in DATA_BENCHMARKS, a folder to save data in, and returns the mean time of one operation in seconds
+BENCHMARKS = {
+    'plant_mines': bench_plant_mines,
+    'uncover': bench_uncover,
+    'chord': bench_chord,
+    'plant_no_guess': bench_plant_no_guess,
+    'check_tile_press': bench_check_tile_press,
+    'render': bench_render,
+    'render_full': bench_render_full,
+    'add_score': bench_add_score
+}
+DATA_BENCHMARKS = ('check_tile_press', 'render', 'render_full', 'add_score')
+# benchmarks only run on the standard difficulties, since only their scores are kept
+# and boards without guessing take too long to generate at the scaled sizes
+DIFFICULTY_BENCHMARKS = ('plant_no_guess', 'add_score')
+
+
+def run_benchmarks(names: list[str], sizes: list[str], repeat: int, min_time: float, seed: int,
+                   progress=None) -> dict:
+    """
+    Runs each benchmark on each size, taking repeat samples of each.
+
+    Params:
+        list[str]: The names of the benchmarks in BENCHMARKS to run.
+        list[str]: The names of the sizes to run them on.
+        int: The number of samples of each benchmark and size.
+        float: The minimum time of each sample, in seconds.
+        int: The seed the random number generator of each benchmark and size is seeded from.
+        Any | None: A function called with the name of each result before it is measured.
+
+    Returns:
+        dict: The median, minimum, 99th percentile and maximum time in milliseconds of one operation
+            and the number of samples, for each benchmark and size named as 'benchmark/size'.
+    """
+    all_sizes = get_sizes()
+    results = {}
+    for name in names:
+        for size in sizes:
+            if name in DIFFICULTY_BENCHMARKS and size not in DIFFICULTIES.keys():
+                continue
+            key = f'%s/%s' % (name, size)
+            if progress is not None:
+                progress(key)
+            rows, cols, num_mines = all_sizes[size]
+            # each result has its own generator, so it does not depend on which other benchmarks are run
+            rng = random.Random(f'%d:%s' % (seed, key))
+            samples = []
+            for _ in range(repeat):
+                if name in DATA_BENCHMARKS:
+                    with tempfile.TemporaryDirectory() as folder:
+                        samples.append(BENCHMARKS[name](rows, cols, num_mines, rng, min_time, folder))
+                else:
+                    samples.append(BENCHMARKS[name](rows, cols, num_mines, rng, min_time))
+            summary = summarize_times(samples)
+            results[key] = {
+                'median_ms': 1000 * statistics.median(samples),
+                'min_ms': 1000 * min(samples),
+                'p99_ms': summary['p99'],
+                'max_ms': summary['max'],
+                'samples': len(samples)
+            }
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> dict:
+    """
+    Compares results with a baseline by their fastest samples, which vary the least between runs on the same machine.
+
+    Params:
+        dict: Results from run_benchmarks.
+        dict: Results from an earlier run.
+        float: The fraction by which the fastest sample may differ from the baseline's before it is reported.
+
+    Returns:
+        dict: For each result in both, the baseline and current fastest samples in milliseconds, their ratio,
+            and whether it is an 'improvement', a 'regression' or 'ok'.
+    """
+    comparison = {}
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if previous is None or previous['min_ms'] <= 0:
+            continue
+        ratio = result['min_ms'] / previous['min_ms']
+        status = 'ok'
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 - threshold:
+            status = 'improvement'
+        comparison[key] = {'baseline_ms': previous['min_ms'], 'min_ms': result['min_ms'], 'ratio': ratio, 'status': status}
+    return comparison
+
+
+def main():
+    """
+    Runs the benchmarks from the command line, compares them with the stored baseline and prints the results.
+        Exits with status 1 if any result regressed.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the Minesweeper engine, rendering and saved data headlessly.')
+    parser.add_argument('-b', '--benchmarks', nargs='+', choices=BENCHMARKS.keys(), default=list(BENCHMARKS.keys()))
+    parser.add_argument('-s', '--sizes', nargs='+', choices=get_sizes().keys(), default=list(get_sizes().keys()))
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='number of samples of each benchmark')
+    parser.add_argument('-t', '--min-time', type=float, default=0.05, help='minimum seconds per sample')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='results file to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='fraction slower than the baseline that counts as a regression')
+    parser.add_argument('-o', '--output', help='also write the results as JSON to this file')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    def progress(key: str):
+        print(f'\rRunning %s...%s' % (key, ' ' * 20), end='', file=sys.stderr)
+    results = run_benchmarks(args.benchmarks, args.sizes, args.repeat, args.min_time, args.seed, progress)
+    print(file=sys.stderr)
+
+    baseline = {}
+    try:
+        file = open(args.baseline, 'r', encoding='utf-8')
+        baseline = json.loads(file.read())['results']
+        file.close()
+    except (OSError, ValueError, KeyError):
+        baseline = {}
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'min_time': args.min_time
+        },
+        'results': results,
+        'comparison': compare(results, baseline, args.threshold)
+    }
+
+    text = json.dumps(report, indent=2)
+    paths = [args.output] if args.output else []
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        paths.append(args.baseline)
+    for path in paths:
+        file = open(path, mode='w+', encoding='utf-8')
+        file.write(text)
+        file.close()
+
+    if args.json:
+        print(text)
+    else:
+        for key, result in results.items():
+            line = f'%s: median %.4f ms, min %.4f ms, p99 %.4f ms, max %.4f ms' % (
+                key, result['median_ms'], result['min_ms'], result['p99_ms'], result['max_ms'])
+            comparison = report['comparison'].get(key)
+            if comparison is not None:
+                line += f' (%.2fx baseline, %s)' % (comparison['ratio'], comparison['status'])
+            print(line)
+    if any(comparison['status'] == 'regression' for comparison in report['comparison'].values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,605 @@
+from collections import deque
+import random
+from typing import Callable
+
+from enums import TileStates
+
+
+# the kinds of change-sets published by a Board, one for each kind of mutation
+CHANGE_KINDS = ('reset', 'reveal', 'flag', 'unflag', 'chord', 'loss', 'move', 'cover')
+
+
+class ChangeSet:
+    """
+    The tiles whose state changed in a single Board mutation. Subscribers of a Board read the new states from it,
+        so that they can update in time proportional to what changed rather than to the size of the field.
+    """
+
+    def __init__(self, kind: str, indices: list[int], pos: tuple[int, int] | None = None):
+        """
+        Initializes a ChangeSet object.
+
+        Params:
+            str: The kind of mutation, one of CHANGE_KINDS. A move that hits a mine is a 'loss', and a 'reset'
+                changes every tile without listing them.
+            list[int]: The indices of the tiles whose state changed, each listed once.
+            tuple[int, int] | None: The position of the tile the move was made on, if any.
+        """
+        self.kind: str = kind
+        self.indices: list[int] = indices
+        self.pos: tuple[int, int] | None = pos
+
+
+class Board:
+    """
+    The Minesweeper rules engine. Tracks mines, flags and tile states without any dependency on pygame,
+    so that games can be played headlessly at full speed.
+    """
+
+    def __init__(self, rows: int, cols: int, num_mines: int, rng: random.Random | None = None):
+        """
+        Initializes a Board object with no mines planted.
+
+        Tiles are stored in flat bytearrays indexed by y*cols + x, so memory use and reset cost
+        do not depend on Python object overhead. The number of adjacent mines of every tile is
+        computed once when mines are planted.
+
+        Params:
+            int: The number of rows in the field.
+            int: The number of columns in the field.
+            int: The number of mines to plant on the first reveal.
+            Random | None: The random number generator used to plant mines. Will initialize one if not provided.
+        """
+        self.rows: int = rows
+        self.cols: int = cols
+        self.num_mines: int = num_mines
+        self.rng: random.Random = rng if rng is not None else random.Random()
+        self.size: int = rows * cols
+        self.states: bytearray = bytearray()
+        self.mines: bytearray = bytearray()
+        self.counts: bytearray = bytearray()
+        self.flags: set[tuple[int, int]] = set()
+        self.mine_indices: set[int] = set()
+        self.first_click: int | None = None
+        self.planted: bool = False
+        self.uncovered_tiles: int = 0
+        self.won: bool = False
+        self.lost: bool = False
+        # tiles changed since the last change-set was published, and the functions it is published to
+        self.changes: list[int] = []
+        self.subscribers: list[Callable[[ChangeSet], None]] = []
+        self.reset()
+
+    def reset(self, seed: int | str | None = None):
+        """
+        Resets the Board to a new game with the same dimensions and no mines planted, and publishes a 'reset' change-set.
+
+        Params:
+            int | str | None: A seed for the random number generator, so that the mines planted depend only on
+                the seed and the first click. The generator carries on from its current state if not provided.
+        """
+        if seed is not None:
+            self.rng.seed(seed)
+        self.states = bytearray([TileStates.HIDDEN]) * self.size
+        self.mines = bytearray(self.size)
+        self.counts = bytearray(self.size)
+        self.flags = set()
+        self.mine_indices = set()
+        self.first_click = None
+        self.planted = False
+        self.uncovered_tiles = 0
+        self.won = False
+        self.lost = False
+        self.changes = []
+        self.publish('reset')
+
+    def subscribe(self, subscriber: Callable[[ChangeSet], None]):
+        """
+        Adds a function to be called with the ChangeSet of every later mutation, after the mutation is complete.
+
+        Params:
+            Callable[[ChangeSet], None]: The function to call.
+        """
+        self.subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: Callable[[ChangeSet], None]):
+        """
+        Stops calling a subscribed function.
+
+        Params:
+            Callable[[ChangeSet], None]: The function to stop calling.
+        """
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+
+    def publish(self, kind: str, pos: tuple[int, int] | None = None):
+        """
+        Sends the tiles changed since the last change-set to every subscriber as one ChangeSet.
+            Mutations that change no tiles are not published, except resets.
+
+        Params:
+            str: The kind of mutation, one of CHANGE_KINDS.
+            tuple[int, int] | None: The position of the tile the move was made on, if any.
+        """
+        changes = self.changes
+        self.changes = []
+        if len(self.subscribers) == 0 or (len(changes) == 0 and kind != 'reset'):
+            return
+        change_set = ChangeSet(kind, changes, pos)
+        for subscriber in self.subscribers:
+            subscriber(change_set)
+
+    @property
+    def game_over(self) -> bool:
+        """
+        Returns:
+            bool: True iff the game has been won or lost.
+        """
+        return self.won or self.lost
+
+    @property
+    def started(self) -> bool:
+        """
+        Returns:
+            bool: True iff mines have been planted, i.e. the first tile has been revealed.
+        """
+        return self.planted
+
+    @property
+    def flags_remaining(self) -> int:
+        """
+        Returns:
+            int: The number of mines minus the number of flagged tiles.
+        """
+        return self.num_mines - len(self.flags)
+
+    def index(self, pos: tuple[int, int]) -> int:
+        """
+        Params:
+            tuple[int, int]: A (x, y) position.
+
+        Returns:
+            int: The index of the position within the flat tile arrays.
+        """
+        return pos[1]*self.cols + pos[0]
+
+    def position(self, index: int) -> tuple[int, int]:
+        """
+        Params:
+            int: An index within the flat tile arrays.
+
+        Returns:
+            tuple[int, int]: The (x, y) position of the index.
+        """
+        return (index % self.cols, index // self.cols)
+
+    def in_bounds(self, pos: tuple[int, int]) -> bool:
+        """
+        Params:
+            tuple[int, int]: A (x, y) position.
+
+        Returns:
+            bool: True iff the position lies within the field.
+        """
+        return 0 <= pos[0] < self.cols and 0 <= pos[1] < self.rows
+
+    def get_state(self, pos: tuple[int, int]) -> int:
+        """
+        Params:
+            tuple[int, int]: The tile position within the field.
+
+        Returns:
+            int: The TileStates value of the tile (UNCOVERED + n for an uncovered tile with n adjacent mines).
+        """
+        return self.states[pos[1]*self.cols + pos[0]]
+
+    def is_mine(self, pos: tuple[int, int]) -> bool:
+        """
+        Params:
+            tuple[int, int]: The tile position within the field.
+
+        Returns:
+            bool: True iff a mine is planted at the position.
+        """
+        return self.mines[pos[1]*self.cols + pos[0]] == 1
+
+    def get_mine_indices(self) -> list[int]:
+        """
+        Returns:
+            list[int]: The indices of all planted mines.
+        """
+        return sorted(self.mine_indices)
+
+    def get_mine_positions(self) -> list[tuple[int, int]]:
+        """
+        Returns:
+            list[tuple[int, int]]: The positions of all planted mines.
+        """
+        return [self.position(i) for i in sorted(self.mine_indices)]
+
+    def get_neighbors(self, pos: tuple[int, int]) -> list[tuple[int, int]]:
+        """
+        Params:
+            tuple[int, int]: The tile position within the field.
+
+        Returns:
+            list[tuple[int, int]]: The positions of all tiles in the surrounding 3x3 area, excluding the tile itself.
+        """
+        neighbors = []
+        x_min = pos[0] - 1 if pos[0] - 1 >= 0 else 0
+        y_min = pos[1] - 1 if pos[1] - 1 >= 0 else 0
+        x_max = pos[0] + 1 if pos[0] + 1 < self.cols else self.cols - 1
+        y_max = pos[1] + 1 if pos[1] + 1 < self.rows else self.rows - 1
+        for x in range(x_min, x_max + 1):
+            for y in range(y_min, y_max + 1):
+                if (x, y) != (pos[0], pos[1]):
+                    neighbors.append((x, y))
+        return neighbors
+
+    def get_neighbor_indices(self, index: int) -> list[int]:
+        """
+        Params:
+            int: An index within the flat tile arrays.
+
+        Returns:
+            list[int]: The indices of all tiles in the surrounding 3x3 area, excluding the tile itself.
+        """
+        cols = self.cols
+        x = index % cols
+        y = index // cols
+        if 0 < x < cols - 1 and 0 < y < self.rows - 1:
+            return [index - cols - 1, index - cols, index - cols + 1, index - 1,
+                    index + 1, index + cols - 1, index + cols, index + cols + 1]
+        x_range = range(x - 1 if x > 0 else x, x + 2 if x + 1 < cols else x + 1)
+        y_range = range(y - 1 if y > 0 else y, y + 2 if y + 1 < self.rows else y + 1)
+        return [ny*cols + nx for ny in y_range for nx in x_range if ny*cols + nx != index]
+
+    def get_3bv(self) -> int:
+        """
+        Computes the 3BV (Bechtel's Board Benchmark Value) of the planted mines: the minimum number of
+            left clicks needed to uncover every safe tile, counting each opening as a single click.
+
+        Returns:
+            int: The 3BV of the Board.
+        """
+        return count_3bv(self.mines, self.counts, self.rows, self.cols)
+
+    def reveal(self, pos: tuple[int, int]) -> bool:
+        """
+        Reveals a hidden tile (left click), planting mines first if this is the first reveal.
+
+        Params:
+            tuple[int, int]: The tile position within the field.
+
+        Returns:
+            bool: True iff a safe tile was uncovered.
+        """
+        i = self.index(pos)
+        if self.game_over or self.states[i] != TileStates.HIDDEN:
+            return False
+        if self.first_click is None:
+            self.first_click = i
+        if self.mines[i]:
+            self.states[i] = TileStates.MINE_HIT
+            self.changes.append(i)
+            self.loss()
+            self.publish('loss', pos)
+            return False
+        self.uncover(pos)
+        self.publish('reveal', pos)
+        return True
+
+    def toggle_flag(self, pos: tuple[int, int]) -> bool:
+        """
+        Flags a hidden tile or removes the flag from a flagged tile (right click).
+
+        Params:
+            tuple[int, int]: The tile position within the field.
+
+        Returns:
+            bool: True iff a flag was placed.
+        """
+        if self.game_over:
+            return False
+        i = self.index(pos)
+        if self.states[i] == TileStates.HIDDEN:
+            self.states[i] = TileStates.FLAG
+            self.flags.add(pos)
+            self.changes.append(i)
+            self.publish('flag', pos)
+            return True
+        elif self.states[i] == TileStates.FLAG:
+            self.states[i] = TileStates.HIDDEN
+            self.flags.discard(pos)
+            self.changes.append(i)
+            self.publish('unflag', pos)
+        return False
+
+    def get_chord_info(self, pos: tuple[int, int]) -> tuple[bool, list[tuple[int, int]]]:
+        """
+        Checks if a tile can be chorded and gets the list of tiles that would be uncovered with a chord
+            (left and right click simultaneously).
+
+        Params:
+            tuple[int, int]: The tile position within the field.
+
+        Returns:
+            tuple[bool, list[tuple[int, int]]]: A boolean representing whether the tile can currently be chorded
+                and the positions of tiles that would be uncovered if the chord is valid.
+        """
+        state = self.get_state(pos)
+        if state > TileStates.UNCOVERED + 8:
+            return (False, [])
+
+        flag_count = 0
+        neighbors = []
+        for neighbor in self.get_neighbors(pos):
+            neighbor_state = self.get_state(neighbor)
+            if neighbor_state == TileStates.FLAG:
+                flag_count += 1
+            elif neighbor_state == TileStates.HIDDEN:
+                neighbors.append(neighbor)
+
+        return (flag_count == state - TileStates.UNCOVERED, neighbors)
+
+    def chord(self, pos: tuple[int, int]) -> bool:
+        """
+        If the correct number of adjacent tiles has been flagged, uncovers all adjacent hidden tiles.
+
+        Params:
+            tuple[int, int]: The position within the field of the center tile.
+
+        Returns:
+            bool: True iff at least one safe tile was uncovered.
+        """
+        if self.game_over:
+            return False
+        can_chord, to_chord = self.get_chord_info(pos)
+        if not can_chord:
+            return False
+
+        for tile_pos in to_chord:
+            i = self.index(tile_pos)
+            if self.mines[i]:
+                self.states[i] = TileStates.MINE_HIT
+                self.changes.append(i)
+                self.loss()
+                self.publish('loss', pos)
+                return False
+
+        for tile_pos in to_chord:
+            # earlier tiles may have already flooded into this one
+            if self.states[self.index(tile_pos)] == TileStates.HIDDEN:
+                self.uncover(tile_pos)
+        self.publish('chord', pos)
+        return len(to_chord) > 0
+
+    def plant_mines(self, pos: tuple[int, int], excluded: set[int] | None = None):
+        """
+        Randomly populates the field with mines, excluding the first tile clicked,
+            and records the number of adjacent mines for every tile.
+
+        Params:
+            tuple[int, int]: The position within the field of the clicked tile.
+            set[int] | None: The indices of tiles that must not hold a mine. Defaults to only the clicked tile.
+        """
+        if excluded is None:
+            excluded = {self.index(pos)}
+        self.load_mines(sample_mines(self.size, self.num_mines, excluded, self.rng))
+
+    def get_safe_zone(self, pos: tuple[int, int]) -> set[int]:
+        """
+        Gets the 3x3 area around a tile, which can be excluded from mine placement so that the first click opens.
+            Falls back to only the tile itself if there would not be room for every mine elsewhere.
+
+        Params:
+            tuple[int, int]: The tile position within the field.
+
+        Returns:
+            set[int]: The indices of the tiles in the area.
+        """
+        index = self.index(pos)
+        zone = set(self.get_neighbor_indices(index))
+        zone.add(index)
+        if self.size - len(zone) < self.num_mines:
+            return {index}
+        return zone
+
+    def load_mines(self, indices: list[int]):
+        """
+        Plants mines at given tiles instead of at random, and records the number of adjacent mines for every tile.
+
+        Params:
+            list[int]: The indices of the tiles to plant mines on.
+        """
+        self.mines = bytearray(self.size)
+        self.counts = bytearray(self.size)
+        self.mine_indices = set(indices)
+        for i in indices:
+            self.mines[i] = 1
+            for j in self.get_neighbor_indices(i):
+                self.counts[j] += 1
+        self.planted = True
+
+    def move_mine(self, source: int, destination: int):
+        """
+        Moves a planted mine to a tile without one, updating adjacent mine counts and the numbers of uncovered tiles,
+            and publishes a 'move' change-set of the numbers that changed.
+
+        Params:
+            int: The index of the tile holding the mine.
+            int: The index of the tile to move the mine to.
+        """
+        self.mines[source] = 0
+        self.mines[destination] = 1
+        self.mine_indices.discard(source)
+        self.mine_indices.add(destination)
+        old_states = {}
+        for index, change in ((source, -1), (destination, 1)):
+            for j in self.get_neighbor_indices(index):
+                self.counts[j] += change
+                if self.states[j] <= TileStates.UNCOVERED + 8:
+                    old_states.setdefault(j, self.states[j])
+                    self.states[j] = TileStates.UNCOVERED + self.counts[j]
+        # a number next to both tiles keeps its value
+        self.changes.extend(j for j, state in old_states.items() if self.states[j] != state)
+        self.publish('move')
+
+    def cover(self, indices: list[int]):
+        """
+        Hides uncovered or flagged tiles again, so that a game can be taken back to an earlier position,
+            and publishes a 'cover' change-set of the tiles hidden.
+
+        Params:
+            list[int]: The indices of the tiles to hide.
+        """
+        for i in indices:
+            state = self.states[i]
+            if state == TileStates.HIDDEN:
+                continue
+            if state <= TileStates.UNCOVERED + 8:
+                self.uncovered_tiles -= 1
+            elif state == TileStates.FLAG:
+                self.flags.discard(self.position(i))
+            else:
+                continue
+            self.states[i] = TileStates.HIDDEN
+            self.changes.append(i)
+        self.won = False
+        self.publish('cover')
+
+    def uncover(self, pos: tuple[int, int]):
+        """
+        Uncovers the tile and its surroundings at a given position.
+
+        Tiles are uncovered as they are queued, so each tile is visited at most once and a flood fill
+        runs in time linear in the number of tiles it opens. The uncovered tiles are added to the change-set
+        published by the move that called this.
+
+        Params:
+            tuple[int, int]: The tile position within the field.
+        """
+        if not self.started:
+            self.plant_mines(pos)
+
+        states = self.states
+        counts = self.counts
+        changes = self.changes
+        changes_before = len(changes)
+        start = self.index(pos)
+        states[start] = TileStates.UNCOVERED + counts[start]
+        changes.append(start)
+
+        # perform breadth first search from the clicked tile, stopping along edges with neighboring mines
+        if counts[start] == 0:
+            cols = self.cols
+            last_col = cols - 1
+            last_row = self.size - cols
+            offsets = (-cols - 1, -cols, -cols + 1, -1, 1, cols - 1, cols, cols + 1)
+            hidden = int(TileStates.HIDDEN)
+            uncovered_state = int(TileStates.UNCOVERED)
+            add_change = changes.append
+            bfs_queue = deque([start])
+            while bfs_queue:
+                current = bfs_queue.popleft()
+                # interior tiles skip the bounds checks of get_neighbor_indices
+                if cols <= current < last_row and 0 < current % cols < last_col:
+                    neighbors = [current + offset for offset in offsets]
+                else:
+                    neighbors = self.get_neighbor_indices(current)
+                for i in neighbors:
+                    if states[i] == hidden:
+                        states[i] = uncovered_state + counts[i]
+                        add_change(i)
+                        if counts[i] == 0:
+                            bfs_queue.append(i)
+
+        self.uncovered_tiles += len(changes) - changes_before
+        if self.uncovered_tiles == self.size - self.num_mines:
+            self.won = True
+
+    def loss(self):
+        """
+        Ends the game and reveals mistakes and remaining mines. Only mines and flags are visited,
+            and the revealed tiles are added to the change-set published by the move that called this.
+        """
+        self.lost = True
+        states = self.states
+        changes = self.changes
+        for i in self.mine_indices:
+            if states[i] == TileStates.HIDDEN or states[i] == TileStates.FLAG:
+                states[i] = TileStates.MINE
+                changes.append(i)
+        for pos in self.flags:
+            i = self.index(pos)
+            if not self.mines[i]:
+                states[i] = TileStates.INCORRECT_FLAG
+                changes.append(i)
+
+
+def sample_mines(size: int, num_mines: int, excluded: set[int], rng: random.Random) -> list[int]:
+    """
+    Chooses distinct random tile indices for mines without building a list of every open tile.
+        Indices are sampled from the range of open tiles and shifted past excluded tiles, which takes
+        O(num_mines) time for sparse boards and O(size) at worst.
+
+    Params:
+        int: The number of tiles in the field.
+        int: The number of mines to place.
+        set[int]: The indices of tiles that must not hold a mine.
+        Random: The random number generator to sample with.
+
+    Returns:
+        list[int]: The indices of the chosen tiles.
+    """
+    skipped = sorted(i for i in excluded if 0 <= i < size)
+    indices = rng.sample(range(size - len(skipped)), num_mines)
+    if len(skipped) > 0:
+        for n, index in enumerate(indices):
+            for i in skipped:
+                if index >= i:
+                    index += 1
+                else:
+                    break
+            indices[n] = index
+    return indices
+
+
+def count_3bv(mines: bytes, counts: bytes, rows: int, cols: int) -> int:
+    """
+    Computes the 3BV of a mine layout. Takes the tiles rather than a Board, so that it can run on a copy of them
+        in another thread while the Board is reused.
+
+    Params:
+        bytes: 1 for every tile holding a mine, else 0.
+        bytes: The number of adjacent mines of every tile.
+        int: The number of rows in the field.
+        int: The number of columns in the field.
+
+    Returns:
+        int: The minimum number of left clicks needed to uncover every safe tile.
+    """
+    size = rows * cols
+    marked = bytearray(size)
+    value = 0
+    # each opening (connected area without adjacent mines, plus its border) takes one click
+    start = counts.find(0)
+    while start != -1:
+        if not mines[start] and not marked[start]:
+            value += 1
+            marked[start] = 1
+            stack = [start]
+            while stack:
+                y, x = divmod(stack.pop(), cols)
+                x_min = max(x - 1, 0)
+                x_max = min(x + 2, cols)
+                for row in range(max(y - 1, 0) * cols, min(y + 2, rows) * cols, cols):
+                    for i in range(row + x_min, row + x_max):
+                        if not marked[i]:
+                            marked[i] = 1
+                            if counts[i] == 0:
+                                stack.append(i)
+        start = counts.find(0, start + 1)
+    # every other safe tile takes one click
+    value += size - mines.count(1) - marked.count(1)
+    return value
@@ -0,0 +1,314 @@
+import asyncio
+import base64
+import json
+
+from board import Board, ChangeSet
+from codes import decode_varint, encode_varint
+
+
+# bytes of frames buffered for a spectator before it stops receiving deltas and is sent a snapshot once it catches up
+SPECTATOR_BUFFER_LIMIT = 256 * 1024
+# spectators that cannot catch up within this many seconds are disconnected
+SPECTATOR_TIMEOUT = 60.0
+
+
+class Spectator:
+    """
+    A connection watching live games. Frames are written straight to its transport, shared with every other spectator.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        """
+        Initializes a Spectator object watching no games.
+
+        Params:
+            StreamWriter: The connection's outgoing stream.
+        """
+        self.writer: asyncio.StreamWriter = writer
+        self.lagging: set['Broadcast'] = set()
+        # the loop only keeps weak references to tasks, so pending resyncs are kept here until they finish
+        self.resyncs: set[asyncio.Task] = set()
+        self.frames_sent: int = 0
+
+    def send(self, broadcast: 'Broadcast', frame: bytes):
+        """
+        Writes a frame of a game, unless the spectator has fallen too far behind, in which case it stops receiving
+            frames of the game until its buffered frames are sent and it has been sent a new snapshot.
+
+        Params:
+            Broadcast: The game the frame belongs to.
+            bytes: The encoded frame.
+        """
+        if broadcast in self.lagging or self.writer.transport.is_closing():
+            return
+        if self.writer.transport.get_write_buffer_size() > SPECTATOR_BUFFER_LIMIT:
+            self.lagging.add(broadcast)
+            task = asyncio.get_running_loop().create_task(self.resync(broadcast))
+            self.resyncs.add(task)
+            task.add_done_callback(self.resyncs.discard)
+            return
+        self.writer.write(frame)
+        self.frames_sent += 1
+
+    async def resync(self, broadcast: 'Broadcast'):
+        """
+        Waits for the spectator's buffered frames to be sent, then sends a snapshot of the game in place
+            of the deltas it missed. Disconnects the spectator if it does not catch up within SPECTATOR_TIMEOUT.
+
+        Params:
+            Broadcast: The game to catch up with.
+        """
+        try:
+            await asyncio.wait_for(self.writer.drain(), SPECTATOR_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.writer.transport.abort()
+            return
+        except ConnectionError:
+            return
+        finally:
+            self.lagging.discard(broadcast)
+        if self in broadcast.spectators and not self.writer.transport.is_closing():
+            self.writer.write(broadcast.encode_snapshot())
+            self.frames_sent += 1
+
+
+class Broadcast:
+    """
+    Sends a game's tile changes to its spectators. A spectator is first sent a snapshot of every tile,
+        then a delta of the tiles changed by each Board mutation, each tagged with the game's frame sequence number.
+
+    Each frame is encoded once, as a line of JSON, and the same bytes are written to every spectator,
+        so the cost of a move does not grow with the number of spectators beyond one write each.
+    """
+
+    def __init__(self, game_id: int):
+        """
+        Initializes a Broadcast object with no Board and no spectators.
+
+        Params:
+            int: The ID the game is watched by.
+        """
+        self.game_id: int = game_id
+        self.board: Board | None = None
+        self.spectators: set[Spectator] = set()
+        self.seq: int = 0
+        self.frames_encoded: int = 0
+        self.bytes_encoded: int = 0
+
+    def set_board(self, board: Board):
+        """
+        Broadcasts the changes of a Board instead of the current one. Spectators are sent a snapshot
+            once the new Board is reset.
+
+        Params:
+            Board: The Board to broadcast.
+        """
+        if self.board is not None:
+            self.board.unsubscribe(self.on_board_change)
+        self.board = board
+        board.subscribe(self.on_board_change)
+
+    def add(self, spectator: Spectator):
+        """
+        Starts sending frames to a spectator, beginning with a snapshot if a game has started.
+            The snapshot is sent like any other frame, so a spectator that has fallen behind is sent it once it catches up.
+
+        Params:
+            Spectator: The spectator.
+        """
+        self.spectators.add(spectator)
+        if self.board is not None:
+            spectator.send(self, self.encode_snapshot())
+
+    def remove(self, spectator: Spectator):
+        """
+        Stops sending frames to a spectator.
+
+        Params:
+            Spectator: The spectator.
+        """
+        self.spectators.discard(spectator)
+
+    def close(self):
+        """
+        Tells every spectator the game has ended for good, and stops broadcasting.
+        """
+        frame = self.encode_frame('end', None)
+        for spectator in self.spectators:
+            if not spectator.writer.transport.is_closing():
+                spectator.writer.write(frame)
+        self.spectators = set()
+        if self.board is not None:
+            self.board.unsubscribe(self.on_board_change)
+            self.board = None
+
+    def on_board_change(self, change_set: ChangeSet):
+        """
+        Subscribed to the Board. Encodes the change once and sends it to every spectator. A reset, or a change to so many
+            tiles that a snapshot would be smaller, is sent as a snapshot.
+
+        Params:
+            ChangeSet: The tiles changed by a Board mutation.
+        """
+        self.seq += 1
+        if len(self.spectators) == 0:
+            return
+        if change_set.kind == 'reset':
+            frame = self.encode_snapshot()
+        else:
+            kind = 'delta'
+            data = encode_delta(self.board.states, change_set.indices)
+            # a delta of most of the field can be larger than a snapshot, whose runs merge tiles of the same state
+            if 4 * len(change_set.indices) >= self.board.size:
+                snapshot = encode_snapshot(self.board.states)
+                if len(snapshot) < len(data):
+                    kind, data = 'snapshot', snapshot
+            frame = self.encode_frame(kind, data)
+        self.send(frame)
+
+    def send(self, frame: bytes):
+        """
+        Writes an encoded frame to every spectator.
+
+        Params:
+            bytes: The encoded frame.
+        """
+        for spectator in self.spectators:
+            spectator.send(self, frame)
+
+    def encode_snapshot(self) -> bytes:
+        """
+        Returns:
+            bytes: A frame with every tile of the Board at the current sequence number.
+        """
+        return self.encode_frame('snapshot', encode_snapshot(self.board.states))
+
+    def encode_frame(self, kind: str, data: bytes | None) -> bytes:
+        """
+        Params:
+            str: The kind of frame ('snapshot', 'delta' or 'end').
+            bytes | None: The encoded tiles, or None for a frame without tiles.
+
+        Returns:
+            bytes: The frame as a line of compact JSON, with the tiles in base64.
+        """
+        frame = {'frame': kind, 'game': self.game_id, 'seq': self.seq}
+        board = self.board
+        if board is not None and data is not None:
+            if kind == 'snapshot':
+                frame.update({'rows': board.rows, 'cols': board.cols, 'mines': board.num_mines})
+            frame.update({'flags': board.flags_remaining, 'won': board.won, 'lost': board.lost,
+                          'data': base64.b64encode(data).decode('ascii')})
+        encoded = json.dumps(frame, separators=(',', ':')).encode() + b'\n'
+        self.frames_encoded += 1
+        self.bytes_encoded += len(encoded)
+        return encoded
+
+
+def encode_snapshot(states: bytes) -> bytes:
+    """
+    Run-length encodes the states of every tile. Each run of tiles with the same state is written as
+        a variable length integer holding the length of the run above the 4 bits of the TileStates value.
+
+    Params:
+        bytes: The TileStates value of every tile.
+
+    Returns:
+        bytes: The encoded tiles.
+    """
+    encoded = bytearray()
+    size = len(states)
+    start = 0
+    while start < size:
+        state = states[start]
+        end = start + 1
+        while end < size and states[end] == state:
+            end += 1
+        encoded += encode_varint((end - start) << 4 | state)
+        start = end
+    return bytes(encoded)
+
+
+def decode_snapshot(data: bytes, size: int) -> bytearray:
+    """
+    Decodes the tiles of a snapshot written by encode_snapshot.
+
+    Params:
+        bytes: The encoded tiles.
+        int: The number of tiles in the field.
+
+    Returns:
+        bytearray: The TileStates value of every tile.
+
+    Raises:
+        ValueError: If the data does not describe exactly the given number of tiles.
+    """
+    states = bytearray()
+    offset = 0
+    while offset < len(data):
+        run, offset = decode_varint(data, offset)
+        states += bytes([run & 0xf]) * (run >> 4)
+    if len(states) != size:
+        raise ValueError('Invalid snapshot')
+    return states
+
+
+def encode_delta(states: bytes, indices: list[int]) -> bytes:
+    """
+    Encodes the new states of changed tiles. Changed tiles are grouped into runs of consecutive indices, such as the rows
+        of an opening. Each run is written as the gap since the end of the previous run and its length, as variable
+        length integers, followed by the 4 bit TileStates values of its tiles, two to a byte.
+
+    Params:
+        bytes: The TileStates value of every tile.
+        list[int]: The indices of the changed tiles, each listed once.
+
+    Returns:
+        bytes: The encoded changes.
+    """
+    encoded = bytearray()
+    ordered = sorted(indices)
+    count = len(ordered)
+    previous_end = 0
+    start = 0
+    while start < count:
+        end = start + 1
+        while end < count and ordered[end] == ordered[end - 1] + 1:
+            end += 1
+        first = ordered[start]
+        length = end - start
+        encoded += encode_varint(first - previous_end)
+        encoded += encode_varint(length)
+        for i in range(first, first + length - 1, 2):
+            encoded.append(states[i] | states[i + 1] << 4)
+        if length % 2 == 1:
+            encoded.append(states[first + length - 1])
+        previous_end = first + length
+        start = end
+    return bytes(encoded)
+
+
+def apply_delta(states: bytearray, data: bytes):
+    """
+    Applies changes written by encode_delta to the states of every tile.
+
+    Params:
+        bytearray: The TileStates value of every tile, which is updated.
+        bytes: The encoded changes.
+
+    Raises:
+        ValueError: If the data is truncated or changes tiles outside the field.
+    """
+    offset = 0
+    position = 0
+    while offset < len(data):
+        gap, offset = decode_varint(data, offset)
+        length, offset = decode_varint(data, offset)
+        position += gap
+        packed = data[offset:offset + (length + 1) // 2]
+        if len(packed) != (length + 1) // 2 or position + length > len(states):
+            raise ValueError('Invalid delta')
+        offset += len(packed)
+        for n in range(length):
+            states[position + n] = packed[n >> 1] >> 4 * (n & 1) & 0xf
+        position += length
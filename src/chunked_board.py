@@ -0,0 +1,698 @@
+import argparse
+from array import array
+from collections import OrderedDict, deque
+import random
+import sys
+import time
+import zlib
+
+from board import sample_mines
+from enums import TileStates
+
+
+# chunks are square with a power of two side, so positions split into a chunk and an offset with shifts and masks
+CHUNK_SHIFT = 6
+CHUNK_SIZE = 1 << CHUNK_SHIFT
+CHUNK_MASK = CHUNK_SIZE - 1
+CHUNK_AREA = CHUNK_SIZE * CHUNK_SIZE
+# the number of chunks kept in memory between moves, at about 12 KB each
+MAX_LOADED_CHUNKS = 256
+# the number of tiles a single move uncovers before the rest of its flood fill is left for later moves
+MAX_FLOOD_TILES = 1 << 16
+# below this density the empty area around a tile can stretch across the whole field, as a tile has no adjacent
+# mines with probability (1 - density)^9, near the 0.41 percolation threshold of tiles connected to all 8 neighbors
+MIN_DENSITY = 0.1
+# the number of chunks whose generated mines are kept for counting mines across the edges of loaded chunks
+MAX_CACHED_MINES = 1024
+# adjacent mine counts are added up on a grid with a border of two tiles, so mines next to the chunk need no bounds checks
+PADDED_SIZE = CHUNK_SIZE + 4
+PADDED_OFFSETS = (-PADDED_SIZE - 1, -PADDED_SIZE, -PADDED_SIZE + 1, -1, 1, PADDED_SIZE - 1, PADDED_SIZE, PADDED_SIZE + 1)
+
+
+class Chunk:
+    """
+    A square block of tiles of a ChunkedBoard. Tiles are stored in flat bytearrays indexed by y*CHUNK_SIZE + x
+        relative to the top-left tile of the chunk, so chunks on the right and bottom edges of the field
+        leave the part outside the field unused.
+    """
+
+    def __init__(self, cx: int, cy: int, width: int, height: int, states: bytearray | None = None):
+        """
+        Initializes a Chunk object with no mines generated.
+
+        Params:
+            int: The column of the chunk.
+            int: The row of the chunk.
+            int: The number of columns of the chunk within the field.
+            int: The number of rows of the chunk within the field.
+            bytearray | None: The tile states saved when the chunk was evicted. Defaults to every tile hidden.
+        """
+        self.cx: int = cx
+        self.cy: int = cy
+        self.x: int = cx << CHUNK_SHIFT
+        self.y: int = cy << CHUNK_SHIFT
+        self.width: int = width
+        self.height: int = height
+        self.states: bytearray = states if states is not None else bytearray([TileStates.HIDDEN]) * CHUNK_AREA
+        self.mine_indices: list[int] = []
+        self.mines: bytearray | None = None
+        self.counts: bytearray | None = None
+
+
+class ChunkedBoard:
+    """
+    A Minesweeper rules engine for fields far too large to allocate up front, with the same moves as Board.
+
+    The field is split into chunks, and a chunk is only created when one of its tiles is first changed.
+        The mines of each chunk are generated from the seed and the chunk position alone, so any chunk can be
+        generated again at any time, and adjacent mine counts along chunk edges are found by generating the
+        mines of the neighboring chunks. Only the most recently used chunks are kept in memory; other chunks
+        are evicted, keeping only their compressed tile states if they have been played.
+    """
+
+    def __init__(self, rows: int, cols: int, density: float, seed: int | str | None = None):
+        """
+        Initializes a ChunkedBoard object with no mines planted.
+
+        Params:
+            int: The number of rows in the field.
+            int: The number of columns in the field.
+            float: The fraction of tiles of each chunk holding a mine, at least MIN_DENSITY and less than 0.5.
+            int | str | None: The seed the mines are generated from. Will choose one at random if not provided.
+
+        Raises:
+            ValueError: If the dimensions or density are not valid.
+        """
+        if rows <= 0 or cols <= 0:
+            raise ValueError('The field must have at least one row and column')
+        if not MIN_DENSITY <= density < 0.5:
+            raise ValueError(f'The mine density must be at least {MIN_DENSITY} and less than 0.5')
+        self.rows: int = rows
+        self.cols: int = cols
+        self.density: float = density
+        self.size: int = rows * cols
+        self.chunk_rows: int = (rows + CHUNK_MASK) >> CHUNK_SHIFT
+        self.chunk_cols: int = (cols + CHUNK_MASK) >> CHUNK_SHIFT
+        self.num_mines: int = self.count_mines()
+        self.rng: random.Random = random.Random()
+        self.seed: int | str = 0
+        self.chunks: OrderedDict[tuple[int, int], Chunk] = OrderedDict()
+        # compressed tile states of evicted chunks that have been played
+        self.cold: dict[tuple[int, int], bytes] = {}
+        self.mine_cache: OrderedDict[tuple[int, int], array] = OrderedDict()
+        self.flags: set[tuple[int, int]] = set()
+        # uncovered tiles with no adjacent mines whose neighbors the flood fill has yet to uncover, by chunk and index
+        self.frontier: deque[tuple[tuple[int, int], int]] = deque()
+        self.first_click: int | None = None
+        # the tile whose surrounding area is kept free of mines
+        self.safe_center: tuple[int, int] | None = None
+        self.planted: bool = False
+        self.uncovered_tiles: int = 0
+        self.won: bool = False
+        self.lost: bool = False
+        self.reset(seed)
+
+    def reset(self, seed: int | str | None = None):
+        """
+        Resets the ChunkedBoard to a new game with the same dimensions and no mines planted.
+
+        Params:
+            int | str | None: The seed the mines are generated from. Will choose one at random if not provided.
+        """
+        self.seed = seed if seed is not None else self.rng.getrandbits(64)
+        self.chunks = OrderedDict()
+        self.cold = {}
+        self.mine_cache = OrderedDict()
+        self.flags = set()
+        self.frontier = deque()
+        self.first_click = None
+        self.safe_center = None
+        self.planted = False
+        self.uncovered_tiles = 0
+        self.won = False
+        self.lost = False
+
+    @property
+    def game_over(self) -> bool:
+        """
+        Returns:
+            bool: True iff the game has been won or lost.
+        """
+        return self.won or self.lost
+
+    @property
+    def started(self) -> bool:
+        """
+        Returns:
+            bool: True iff mines have been planted, i.e. the first tile has been revealed.
+        """
+        return self.planted
+
+    @property
+    def flooding(self) -> bool:
+        """
+        Returns:
+            bool: True iff a flood fill stopped at MAX_FLOOD_TILES has tiles left to uncover.
+        """
+        return len(self.frontier) > 0
+
+    @property
+    def flags_remaining(self) -> int:
+        """
+        Returns:
+            int: The number of mines minus the number of flagged tiles.
+        """
+        return self.num_mines - len(self.flags)
+
+    def index(self, pos: tuple[int, int]) -> int:
+        """
+        Params:
+            tuple[int, int]: A (x, y) position.
+
+        Returns:
+            int: The index of the position in row-major order, as used by Board.
+        """
+        return pos[1]*self.cols + pos[0]
+
+    def position(self, index: int) -> tuple[int, int]:
+        """
+        Params:
+            int: An index in row-major order.
+
+        Returns:
+            tuple[int, int]: The (x, y) position of the index.
+        """
+        return (index % self.cols, index // self.cols)
+
+    def in_bounds(self, pos: tuple[int, int]) -> bool:
+        """
+        Params:
+            tuple[int, int]: A (x, y) position.
+
+        Returns:
+            bool: True iff the position lies within the field.
+        """
+        return 0 <= pos[0] < self.cols and 0 <= pos[1] < self.rows
+
+    def get_chunk_dimensions(self, cx: int, cy: int) -> tuple[int, int]:
+        """
+        Params:
+            int: The column of the chunk.
+            int: The row of the chunk.
+
+        Returns:
+            tuple[int, int]: The number of columns and rows of the chunk within the field.
+        """
+        return (min(CHUNK_SIZE, self.cols - (cx << CHUNK_SHIFT)), min(CHUNK_SIZE, self.rows - (cy << CHUNK_SHIFT)))
+
+    def get_chunk_mine_count(self, width: int, height: int) -> int:
+        """
+        Params:
+            int: The number of columns of a chunk within the field.
+            int: The number of rows of a chunk within the field.
+
+        Returns:
+            int: The number of mines in the chunk.
+        """
+        return round(self.density * width * height)
+
+    def count_mines(self) -> int:
+        """
+        Helper function to add up the mines of every chunk. Only chunks on the right and bottom edges of the field
+            can be smaller than CHUNK_SIZE, so this does not depend on the number of chunks.
+
+        Returns:
+            int: The number of mines in the field.
+        """
+        full_cols, last_width = divmod(self.cols, CHUNK_SIZE)
+        full_rows, last_height = divmod(self.rows, CHUNK_SIZE)
+        total = full_cols * full_rows * self.get_chunk_mine_count(CHUNK_SIZE, CHUNK_SIZE)
+        total += full_rows * self.get_chunk_mine_count(last_width, CHUNK_SIZE)
+        total += full_cols * self.get_chunk_mine_count(CHUNK_SIZE, last_height)
+        total += self.get_chunk_mine_count(last_width, last_height)
+        return total
+
+    def generate_mines(self, cx: int, cy: int) -> list[int]:
+        """
+        Generates the mines of a chunk from the seed, excluding the area around the first tile revealed.
+
+        Params:
+            int: The column of the chunk.
+            int: The row of the chunk.
+
+        Returns:
+            list[int]: The indices of the mines within the chunk.
+        """
+        width, height = self.get_chunk_dimensions(cx, cy)
+        num_mines = self.get_chunk_mine_count(width, height)
+        if num_mines == 0:
+            return []
+
+        # the excluded tiles are numbered by position within the field part of the chunk, as sample_mines expects
+        excluded = set()
+        center = self.safe_center
+        if center is not None:
+            x0 = cx << CHUNK_SHIFT
+            y0 = cy << CHUNK_SHIFT
+            for y in range(center[1] - 1, center[1] + 2):
+                for x in range(center[0] - 1, center[0] + 2):
+                    if x0 <= x < x0 + width and y0 <= y < y0 + height:
+                        excluded.add((y - y0)*width + x - x0)
+            # fall back to only the tile itself, which always fits as less than half of each chunk holds mines
+            if width*height - len(excluded) < num_mines:
+                excluded = {(center[1] - y0)*width + center[0] - x0} if (center[0] >> CHUNK_SHIFT,
+                                                                         center[1] >> CHUNK_SHIFT) == (cx, cy) else set()
+
+        rng = random.Random(f'%s:%d:%d' % (self.seed, cx, cy))
+        indices = sample_mines(width*height, num_mines, excluded, rng)
+        return [(i // width) << CHUNK_SHIFT | i % width for i in indices]
+
+    def get_mines(self, cx: int, cy: int) -> array:
+        """
+        Gets the mines of a chunk, generating them if they are not cached.
+
+        Params:
+            int: The column of the chunk.
+            int: The row of the chunk.
+
+        Returns:
+            array: The indices of the mines within the chunk.
+        """
+        key = (cx, cy)
+        mines = self.mine_cache.get(key)
+        if mines is not None:
+            self.mine_cache.move_to_end(key)
+            return mines
+        mines = array('H', self.generate_mines(cx, cy))
+        self.mine_cache[key] = mines
+        if len(self.mine_cache) > MAX_CACHED_MINES:
+            self.mine_cache.popitem(last=False)
+        return mines
+
+    def fill_chunk(self, chunk: Chunk):
+        """
+        Helper function to get the mines of a chunk and the number of adjacent mines of each of its tiles,
+            using the mines of neighboring chunks to count mines across chunk edges.
+
+        Params:
+            Chunk: The chunk to fill.
+        """
+        chunk.mine_indices = list(self.get_mines(chunk.cx, chunk.cy))
+        mines = bytearray(CHUNK_AREA)
+        for i in chunk.mine_indices:
+            mines[i] = 1
+
+        padded = bytearray(PADDED_SIZE * PADDED_SIZE)
+        for cy in range(max(chunk.cy - 1, 0), min(chunk.cy + 2, self.chunk_rows)):
+            for cx in range(max(chunk.cx - 1, 0), min(chunk.cx + 2, self.chunk_cols)):
+                if (cx, cy) == (chunk.cx, chunk.cy):
+                    mine_indices = chunk.mine_indices
+                else:
+                    # only mines within one tile of the chunk change its counts
+                    x_min = CHUNK_MASK if cx < chunk.cx else 0
+                    x_max = 0 if cx > chunk.cx else CHUNK_MASK
+                    y_min = CHUNK_MASK if cy < chunk.cy else 0
+                    y_max = 0 if cy > chunk.cy else CHUNK_MASK
+                    mine_indices = [i for i in self.get_mines(cx, cy)
+                                    if x_min <= i & CHUNK_MASK <= x_max and y_min <= i >> CHUNK_SHIFT <= y_max]
+                x_offset = ((cx - chunk.cx) << CHUNK_SHIFT) + 2
+                y_offset = ((cy - chunk.cy) << CHUNK_SHIFT) + 2
+                for i in mine_indices:
+                    j = ((i >> CHUNK_SHIFT) + y_offset)*PADDED_SIZE + (i & CHUNK_MASK) + x_offset
+                    for offset in PADDED_OFFSETS:
+                        padded[j + offset] += 1
+
+        counts = bytearray(CHUNK_AREA)
+        for y in range(chunk.height):
+            row = (y + 2)*PADDED_SIZE + 2
+            counts[y << CHUNK_SHIFT:(y << CHUNK_SHIFT) + chunk.width] = padded[row:row + chunk.width]
+        chunk.mines = mines
+        chunk.counts = counts
+
+    def load_chunk(self, key: tuple[int, int]) -> Chunk:
+        """
+        Gets a chunk, creating it if it is not loaded and marking it as the most recently used.
+
+        Params:
+            tuple[int, int]: The column and row of the chunk.
+
+        Returns:
+            Chunk: The chunk.
+        """
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+
+        saved = self.cold.pop(key, None)
+        width, height = self.get_chunk_dimensions(key[0], key[1])
+        chunk = Chunk(key[0], key[1], width, height, bytearray(zlib.decompress(saved)) if saved is not None else None)
+        if self.planted:
+            self.fill_chunk(chunk)
+            if self.lost:
+                self.reveal_mines(chunk)
+        self.chunks[key] = chunk
+        return chunk
+
+    def trim(self):
+        """
+        Helper function to evict the least recently used chunks until at most MAX_LOADED_CHUNKS are loaded.
+            The tile states of evicted chunks that have been played are compressed and kept; their mines
+            and counts are generated again when they are next loaded.
+        """
+        while len(self.chunks) > MAX_LOADED_CHUNKS:
+            key, chunk = self.chunks.popitem(last=False)
+            if chunk.states.count(TileStates.HIDDEN) != CHUNK_AREA:
+                self.cold[key] = zlib.compress(chunk.states)
+
+    def get_state(self, pos: tuple[int, int]) -> int:
+        """
+        Params:
+            tuple[int, int]: The tile position within the field.
+
+        Returns:
+            int: The TileStates value of the tile (UNCOVERED + n for an uncovered tile with n adjacent mines).
+        """
+        key = (pos[0] >> CHUNK_SHIFT, pos[1] >> CHUNK_SHIFT)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            # chunks that have never been played are hidden until the game is lost
+            if key not in self.cold and not self.lost:
+                return TileStates.HIDDEN
+            chunk = self.load_chunk(key)
+            self.trim()
+        return chunk.states[(pos[1] & CHUNK_MASK) << CHUNK_SHIFT | pos[0] & CHUNK_MASK]
+
+    def is_mine(self, pos: tuple[int, int]) -> bool:
+        """
+        Params:
+            tuple[int, int]: The tile position within the field.
+
+        Returns:
+            bool: True iff a mine is planted at the position.
+        """
+        if not self.planted:
+            return False
+        chunk = self.load_chunk((pos[0] >> CHUNK_SHIFT, pos[1] >> CHUNK_SHIFT))
+        mine = chunk.mines[(pos[1] & CHUNK_MASK) << CHUNK_SHIFT | pos[0] & CHUNK_MASK] == 1
+        self.trim()
+        return mine
+
+    def get_neighbors(self, pos: tuple[int, int]) -> list[tuple[int, int]]:
+        """
+        Params:
+            tuple[int, int]: The tile position within the field.
+
+        Returns:
+            list[tuple[int, int]]: The positions of all tiles in the surrounding 3x3 area, excluding the tile itself.
+        """
+        return [(x, y) for x in range(max(pos[0] - 1, 0), min(pos[0] + 2, self.cols))
+                for y in range(max(pos[1] - 1, 0), min(pos[1] + 2, self.rows)) if (x, y) != (pos[0], pos[1])]
+
+    def plant(self, pos: tuple[int, int]):
+        """
+        Plants mines so that none are in the 3x3 area around a tile, generating the mines of every loaded chunk.
+
+        Params:
+            tuple[int, int]: The position within the field of the clicked tile.
+        """
+        self.safe_center = pos
+        self.planted = True
+        # mines generated before the safe area was known are generated again
+        self.mine_cache = OrderedDict()
+        for chunk in self.chunks.values():
+            self.fill_chunk(chunk)
+
+    def reveal(self, pos: tuple[int, int]) -> bool:
+        """
+        Reveals a hidden tile (left click), planting mines first if this is the first reveal.
+
+        Params:
+            tuple[int, int]: The tile position within the field.
+
+        Returns:
+            bool: True iff a safe tile was uncovered.
+        """
+        if self.game_over or self.get_state(pos) != TileStates.HIDDEN:
+            return False
+        if self.first_click is None:
+            self.first_click = self.index(pos)
+        if not self.planted:
+            self.plant(pos)
+        if self.is_mine(pos):
+            chunk = self.load_chunk((pos[0] >> CHUNK_SHIFT, pos[1] >> CHUNK_SHIFT))
+            chunk.states[(pos[1] & CHUNK_MASK) << CHUNK_SHIFT | pos[0] & CHUNK_MASK] = TileStates.MINE_HIT
+            self.loss()
+            return False
+        self.uncover(pos)
+        self.trim()
+        return True
+
+    def toggle_flag(self, pos: tuple[int, int]) -> bool:
+        """
+        Flags a hidden tile or removes the flag from a flagged tile (right click).
+
+        Params:
+            tuple[int, int]: The tile position within the field.
+
+        Returns:
+            bool: True iff a flag was placed.
+        """
+        if self.game_over:
+            return False
+        chunk = self.load_chunk((pos[0] >> CHUNK_SHIFT, pos[1] >> CHUNK_SHIFT))
+        i = (pos[1] & CHUNK_MASK) << CHUNK_SHIFT | pos[0] & CHUNK_MASK
+        placed = False
+        if chunk.states[i] == TileStates.HIDDEN:
+            chunk.states[i] = TileStates.FLAG
+            self.flags.add(pos)
+            placed = True
+        elif chunk.states[i] == TileStates.FLAG:
+            chunk.states[i] = TileStates.HIDDEN
+            self.flags.discard(pos)
+        self.trim()
+        return placed
+
+    def get_chord_info(self, pos: tuple[int, int]) -> tuple[bool, list[tuple[int, int]]]:
+        """
+        Checks if a tile can be chorded and gets the list of tiles that would be uncovered with a chord
+            (left and right click simultaneously).
+
+        Params:
+            tuple[int, int]: The tile position within the field.
+
+        Returns:
+            tuple[bool, list[tuple[int, int]]]: A boolean representing whether the tile can currently be chorded
+                and the positions of tiles that would be uncovered if the chord is valid.
+        """
+        state = self.get_state(pos)
+        if state > TileStates.UNCOVERED + 8:
+            return (False, [])
+
+        flag_count = 0
+        neighbors = []
+        for neighbor in self.get_neighbors(pos):
+            neighbor_state = self.get_state(neighbor)
+            if neighbor_state == TileStates.FLAG:
+                flag_count += 1
+            elif neighbor_state == TileStates.HIDDEN:
+                neighbors.append(neighbor)
+
+        return (flag_count == state - TileStates.UNCOVERED, neighbors)
+
+    def chord(self, pos: tuple[int, int]) -> bool:
+        """
+        If the correct number of adjacent tiles has been flagged, uncovers all adjacent hidden tiles.
+
+        Params:
+            tuple[int, int]: The position within the field of the center tile.
+
+        Returns:
+            bool: True iff at least one safe tile was uncovered.
+        """
+        if self.game_over:
+            return False
+        can_chord, to_chord = self.get_chord_info(pos)
+        if not can_chord:
+            return False
+
+        for tile_pos in to_chord:
+            if self.is_mine(tile_pos):
+                chunk = self.load_chunk((tile_pos[0] >> CHUNK_SHIFT, tile_pos[1] >> CHUNK_SHIFT))
+                chunk.states[(tile_pos[1] & CHUNK_MASK) << CHUNK_SHIFT | tile_pos[0] & CHUNK_MASK] = TileStates.MINE_HIT
+                self.loss()
+                return False
+
+        for tile_pos in to_chord:
+            # earlier tiles may have already flooded into this one
+            if self.get_state(tile_pos) == TileStates.HIDDEN:
+                self.uncover(tile_pos)
+        self.trim()
+        return len(to_chord) > 0
+
+    def uncover(self, pos: tuple[int, int]):
+        """
+        Uncovers the tile and its surroundings at a given position. At most MAX_FLOOD_TILES tiles are uncovered,
+            including tiles left over from earlier flood fills; the rest are uncovered by later moves or continue_flood.
+
+        Params:
+            tuple[int, int]: The tile position within the field.
+        """
+        if not self.planted:
+            self.plant(pos)
+
+        key = (pos[0] >> CHUNK_SHIFT, pos[1] >> CHUNK_SHIFT)
+        chunk = self.load_chunk(key)
+        start = (pos[1] & CHUNK_MASK) << CHUNK_SHIFT | pos[0] & CHUNK_MASK
+        chunk.states[start] = TileStates.UNCOVERED + chunk.counts[start]
+        self.uncovered_tiles += 1
+        if chunk.counts[start] == 0:
+            self.frontier.append((key, start))
+        self.flood(MAX_FLOOD_TILES - 1)
+
+    def continue_flood(self) -> int:
+        """
+        Uncovers up to MAX_FLOOD_TILES more tiles of a flood fill left unfinished by an earlier move.
+
+        Returns:
+            int: The number of tiles uncovered.
+        """
+        if self.game_over:
+            return 0
+        uncovered = self.flood(MAX_FLOOD_TILES)
+        self.trim()
+        return uncovered
+
+    def flood(self, limit: int) -> int:
+        """
+        Helper function to perform breadth first search from the tiles in the frontier, stopping along edges with
+            neighboring mines, until the frontier is empty or about limit tiles have been uncovered.
+
+        The search only looks up another chunk for tiles on a chunk edge, so it only loads the chunks it opens
+            tiles in, and it evicts chunks as it goes so that no more than MAX_LOADED_CHUNKS stay loaded.
+
+        Params:
+            int: The number of tiles to uncover before stopping.
+
+        Returns:
+            int: The number of tiles uncovered.
+        """
+        cols = self.cols
+        rows = self.rows
+        offsets = (-CHUNK_SIZE - 1, -CHUNK_SIZE, -CHUNK_SIZE + 1, -1, 1, CHUNK_SIZE - 1, CHUNK_SIZE, CHUNK_SIZE + 1)
+        hidden = int(TileStates.HIDDEN)
+        uncovered_state = int(TileStates.UNCOVERED)
+        frontier = self.frontier
+        uncovered = 0
+        chunk = None
+        while frontier and uncovered < limit:
+            key, current = frontier.popleft()
+            if chunk is None or (chunk.cx, chunk.cy) != key:
+                chunk = self.load_chunk(key)
+            x = current & CHUNK_MASK
+            y = current >> CHUNK_SHIFT
+            # tiles away from the chunk edges only have neighbors within the same chunk
+            if 0 < x < chunk.width - 1 and 0 < y < chunk.height - 1:
+                states = chunk.states
+                counts = chunk.counts
+                for offset in offsets:
+                    i = current + offset
+                    if states[i] == hidden:
+                        states[i] = uncovered_state + counts[i]
+                        uncovered += 1
+                        if counts[i] == 0:
+                            frontier.append((key, i))
+                continue
+
+            x += chunk.x
+            y += chunk.y
+            for ny in range(max(y - 1, 0), min(y + 2, rows)):
+                for nx in range(max(x - 1, 0), min(x + 2, cols)):
+                    neighbor_key = (nx >> CHUNK_SHIFT, ny >> CHUNK_SHIFT)
+                    neighbor = chunk if neighbor_key == key else self.load_chunk(neighbor_key)
+                    i = (ny & CHUNK_MASK) << CHUNK_SHIFT | nx & CHUNK_MASK
+                    if neighbor.states[i] == hidden:
+                        neighbor.states[i] = uncovered_state + neighbor.counts[i]
+                        uncovered += 1
+                        if neighbor.counts[i] == 0:
+                            frontier.append((neighbor_key, i))
+            if len(self.chunks) > MAX_LOADED_CHUNKS:
+                # the chunk being searched is kept, and any other chunk is loaded again when the search returns to it
+                self.chunks.move_to_end(key)
+                self.trim()
+
+        self.uncovered_tiles += uncovered
+        if self.uncovered_tiles == self.size - self.num_mines:
+            self.won = True
+        return uncovered
+
+    def reveal_mines(self, chunk: Chunk):
+        """
+        Helper function to reveal the mistakes and remaining mines of a chunk after the game is lost.
+
+        Params:
+            Chunk: The chunk to reveal.
+        """
+        states = chunk.states
+        for i in chunk.mine_indices:
+            if states[i] == TileStates.HIDDEN or states[i] == TileStates.FLAG:
+                states[i] = TileStates.MINE
+        # every flag left is not on a mine
+        chunk.states = states.replace(bytes([TileStates.FLAG]), bytes([TileStates.INCORRECT_FLAG]))
+
+    def loss(self):
+        """
+        Ends the game and reveals mistakes and remaining mines. Chunks that are not loaded are revealed
+            when they are next loaded.
+        """
+        self.lost = True
+        self.frontier = deque()
+        for chunk in self.chunks.values():
+            self.reveal_mines(chunk)
+        self.trim()
+
+
+def main():
+    """
+    Stress tests a ChunkedBoard from the command line by revealing random safe tiles across a huge field,
+        and prints the time taken and the number of chunks held in memory.
+    """
+    parser = argparse.ArgumentParser(description='Stress test Minesweeper boards too large to allocate up front.')
+    parser.add_argument('-r', '--rows', type=int, default=1000000)
+    parser.add_argument('-c', '--cols', type=int, default=1000000)
+    parser.add_argument('-d', '--density', type=float, default=0.15, help='fraction of tiles holding a mine')
+    parser.add_argument('-n', '--moves', type=int, default=10000, help='number of tiles to reveal')
+    parser.add_argument('--spread', type=int, default=4096, help='side of the area the moves are made in')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        board = ChunkedBoard(args.rows, args.cols, args.density, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    rng = random.Random(args.seed)
+    spread_x = min(args.spread, args.cols)
+    spread_y = min(args.spread, args.rows)
+    start = time.perf_counter()
+    moves = 0
+    while moves < args.moves and not board.won:
+        pos = (rng.randrange(spread_x), rng.randrange(spread_y))
+        # only safe tiles are revealed, so the game carries on
+        if board.get_state(pos) != TileStates.HIDDEN or board.is_mine(pos):
+            continue
+        board.reveal(pos)
+        moves += 1
+    elapsed = time.perf_counter() - start
+
+    print(f'%d moves on a %dx%d field in %.3fs (%.3f ms per move)' % (moves, board.rows, board.cols, elapsed,
+                                                                        1000 * elapsed / max(moves, 1)))
+    print(f'%d tiles uncovered, %d chunks loaded, %d chunks evicted (%d KB)' % (
+        board.uncovered_tiles, len(board.chunks), len(board.cold), sum(len(s) for s in board.cold.values()) // 1024))
+    if board.flooding:
+        print(f'%d tiles left in unfinished flood fills' % len(board.frontier))
+    if board.won:
+        print('The field was cleared', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+import base64
+import binascii
+import random
+import zlib
+
+from board import Board
+from const import MAX_CUSTOM_SIDE
+
+
+# the first byte of a code holds the format version, with the high bit set if the rest is compressed
+CODE_VERSION = 1
+COMPRESSED_FLAG = 0x80
+# the longest payload of a board with up to MAX_CUSTOM_SIDE rows and columns, so that a short compressed code
+# cannot expand into a huge allocation
+MAX_VARINT_LENGTH = 10
+MAX_PAYLOAD_LENGTH = 3*MAX_VARINT_LENGTH + (MAX_CUSTOM_SIDE*MAX_CUSTOM_SIDE + 7) // 8
+# maps the 0 or 1 of each tile to its binary digit
+BINARY_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+
+
+def encode_board(board: Board) -> str:
+    """
+    Encodes the dimensions, mine layout and first click of a Board as a short string that can be shared.
+
+    Params:
+        Board: A Board with mines planted.
+
+    Returns:
+        str: The board code.
+    """
+    return encode_layout(board.rows, board.cols, board.mines, board.first_click)
+
+
+def encode_layout(rows: int, cols: int, mines: bytes, first_click: int | None) -> str:
+    """
+    Encodes a mine layout as a board code. Takes the tiles rather than a Board, so that it can run on a copy of them
+        in another thread while the Board is reused.
+
+    The dimensions and first click are written as variable length integers, followed by a bitmap with
+        one bit per tile. The bytes are compressed if that makes them shorter, which is the case for large
+        sparse boards, and encoded in URL-safe base64 without padding.
+
+    Params:
+        int: The number of rows in the field.
+        int: The number of columns in the field.
+        bytes: 1 for every tile holding a mine, else 0.
+        int | None: The index of the first tile clicked, or None if no tile was clicked.
+
+    Returns:
+        str: The board code.
+    """
+    size = rows * cols
+    # the tiles are read as the binary digits of a single integer, lowest tile last, whose little-endian bytes
+    # are the bitmap, so that no Python code runs per tile
+    bitmap = int(mines.translate(BINARY_DIGITS)[::-1], 2).to_bytes((size + 7) // 8, 'little')
+    # the first click is stored off by one so that 0 can mean no click
+    first_click = first_click + 1 if first_click is not None else 0
+    payload = encode_varint(cols) + encode_varint(rows) + encode_varint(first_click) + bitmap
+
+    header = CODE_VERSION
+    compressed = zlib.compress(payload, 9)
+    if len(compressed) < len(payload):
+        header |= COMPRESSED_FLAG
+        payload = compressed
+    return base64.urlsafe_b64encode(bytes([header]) + payload).decode('ascii').rstrip('=')
+
+
+def decode_board(code: str) -> tuple[int, int, list[int], int | None]:
+    """
+    Decodes a board code created by encode_board.
+
+    Params:
+        str: The board code.
+
+    Returns:
+        tuple[int, int, list[int], int | None]: The number of rows and columns, the indices of the mines
+            and the index of the first tile clicked, or None if no tile was clicked.
+
+    Raises:
+        ValueError: If the code is not a valid board code, or its board has more than MAX_CUSTOM_SIDE rows or columns.
+    """
+    code = code.strip()
+    try:
+        data = base64.urlsafe_b64decode(code + '=' * (-len(code) % 4))
+    except (binascii.Error, ValueError):
+        raise ValueError('Invalid board code')
+    if len(data) == 0 or data[0] & ~COMPRESSED_FLAG != CODE_VERSION:
+        raise ValueError('Unsupported board code version')
+    payload = data[1:]
+    if data[0] & COMPRESSED_FLAG:
+        decompressor = zlib.decompressobj()
+        try:
+            payload = decompressor.decompress(payload, MAX_PAYLOAD_LENGTH)
+        except zlib.error:
+            raise ValueError('Invalid board code')
+        # output left over at the limit means the payload is too long
+        if not decompressor.eof or decompressor.unconsumed_tail:
+            raise ValueError('Invalid board code')
+
+    cols, offset = decode_varint(payload, 0)
+    rows, offset = decode_varint(payload, offset)
+    first_click, offset = decode_varint(payload, offset)
+    if not (0 < rows <= MAX_CUSTOM_SIDE and 0 < cols <= MAX_CUSTOM_SIDE):
+        raise ValueError('Invalid board code')
+    size = rows * cols
+    bitmap = payload[offset:]
+    if len(bitmap) != (size + 7) // 8 or first_click > size:
+        raise ValueError('Invalid board code')
+
+    mines = []
+    for byte_index, byte in enumerate(bitmap):
+        # most bytes of a sparse board are empty
+        if byte == 0:
+            continue
+        for bit in range(8):
+            if byte >> bit & 1:
+                mines.append(byte_index*8 + bit)
+    if len(mines) > 0 and mines[-1] >= size:
+        raise ValueError('Invalid board code')
+    return (rows, cols, mines, first_click - 1 if first_click > 0 else None)
+
+
+def load_board(code: str, rng: random.Random | None = None) -> Board:
+    """
+    Creates a Board with the mines of a board code planted. The first click is not revealed.
+
+    Params:
+        str: The board code.
+        Random | None: The random number generator of the Board, used once it is reset.
+
+    Returns:
+        Board: The Board described by the code, with its first_click set.
+
+    Raises:
+        ValueError: If the code is not a valid board code.
+    """
+    rows, cols, mines, first_click = decode_board(code)
+    board = Board(rows, cols, len(mines), rng)
+    board.load_mines(mines)
+    board.first_click = first_click
+    return board
+
+
+def encode_varint(value: int) -> bytes:
+    """
+    Helper function to encode a non-negative integer in as few bytes as possible, 7 bits per byte.
+
+    Params:
+        int: The integer to encode.
+
+    Returns:
+        bytes: The encoded integer. Every byte but the last has its high bit set.
+    """
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append(value & 0x7f | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def decode_varint(data: bytes, offset: int) -> tuple[int, int]:
+    """
+    Helper function to decode an integer written by encode_varint.
+
+    Params:
+        bytes: The data to read from.
+        int: The index of the first byte of the integer.
+
+    Returns:
+        tuple[int, int]: The integer and the index of the byte after it.
+
+    Raises:
+        ValueError: If the data ends before the integer does, or it is longer than MAX_VARINT_LENGTH bytes.
+    """
+    value = 0
+    shift = 0
+    while True:
+        # integers are at most 64 bits, so a long run of continuation bytes does not build an unbounded integer
+        if offset >= len(data) or shift >= 7*MAX_VARINT_LENGTH:
+            raise ValueError('Invalid board code')
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return (value, offset)
+        shift += 7
@@ -20,6 +20,7 @@ DIFFICULTIES = {
 }
 FRAMERATE = 30
 MARGIN = 1
+MAX_CUSTOM_SIDE = 5000
 MAX_NAME_LENGTH = 6
 NUM_HIGH_SCORES = 5
 ROOT_DIR = str(Path(__file__).resolve().parent.parent)
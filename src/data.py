@@ -1,11 +1,19 @@
 import json
 import os
+import time
 
-from const import ROOT_DIR
+from const import NUM_HIGH_SCORES, ROOT_DIR
+from scores import ScoreStore
+from stats import StatsDatabase, sqlite3
 
 
 DEFAULT_SETTINGS = {
-    'sound_enabled': True
+    'sound_enabled': True,
+    'no_guess': {
+        'beginner': False,
+        'intermediate': False,
+        'expert': False
+    }
 }
 
 
@@ -14,15 +22,38 @@ class Data:
     A class for managing file data, such as high scores and saved settings.
     """
 
-    def __init__(self):
+    def __init__(self, use_statistics: bool = True, folder: str = ROOT_DIR + '/data'):
         """
-        Initializes a Data object, creating the folder for saved data if it does not exist.
+        Initializes a Data object, creating the folder for saved data if it does not exist, and loads high scores.
+
+        Params:
+            bool: True iff every game should be recorded in the statistics database, if SQLite is available.
+            str: The folder to save data in. Defaults to the data folder of the game.
         """
-        self.high_scores_path: str = ROOT_DIR + '/data/highscores.txt'
-        self.settings_path: str = ROOT_DIR + '/data/settings.txt'
+        self.high_scores_path: str = folder + '/highscores.log'
+        self.old_high_scores_path: str = folder + '/highscores.txt'
+        self.settings_path: str = folder + '/settings.txt'
+        self.replays_path: str = folder + '/replays'
+        self.statistics_path: str = folder + '/statistics.db'
+        self.profile_path: str = folder + '/profile.json'
+        # the number of times saved data has been read, shown by the frame profiler
+        self.file_reads: int = 0
         
-        if not os.path.exists(ROOT_DIR + '/data'):
-            os.makedirs(ROOT_DIR + '/data')
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        self.scores: ScoreStore = ScoreStore(self.high_scores_path)
+        self.migrate_scores()
+        # high score views are served from memory until the log is changed by another process
+        self.scores_stamp: tuple[int, int] | None = self.get_scores_stamp()
+        self.score_views: dict[str, list[tuple[str, float]]] = {}
+
+        self.stats: StatsDatabase | None = None
+        if use_statistics and sqlite3 is not None:
+            try:
+                self.stats = StatsDatabase(self.statistics_path)
+            # statistics are optional, so the game is still playable without them
+            except sqlite3.Error:
+                self.stats = None
     
     def write_settings(self, data: dict):
         """
@@ -40,18 +71,62 @@ class Data:
             dict: Settings data.
         """
         try:
+            self.file_reads += 1
             file = open(self.settings_path, 'r', encoding='utf-8')
             settings_str = file.read()
             file.close()
             data = json.loads(settings_str)
-            return data
+            # fill in settings missing from files saved by older versions
+            settings = dict(DEFAULT_SETTINGS)
+            settings.update(data)
+            return settings
         # file does not exist or is invalid
         except:
             return DEFAULT_SETTINGS
 
+    def write_replay(self, data: dict) -> str:
+        """
+        Writes a replay to its own file in the replays folder.
+
+        Params:
+            dict: Replay data.
+
+        Returns:
+            str: The path of the replay file, or '' if it could not be written.
+        """
+        path = f'%s/%s-%d.json' % (self.replays_path, data.get('difficulty', 'custom'), time.time() * 1000)
+        try:
+            if not os.path.exists(self.replays_path):
+                os.makedirs(self.replays_path)
+            file = open(path, mode='w+', encoding='utf-8')
+            file.write(json.dumps(data))
+            file.close()
+            return path
+        except OSError:
+            return ''
+
+    def write_profile(self, data: dict) -> str:
+        """
+        Writes a frame profiler report to profile.json, replacing the previous one.
+
+        Params:
+            dict: Report data.
+
+        Returns:
+            str: The path of the report file, or '' if it could not be written.
+        """
+        try:
+            file = open(self.profile_path, mode='w+', encoding='utf-8')
+            file.write(json.dumps(data, indent=2))
+            file.close()
+            return self.profile_path
+        except OSError:
+            return ''
+
     def add_score(self, time: float, difficulty: str = 'beginner', name: str = '') -> int:
         """
-        Adds a time to highscores.txt, placed in ascending order.
+        Adds a time to the high scores, placed in ascending order. Only the best NUM_HIGH_SCORES times
+            of each difficulty are kept.
 
         Params:
             float: The time to add.
@@ -62,46 +137,126 @@ class Data:
             int: The position (0-based indexing) of the score within its difficulty.
                 Returns -1 if the score was not added.
         """
-        all_scores = self.get_all_scores()
-        if difficulty in all_scores.keys():
-            score_list = all_scores[difficulty]
-            position = 0
-            # search for position at which to insert new time
-            for pair in score_list:
-                if time >= pair[1]:
-                    position += 1
-                else:
-                    break
-            score_list.insert(position, (name, time))
-            all_scores[difficulty] = score_list
+        self.refresh_scores()
+        position = self.scores.add(time, difficulty, name)
+        if position >= 0:
+            self.scores_stamp = self.get_scores_stamp()
+            self.score_views.pop(difficulty, None)
+        return position
 
-            try:
-                file = open(self.high_scores_path, mode='w+', encoding='utf-8')
-                file.write(json.dumps(all_scores))
-                file.close()
-                return position
-            except:
-                return -1
+    def get_scores(self, difficulty: str) -> list[tuple[str, float]]:
+        """
+        Returns the high scores of a difficulty from memory, without reading the file unless it has changed.
 
-        return -1
+        Params:
+            str: The difficulty to get scores for.
+
+        Returns:
+            list[tuple[str, float]]: Up to NUM_HIGH_SCORES name-time pairs in ascending order of time.
+                The list is shared between calls and must not be modified.
+        """
+        self.refresh_scores()
+        scores = self.score_views.get(difficulty)
+        if scores is None:
+            scores = self.scores.get(difficulty, NUM_HIGH_SCORES)
+            self.score_views[difficulty] = scores
+        return scores
 
-    
     def get_all_scores(self) -> dict[str, list[tuple[str, float]]]:
         """
-        Reads and returns all high scores saved in highscores.txt.
+        Returns all saved high scores.
         
         Returns:
             dict[str, list[tuple[str, float]]]: High score name-time pairs for each difficulty.
         """
+        self.refresh_scores()
+        return self.scores.get_all()
+
+    def record_game(self, difficulty: str, name: str, seed: int | None, won: bool, time: float, bbbv: int, clicks: int):
+        """
+        Records a finished game in the statistics database, if it is available.
+
+        Params:
+            str: The difficulty played.
+            str: The player name.
+            int | None: The seed the mines were planted from, or None if they were not planted from a seed.
+            bool: True iff the game was won.
+            float: The time taken, in seconds.
+            int: The 3BV of the board.
+            int: The number of clicks made.
+        """
+        if self.stats is not None:
+            try:
+                self.stats.record_game(difficulty, name, seed, won, time, bbbv, clicks)
+            except sqlite3.Error:
+                pass
+
+    def get_statistics(self, difficulty: str, name: str = '') -> dict:
+        """
+        Gets aggregate statistics of the recorded games of a difficulty.
+
+        Params:
+            str: The difficulty to summarize.
+            str: The player whose personal best to include. Defaults to no player.
+
+        Returns:
+            dict: The summary described by StatsDatabase.get_summary, or an empty dict if statistics are unavailable.
+        """
+        if self.stats is not None:
+            try:
+                self.file_reads += 1
+                return self.stats.get_summary(difficulty, name)
+            except sqlite3.Error:
+                pass
+        return {}
+
+    def flush_statistics(self):
+        """
+        Writes any buffered game records to the statistics database.
+        """
+        if self.stats is not None:
+            try:
+                self.stats.flush()
+            except sqlite3.Error:
+                pass
+
+    def get_scores_stamp(self) -> tuple[int, int] | None:
+        """
+        Returns:
+            tuple[int, int] | None: The modification time in nanoseconds and size of the high scores log,
+                or None if it does not exist.
+        """
+        try:
+            stat = os.stat(self.high_scores_path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def refresh_scores(self):
+        """
+        Reloads the high scores if the log was changed since this Data object last read or wrote it.
+        """
+        stamp = self.get_scores_stamp()
+        if stamp != self.scores_stamp:
+            self.file_reads += 1
+            self.scores.load()
+            self.scores_stamp = self.get_scores_stamp()
+            self.score_views = {}
+
+    def migrate_scores(self):
+        """
+        Copies high scores from the JSON file written by older versions into the score log, if there is no log yet.
+        """
+        if os.path.exists(self.high_scores_path) or not os.path.exists(self.old_high_scores_path):
+            return
         try:
-            file = open(self.high_scores_path, 'r', encoding='utf-8')
-            all_scores = file.read()
+            file = open(self.old_high_scores_path, 'r', encoding='utf-8')
+            all_scores = json.loads(file.read())
             file.close()
-            return json.loads(all_scores)
-        except:
-            return {
-                'beginner': [],
-                'intermediate': [],
-                'expert': []
-            }
-        
\ No newline at end of file
+            for difficulty, scores in all_scores.items():
+                for name, time in scores:
+                    self.scores.insert(float(time), difficulty, str(name))
+        # file is invalid
+        except (OSError, ValueError, TypeError, AttributeError):
+            return
+        self.scores.compact()
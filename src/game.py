@@ -1,13 +1,21 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import random
+
 import pygame
 from pygame.locals import *
-import random
 
+from assets import AssetManager
+from board import Board, ChangeSet, count_3bv
 from button import Button
-from const import DIFFICULTIES, FRAMERATE, MARGIN, MAX_NAME_LENGTH, NUM_HIGH_SCORES, ROOT_DIR, TILE_SIZE
+from codes import decode_board, encode_layout
+from const import DIFFICULTIES, FRAMERATE, MARGIN, MAX_NAME_LENGTH, NUM_HIGH_SCORES, TILE_SIZE
 from data import Data
 from enums import FaceExpressions, TileStates
+from profiler import FrameProfiler
+from replay import Replay, apply_move
 from sprite import Sprite
-from tile import Tile
+from stats import get_difficulty_key
+from text_cache import TextCache
 from utils import time_to_str
 
 
@@ -27,6 +35,43 @@ WIN_FONT_COLOR = (0, 0, 0)
 HIGH_SCORE_FONT_COLOR = (218, 165, 32)
 WIN_PAD_Y = 5
 
+# the largest field shown at once at the default zoom, in tiles; larger boards are panned
+MAX_VIEW_COLS = 60
+MAX_VIEW_ROWS = 36
+# tile sizes that can be zoomed between, each with its own pre-scaled tile textures
+ZOOM_TILE_SIZES = (TILE_SIZE // 4, TILE_SIZE // 2, TILE_SIZE, 2*TILE_SIZE)
+# the number of tiles panned by one step of the mouse wheel
+SCROLL_TILES = 3
+# longer board codes are only copied to the clipboard, not shown in the window caption
+MAX_CAPTION_CODE_LENGTH = 120
+# keys that pan the view, with the number of columns and rows they pan by
+PAN_KEYS = {
+    K_LEFT: (-1, 0), K_a: (-1, 0),
+    K_RIGHT: (1, 0), K_d: (1, 0),
+    K_UP: (0, -1), K_w: (0, -1),
+    K_DOWN: (0, 1), K_s: (0, 1)
+}
+
+# frame profiler overlay, toggled with PROFILER_KEY and refreshed every OVERLAY_INTERVAL milliseconds
+PROFILER_KEY = K_F3
+PROFILED_PHASES = ('events', 'input', 'face', 'timer', 'render')
+PROFILED_COUNTERS = ('tiles_drawn', 'text_renders', 'file_reads')
+OVERLAY_INTERVAL = 500
+OVERLAY_WIDTH = 12 * TILE_SIZE
+OVERLAY_COLOR = (0, 0, 0)
+OVERLAY_FONT_COLOR = (0, 255, 0)
+
+# assets loaded in the background while the startup menu is shown
+IMAGES = ('mine', 'tile_atlas', 'face_atlas', 'flag', 'home', 'home_clicked', 'quit', 'quit_clicked',
+          'sound_on', 'sound_on_clicked', 'sound_mute', 'sound_mute_clicked')
+FONTS = (('timer', BANNER_FONT_SIZE), ('courier_new_bd', WIN_FONT_SIZE_LG), ('helvetica', WIN_FONT_SIZE_MD),
+         ('helvetica', WIN_FONT_SIZE_SM))
+SOUNDS = ('explosion', 'flag_place', 'tile_click', 'victory')
+# the sound played for each kind of Board change-set, if any
+CHANGE_SOUNDS = {'reveal': 'tile_click', 'chord': 'tile_click', 'flag': 'flag_place', 'loss': 'explosion'}
+# posted when a finished game has been summarized on the worker thread
+SUMMARY_EVENT = pygame.event.custom_type()
+
 
 class Game():
     """
@@ -38,10 +83,27 @@ class Game():
     sound_button: Button
     win_screen_bg: pygame.Surface
     win_screen_rect: pygame.Rect
+    icon: pygame.Surface
+    tile_map: pygame.Surface
+    face_map: pygame.Surface
+    flag_image: pygame.Surface
+    home_image: pygame.Surface
+    home_image_clicked: pygame.Surface
+    quit_image: pygame.Surface
+    quit_image_clicked: pygame.Surface
+    sound_image: pygame.Surface
+    sound_image_clicked: pygame.Surface
+    mute_image: pygame.Surface
+    mute_image_clicked: pygame.Surface
+    banner_font: pygame.font.Font
+    win_font_lg: pygame.font.Font
+    win_font_md: pygame.font.Font
+    win_font_sm: pygame.font.Font
 
-    def __init__(self, file_io: Data = Data()):
+    def __init__(self, file_io: Data | None = None):
         """
-        Initializes a Game object and loads all assets.
+        Initializes a Game object and starts loading its assets in the background.
+            Sounds are only loaded if sound is enabled.
 
         Params:
             Data: A Data object to read and write to files. Will initialize one if not provided.
@@ -51,104 +113,183 @@ class Game():
         self.num_mines: int = 0
         self.rows: int = 0
         self.cols: int = 0
-        self.tiles: list[list[Tile]] = []
-        self.visited: list[list[bool]] = []
-        self.mines: list[tuple[int, int]] = []
-        self.flags: list[tuple[int, int]] = []
-        self.to_chord: list[Tile] = []
-        self.uncovered_tiles: int = 0
+        self.board: Board = Board(0, 0, 0)
+        self.pressed_tiles: set[int] = set()
+        self.press_key: tuple[tuple[int, int] | None, tuple[bool, bool, bool]] | None = None
         self.time: float = 0.0
+        self.start_ticks: int | None = None
+        self.seed: int = 0
+        self.board_code: str = ''
+        self.from_code: bool = False
+        self.replay: Replay = Replay(0, 0, 0, 0)
+        # finished games are summarized on a worker thread, since the 3BV and board code of the largest boards
+        # take seconds to compute; each summary is kept with the record of its game until it is ready
+        self.summary_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1)
+        self.summary: Future | None = None
+        self.pending_summaries: list[tuple[Future, tuple]] = []
 
         # window variables
         self.screen_width: int = 0
         self.screen_height: int = 0
         self.quitting: bool = False
         self.reopen_tkinter: bool = False
-        self.field_top_left: tuple[int, int] = (0, 0)
+        self.tile_surfaces: list[pygame.Surface] = []
+        self.zoom_surfaces: dict[int, list[pygame.Surface]] = {}
+        self.field_surface: pygame.Surface = pygame.Surface((0, 0))
+        self.field_rect: pygame.Rect = pygame.Rect(0, 0, 0, 0)
+
+        # viewport variables, which select the range of tiles shown and their size
+        self.view_area: pygame.Rect = pygame.Rect(0, 0, 0, 0)
+        self.view_origin: tuple[int, int] = (0, 0)
+        self.view_cols: int = 0
+        self.view_rows: int = 0
+        self.tile_size: int = TILE_SIZE
         self.banner_sprites: list[Sprite] = []
         self.footer_sprites: list[Sprite] = []
         self.win_screen_sprites: list[Sprite] = []
         self.buttons: list[Button] = []
 
+        # retained scene variables, used to redraw only what changed since the last frame
+        # (drawn_states records the tiles on the off-screen field surface, drawn_pressed those drawn over it,
+        # and changed_tiles the tiles in Board change-sets since then, unless view_dirty asks for the whole view)
+        self.full_redraw: bool = True
+        self.tiles_dirty: bool = False
+        self.view_dirty: bool = True
+        self.changed_tiles: set[int] = set()
+        self.field_moved: bool = False
+        self.drawn_states: bytearray = bytearray()
+        self.drawn_pressed: set[int] = set()
+        self.drawn_images: dict[Button, pygame.Surface] = {}
+        self.drawn_counters: dict[str, tuple[str, pygame.Rect]] = {}
+        self.win_screen_drawn: bool = False
+
+        # frame profiler variables (tiles_drawn counts every tile drawn, for the profiler to sample)
+        self.tiles_drawn: int = 0
+        self.profiler: FrameProfiler = FrameProfiler()
+        self.overlay_surface: pygame.Surface | None = None
+        self.overlay_ticks: int = 0
+        self.overlay_drawn: bool = False
+        # seconds from launch until the startup menu was shown, saved with the profiler report
+        self.startup_time: float | None = None
+
         # file input/output
         self.player_name: str = ''
         self.player_rank: int = -1
-        self.file_io: Data = file_io
+        self.file_io: Data = file_io if file_io is not None else Data()
         settings = self.file_io.get_settings()
         self.sound_enabled: bool = settings['sound_enabled']
+        self.no_guess: dict[str, bool] = dict(settings['no_guess'])
+
+        self.text_cache: TextCache = TextCache()
+        self.assets: AssetManager = AssetManager(IMAGES, FONTS, SOUNDS)
+        self.assets.preload(self.sound_enabled)
+
+        self.profiler.watch('tiles_drawn', lambda: self.tiles_drawn)
+        self.profiler.watch('text_renders', lambda: self.text_cache.misses)
+        self.profiler.watch('file_reads', lambda: self.file_io.file_reads)
+
+    def load_assets(self):
+        """
+        Gets the textures and fonts of the window, loading any that have not been loaded in the background yet.
+        """
+        self.icon = self.assets.get_image('mine')
+        self.tile_map = self.assets.get_image('tile_atlas')
+        self.face_map = self.assets.get_image('face_atlas')
+        self.flag_image = self.assets.get_image('flag')
+        self.home_image = self.assets.get_image('home')
+        self.home_image_clicked = self.assets.get_image('home_clicked')
+        self.quit_image = self.assets.get_image('quit')
+        self.quit_image_clicked = self.assets.get_image('quit_clicked')
+        self.sound_image = self.assets.get_image('sound_on')
+        self.sound_image_clicked = self.assets.get_image('sound_on_clicked')
+        self.mute_image = self.assets.get_image('sound_mute')
+        self.mute_image_clicked = self.assets.get_image('sound_mute_clicked')
+
+        self.banner_font = self.assets.get_font('timer', BANNER_FONT_SIZE)
+        self.win_font_lg = self.assets.get_font('courier_new_bd', WIN_FONT_SIZE_LG)
+        self.win_font_md = self.assets.get_font('helvetica', WIN_FONT_SIZE_MD)
+        self.win_font_sm = self.assets.get_font('helvetica', WIN_FONT_SIZE_SM)
+
+    def play_sound(self, name: str):
+        """
+        Plays a sound if sound is enabled, loading it first if it has not been loaded yet.
 
-        self.icon = pygame.image.load(ROOT_DIR + '/assets/textures/mine.png')
-        self.tile_map = pygame.image.load(ROOT_DIR + '/assets/textures/tile_atlas.png')
-        self.face_map = pygame.image.load(ROOT_DIR + '/assets/textures/face_atlas.png')
-        self.flag_image = pygame.image.load(ROOT_DIR + '/assets/textures/flag.png')
-        self.home_image = pygame.image.load(ROOT_DIR + '/assets/textures/home.png')
-        self.home_image_clicked = pygame.image.load(ROOT_DIR + '/assets/textures/home_clicked.png')
-        self.quit_image = pygame.image.load(ROOT_DIR + '/assets/textures/quit.png')
-        self.quit_image_clicked = pygame.image.load(ROOT_DIR + '/assets/textures/quit_clicked.png')
-        self.sound_image = pygame.image.load(ROOT_DIR + '/assets/textures/sound_on.png')
-        self.sound_image_clicked = pygame.image.load(ROOT_DIR + '/assets/textures/sound_on_clicked.png')
-        self.mute_image = pygame.image.load(ROOT_DIR + '/assets/textures/sound_mute.png')
-        self.mute_image_clicked = pygame.image.load(ROOT_DIR + '/assets/textures/sound_mute_clicked.png')
-
-        pygame.font.init()
-        self.banner_font = pygame.font.Font(ROOT_DIR + '/assets/fonts/timer.ttf', BANNER_FONT_SIZE)
-        self.win_font_lg = pygame.font.Font(ROOT_DIR + '/assets/fonts/courier_new_bd.ttf', WIN_FONT_SIZE_LG)
-        self.win_font_md = pygame.font.Font(ROOT_DIR + '/assets/fonts/helvetica.ttf', WIN_FONT_SIZE_MD)
-        self.win_font_sm = pygame.font.Font(ROOT_DIR + '/assets/fonts/helvetica.ttf', WIN_FONT_SIZE_SM)
-
-        pygame.mixer.init()
-        self.explosion_sound = pygame.mixer.Sound(ROOT_DIR + '/assets/sounds/explosion.mp3')
-        self.flag_sound = pygame.mixer.Sound(ROOT_DIR + '/assets/sounds/flag_place.mp3')
-        self.click_sound = pygame.mixer.Sound(ROOT_DIR + '/assets/sounds/tile_click.mp3')
-        self.victory_sound = pygame.mixer.Sound(ROOT_DIR + '/assets/sounds/victory.mp3')
+        Params:
+            str: The name of the sound.
+        """
+        if not self.sound_enabled:
+            return
+        sound = self.assets.get_sound(name)
+        if sound is not None:
+            sound.play()
     
-    def load(self, difficulty: str):
+    def load(self, difficulty: str, dimensions: tuple[int, int, int] | None = None):
         """
         Configures the Game based on the selected difficulty and initializes pygame elements.
 
         Params:
             str: The game difficulty ('beginner', 'intermediate', or 'expert').
+            tuple[int, int, int] | None: The number of rows, columns and mines, which override the difficulty.
+                The difficulty becomes the one with the same specifications, or 'custom' if there is none.
         """
         self.quitting = False
         self.reopen_tkinter = False
 
         # configure difficulty specifications
         self.difficulty = 'beginner'
-        if difficulty in DIFFICULTIES.keys():
-            self.difficulty = difficulty
-        difficulty_data = DIFFICULTIES[self.difficulty]
-        self.num_mines = difficulty_data['num_mines']
-        self.rows = difficulty_data['rows']
-        self.cols = difficulty_data['cols']
-
-        # initialize pygame window
+        if dimensions is not None:
+            self.difficulty = 'custom'
+            for name, difficulty_data in DIFFICULTIES.items():
+                if dimensions == (difficulty_data['rows'], difficulty_data['cols'], difficulty_data['num_mines']):
+                    self.difficulty = name
+            self.rows, self.cols, self.num_mines = dimensions
+        else:
+            if difficulty in DIFFICULTIES.keys():
+                self.difficulty = difficulty
+            difficulty_data = DIFFICULTIES[self.difficulty]
+            self.num_mines = difficulty_data['num_mines']
+            self.rows = difficulty_data['rows']
+            self.cols = difficulty_data['cols']
+        self.board = Board(self.rows, self.cols, self.num_mines)
+        self.board.subscribe(self.on_board_change)
+        self.load_assets()
+
+        # initialize pygame window, which shows at most MAX_VIEW_COLS by MAX_VIEW_ROWS tiles at the default zoom
         pygame.display.init()
-        if self.cols >= DIFFICULTIES['intermediate']['cols']:
-            self.screen_width = TILE_SIZE * (self.cols + 2*MARGIN)
+        view_cols = min(self.cols, MAX_VIEW_COLS)
+        view_rows = min(self.rows, MAX_VIEW_ROWS)
+        if view_cols >= DIFFICULTIES['intermediate']['cols']:
+            self.screen_width = TILE_SIZE * (view_cols + 2*MARGIN)
         else:
             self.screen_width = TILE_SIZE * (DIFFICULTIES['intermediate']['cols'] + 2*MARGIN)
-        self.screen_height = TILE_SIZE * (self.rows + 2*MARGIN) + 2*BANNER_HEIGHT
+        self.screen_height = TILE_SIZE * (view_rows + 2*MARGIN) + 2*BANNER_HEIGHT
         self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
         pygame.display.set_caption('Minesweeper')
         pygame.display.set_icon(self.icon)
+        pygame.key.set_repeat(200, 30)
 
         # load tile textures from tile_atlas.png
-        tile_surfaces = []
+        self.tile_surfaces = []
         for y in range(4):
             for x in range(4):
                 image = pygame.Surface((TILE_SIZE, TILE_SIZE))
                 area = (x*TILE_SIZE, y*TILE_SIZE, TILE_SIZE, TILE_SIZE)
                 image.blit(self.tile_map, (0, 0), area)
-                tile_surfaces.append(image)
+                self.tile_surfaces.append(image)
+        self.zoom_surfaces = {}
+        for size in ZOOM_TILE_SIZES:
+            if size == TILE_SIZE:
+                self.zoom_surfaces[size] = self.tile_surfaces
+            else:
+                self.zoom_surfaces[size] = [pygame.transform.scale(image, (size, size)) for image in self.tile_surfaces]
         
-        # load tile sprites
-        self.tiles = []
-        self.field_top_left = ((self.screen_width - self.cols*TILE_SIZE)/2, (self.screen_height - self.rows*TILE_SIZE)/2)
-        for x in range(self.cols):
-            self.tiles.append([])
-            for y in range(self.rows):
-                new_tile = Tile(tile_surfaces, (x, y), self.field_top_left)
-                self.tiles[x].append(new_tile)
+        # tiles are drawn straight from the Board state onto an off-screen field surface, which is copied to the window
+        self.view_area = pygame.Rect(MARGIN*TILE_SIZE, BANNER_HEIGHT + MARGIN*TILE_SIZE, self.screen_width - 2*MARGIN*TILE_SIZE,
+                                     self.screen_height - 2*(BANNER_HEIGHT + MARGIN*TILE_SIZE))
+        self.view_origin = (0, 0)
+        self.view_cols = 0
+        self.view_rows = 0
+        self.set_zoom(TILE_SIZE)
         
         # load face button texture tuples (unclicked, clicked) from face_atlas.png
         face_surfaces = []
@@ -208,46 +349,76 @@ class Game():
         self.win_screen_rect = pygame.Rect(win_top_left[0], win_top_left[1], WIN_SCREEN_SIZE[0], WIN_SCREEN_SIZE[1])
         self.win_screen_bg = pygame.Surface(self.win_screen_rect.size, pygame.SRCALPHA)
         pygame.draw.rect(self.win_screen_bg, WIN_SCREEN_COLOR, self.win_screen_bg.get_rect())
-        text_surface = self.win_font_lg.render("You won!", False, WIN_FONT_COLOR)
+        text_surface = self.text_cache.render(self.win_font_lg, "You won!", WIN_FONT_COLOR)
         win_message_pos = (win_top_left[0] + (WIN_SCREEN_SIZE[0] - text_surface.get_width())/2, win_top_left[1] + WIN_PAD_Y)
         win_message = Sprite(text_surface, win_message_pos)
         self.win_screen_sprites = [win_message]
 
-    def restart(self):
+    def restart(self, seed: int | None = None):
         """
         Resets the game state to a new game of the same difficulty.
+
+        Params:
+            int | None: The seed from which the mines are planted. Will choose one at random if not provided.
         """
         self.game_over = False
-        self.visited = [[False]*self.rows for y in range(self.cols)]
-        self.mines = []
-        self.flags = []
-        self.uncovered_tiles: int = 0
-        self.time: float = 0.0
-
-        for x in range(self.cols):
-            for y in range(self.rows):
-                self.tiles[x][y].update_state(TileStates.HIDDEN)
-                self.tiles[x][y].is_mine = False
+        self.time = 0.0
+        self.start_ticks = None
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.board.reset(self.seed)
+        self.board_code = ''
+        self.summary = None
+        self.from_code = False
+        self.replay = Replay(self.rows, self.cols, self.num_mines, self.seed, self.difficulty,
+                             self.no_guess.get(self.difficulty, False))
+        self.replay.name = self.player_name
+        self.pressed_tiles = set()
+        self.press_key = None
+        self.full_redraw = True
+        pygame.display.set_caption('Minesweeper')
 
-    def start(self, difficulty: str = 'beginner', name: str = '') -> bool:
+    def start(self, difficulty: str = 'beginner', name: str = '', no_guess: bool = False,
+              code: str = '', seed: int | None = None, dimensions: tuple[int, int, int] | None = None) -> bool:
         """
         Loads Game elements and executes the main loop that handles all events.
 
         Params:
             str: The game difficulty ('beginner', 'intermediate', or 'expert').
             str: The player name to be used in high scores.
+            bool: True iff boards should be generated so that they can be solved without guessing.
+            str: A board code to play instead of a random board, which overrides the difficulty.
+            int | None: The seed from which the mines of the first game are planted.
+            tuple[int, int, int] | None: The number of rows, columns and mines of a custom board.
         
         Returns:
             bool: True iff the tkinter startup menu should be reopened upon quitting.
+
+        Raises:
+            ValueError: If the board code is not valid.
         """
         self.player_name = name
-        self.load(difficulty)
-        self.restart()
+        layout = decode_board(code) if code != '' else None
+        if layout is not None:
+            rows, cols, mines, first_click = layout
+            self.load(difficulty, (rows, cols, len(mines)))
+        else:
+            self.load(difficulty, dimensions)
+            if self.difficulty in DIFFICULTIES.keys():
+                self.no_guess[self.difficulty] = no_guess
+        self.restart(seed)
+        if layout is not None:
+            self.replay.code = code
+            self.load_layout(mines, first_click)
+        self.profiler.reset()
 
-        # game loop
+        # game loop, which sleeps until there is input or the timer display needs to change
         clock = pygame.time.Clock()
         while not self.quitting:
-            for event in pygame.event.get():
+            timeout = self.get_wait_timeout()
+            first_event = pygame.event.wait(timeout) if timeout > 0 else pygame.event.wait()
+            # time spent waiting for input is not part of the frame
+            self.profiler.begin_frame()
+            for event in [first_event] + pygame.event.get():
                 if event.type == QUIT:
                     self.game_over = True
                     self.quitting = True
@@ -260,6 +431,24 @@ class Game():
                             break
                     if not self.game_over:
                         self.check_tile_click(event)
+                elif event.type == KEYDOWN:
+                    if event.key == K_c and event.mod & KMOD_CTRL:
+                        self.copy_board_code()
+                    elif event.key == PROFILER_KEY:
+                        self.toggle_profiler()
+                    elif event.key in PAN_KEYS:
+                        self.pan(*PAN_KEYS[event.key])
+                    elif event.key in (K_PLUS, K_EQUALS, K_KP_PLUS):
+                        self.zoom(1)
+                    elif event.key in (K_MINUS, K_KP_MINUS):
+                        self.zoom(-1)
+                elif event.type == MOUSEWHEEL:
+                    self.check_wheel(event)
+                elif event.type == WINDOWEXPOSED:
+                    self.full_redraw = True
+                elif event.type == SUMMARY_EVENT:
+                    self.record_summaries()
+            self.profiler.end_phase('events')
             
             if not self.quitting:
                 self.sound_button.state = self.sound_enabled
@@ -268,99 +457,505 @@ class Game():
 
                 if not self.game_over:
                     self.check_tile_press()
+                    self.profiler.end_phase('input')
                     self.update_face_button()
-
-                    if len(self.mines) > 0:
-                        self.time += 1.0 / FRAMERATE
+                    self.profiler.end_phase('face')
+                    self.update_timer()
+                    self.profiler.end_phase('timer')
+                else:
+                    self.profiler.end_phase('input')
             
                 self.render()
+                self.profiler.end_phase('render')
+                self.profiler.end_frame()
                 clock.tick(FRAMERATE)
         
         pygame.display.quit()
+        # games finished just before quitting are still recorded
+        self.record_summaries(wait=True)
+        if self.profiler.num_frames > 0:
+            report = self.profiler.get_report()
+            if self.startup_time is not None:
+                report['startup_ms'] = 1000 * self.startup_time
+            self.file_io.write_profile(report)
         return self.reopen_tkinter
 
+    def load_layout(self, mines: list[int], first_click: int | None):
+        """
+        Plants the mines of a board code instead of random ones and repeats its first click.
+            Games loaded this way are not added to the high scores, since their layout is known in advance.
+
+        Params:
+            list[int]: The indices of the tiles to plant mines on.
+            int | None: The index of the first tile clicked, or None if no tile was clicked.
+        """
+        self.board.load_mines(mines)
+        self.from_code = True
+        if first_click is not None:
+            self.make_move('reveal', self.board.position(first_click))
+
+    def copy_board_code(self):
+        """
+        Copies the code of the finished board to the clipboard, if the clipboard is available.
+        """
+        if self.board_code == '':
+            return
+        try:
+            pygame.scrap.put_text(self.board_code)
+        # no clipboard support on this platform; the code is still shown in the window caption
+        except pygame.error:
+            pass
+
+    def update_timer(self, ticks: int | None = None):
+        """
+        Starts the timer once the first tile has been revealed and updates the elapsed time.
+
+        Params:
+            int | None: The current time in milliseconds. Will read the pygame clock if not provided.
+        """
+        if self.board.first_click is not None:
+            if ticks is None:
+                ticks = pygame.time.get_ticks()
+            if self.start_ticks is None:
+                self.start_ticks = ticks
+            self.time = (ticks - self.start_ticks) / 1000
+
+    def get_wait_timeout(self) -> int:
+        """
+        Gets how long the main loop may sleep while waiting for input.
+
+        Returns:
+            int: The number of milliseconds until the timer display next changes,
+                or 0 if the timer is not running and the loop may wait indefinitely.
+        """
+        if self.game_over or self.start_ticks is None:
+            return 0
+        return 1000 - (pygame.time.get_ticks() - self.start_ticks) % 1000
+
     def render(self):
         """
-        Updates dynamic visual elements and displays all Sprites.
+        Updates dynamic visual elements and displays the parts of the window that changed since the last frame.
+        """
+        if self.full_redraw:
+            self.draw_scene()
+            if self.profiler.enabled:
+                self.draw_overlay([])
+            pygame.display.flip()
+            return
+
+        dirty_rects = []
+        self.draw_tiles(dirty_rects)
+        self.draw_counters(dirty_rects)
+        self.draw_buttons(dirty_rects)
+        if self.game_over and self.face_button.state == FaceExpressions.WIN and not self.win_screen_drawn:
+            dirty_rects.append(self.draw_win_screen())
+        if self.profiler.enabled:
+            self.draw_overlay(dirty_rects)
+        if len(dirty_rects) > 0:
+            pygame.display.update(dirty_rects)
+
+    def draw_scene(self):
+        """
+        Draws every visual element to the screen and resets the record of what is displayed.
+        """
+        static_group = pygame.sprite.Group()
+        for element in self.banner_sprites + self.footer_sprites:
+            static_group.add(element)
+
+        self.screen.fill(BG_COLOR)
+        static_group.draw(self.screen)
+        self.drawn_images = {button: button.image for button in self.buttons}
+
+        # only tiles that changed since the field surface was last updated are drawn, even after a restart
+        self.update_field()
+        self.tiles_dirty = False
+        self.screen.blit(self.field_surface, self.field_rect)
+        self.field_moved = False
+        self.drawn_pressed = set()
+        self.draw_tiles([])
+
+        self.drawn_counters = {}
+        self.draw_counters([])
+
+        self.win_screen_drawn = False
+        if self.game_over and self.face_button.state == FaceExpressions.WIN:
+            self.draw_win_screen()
+        self.overlay_drawn = False
+
+        self.full_redraw = False
+        self.tiles_dirty = False
+
+    def set_zoom(self, tile_size: int, anchor: tuple[int, int] | None = None):
+        """
+        Changes the size tiles are drawn at and fits the view to it, keeping a tile at the same place within the view.
+
+        Params:
+            int: The new tile size in pixels, one of ZOOM_TILE_SIZES.
+            tuple[int, int] | None: The position within the field of the tile to keep in place.
+                Defaults to the tile at the center of the view.
+        """
+        if anchor is None:
+            anchor = (self.view_origin[0] + self.view_cols//2, self.view_origin[1] + self.view_rows//2)
+        fraction_x = (anchor[0] - self.view_origin[0]) / self.view_cols if self.view_cols > 0 else 0
+        fraction_y = (anchor[1] - self.view_origin[1]) / self.view_rows if self.view_rows > 0 else 0
+
+        self.tile_size = tile_size
+        self.tile_surfaces = self.zoom_surfaces[tile_size]
+        self.view_cols = min(self.cols, self.view_area.width // tile_size)
+        self.view_rows = min(self.rows, self.view_area.height // tile_size)
+        self.field_surface = pygame.Surface((self.view_cols*tile_size, self.view_rows*tile_size)).convert()
+        self.field_rect = self.field_surface.get_rect(center=self.view_area.center)
+        self.view_origin = self.clamp_view_origin((anchor[0] - int(fraction_x*self.view_cols),
+                                                   anchor[1] - int(fraction_y*self.view_rows)))
+        # no state has that value, so every visible tile is drawn onto the new field surface
+        self.drawn_states = bytearray([255]) * self.board.size
+        self.view_dirty = True
+        self.full_redraw = True
+
+    def zoom(self, steps: int, anchor: tuple[int, int] | None = None):
+        """
+        Zooms in or out by a number of zoom levels, within ZOOM_TILE_SIZES.
+
+        Params:
+            int: The number of levels to zoom in, or out if negative.
+            tuple[int, int] | None: The position within the field of the tile to keep in place.
+                Defaults to the tile at the center of the view.
+        """
+        level = ZOOM_TILE_SIZES.index(self.tile_size) + steps
+        level = max(0, min(level, len(ZOOM_TILE_SIZES) - 1))
+        if ZOOM_TILE_SIZES[level] != self.tile_size:
+            self.set_zoom(ZOOM_TILE_SIZES[level], anchor)
+
+    def clamp_view_origin(self, origin: tuple[int, int]) -> tuple[int, int]:
+        """
+        Params:
+            tuple[int, int]: The position within the field of a top left tile for the view.
+
+        Returns:
+            tuple[int, int]: The nearest top left tile for which the view lies within the field.
+        """
+        return (max(0, min(origin[0], self.cols - self.view_cols)), max(0, min(origin[1], self.rows - self.view_rows)))
+
+    def pan(self, cols: int, rows: int):
+        """
+        Moves the view by a number of tiles. The tiles that stay visible are scrolled on the field surface,
+            so only the tiles that come into view are drawn.
+
+        Params:
+            int: The number of columns to move right, or left if negative.
+            int: The number of rows to move down, or up if negative.
+        """
+        old_x, old_y = self.view_origin
+        new_x, new_y = self.clamp_view_origin((old_x + cols, old_y + rows))
+        if (new_x, new_y) == (old_x, old_y):
+            return
+
+        # tiles leaving the view are no longer on the field surface, so they must be drawn when they return
+        kept_left = max(old_x, new_x)
+        kept_right = min(old_x, new_x) + self.view_cols
+        for y in range(old_y, old_y + self.view_rows):
+            row_start = y*self.cols
+            if new_y <= y < new_y + self.view_rows and kept_left < kept_right:
+                self.drawn_states[row_start + old_x:row_start + kept_left] = b'\xff' * (kept_left - old_x)
+                self.drawn_states[row_start + kept_right:row_start + old_x + self.view_cols] = \
+                    b'\xff' * (old_x + self.view_cols - kept_right)
+            else:
+                self.drawn_states[row_start + old_x:row_start + old_x + self.view_cols] = b'\xff' * self.view_cols
+
+        self.field_surface.scroll((old_x - new_x)*self.tile_size, (old_y - new_y)*self.tile_size)
+        self.view_origin = (new_x, new_y)
+        self.tiles_dirty = True
+        self.view_dirty = True
+        self.field_moved = True
+
+    def get_tile_offset(self, index: int) -> tuple[int, int]:
+        """
+        Params:
+            int: The index of a visible tile.
+
+        Returns:
+            tuple[int, int]: The position of the tile on the field surface.
+        """
+        return ((index % self.cols - self.view_origin[0]) * self.tile_size,
+                (index // self.cols - self.view_origin[1]) * self.tile_size)
+
+    def is_visible(self, index: int) -> bool:
+        """
+        Params:
+            int: The index of a tile.
+
+        Returns:
+            bool: True iff the tile lies within the view.
+        """
+        x = index % self.cols - self.view_origin[0]
+        y = index // self.cols - self.view_origin[1]
+        return 0 <= x < self.view_cols and 0 <= y < self.view_rows
+
+    def update_field(self) -> set[int]:
+        """
+        Draws the visible tiles whose state changed since they were last drawn onto the off-screen field surface.
+            Only the tiles in Board change-sets are compared, or the rows and columns in view after the view moved,
+            so the cost does not depend on the size of the field.
+
+        Returns:
+            set[int]: The indices of the tiles that were drawn.
+        """
+        changed = set()
+        states = self.board.states
+        drawn_states = self.drawn_states
+        if self.view_dirty:
+            first_col, first_row = self.view_origin
+            # compare whole rows first so that unchanged rows are skipped without a Python loop
+            for y in range(first_row, first_row + self.view_rows):
+                row_start = y*self.cols + first_col
+                row_end = row_start + self.view_cols
+                if states[row_start:row_end] != drawn_states[row_start:row_end]:
+                    for i in range(row_start, row_end):
+                        if states[i] != drawn_states[i]:
+                            changed.add(i)
+                    drawn_states[row_start:row_end] = states[row_start:row_end]
+        else:
+            # tiles out of view are left undrawn, and are compared when they come into view
+            for i in self.changed_tiles:
+                if states[i] != drawn_states[i] and self.is_visible(i):
+                    changed.add(i)
+                    drawn_states[i] = states[i]
+        self.view_dirty = False
+        self.changed_tiles = set()
+        self.tiles_drawn += len(changed)
+        self.field_surface.blits([(self.tile_surfaces[states[i]], self.get_tile_offset(i)) for i in changed], doreturn=False)
+        return changed
+
+    def draw_tiles(self, dirty_rects: list[pygame.Rect]):
+        """
+        Copies the tiles whose state or pressed texture changed since they were last drawn from the field surface
+            to the window, and draws pressed tiles over them.
+
+        Params:
+            list[Rect]: The list of screen areas to update, which is extended with the redrawn tiles.
         """
-        tile_group = pygame.sprite.Group()
-        for x in range(self.cols):
-            for y in range(self.rows):
-                tile_group.add(self.tiles[x][y])
+        changed = set()
+        if self.tiles_dirty:
+            changed = self.update_field()
+            self.tiles_dirty = False
 
-        # load dynamic banner elements
-        flags_remaining = self.num_mines - len(self.flags)
+        pressed = {i for i in self.pressed_tiles if self.is_visible(i)}
+        changed |= self.drawn_pressed ^ pressed
+        size = self.tile_size
+        redrawn = self.field_moved or len(changed) > 0
+        if self.field_moved:
+            # the whole view was scrolled
+            dirty_rects.append(self.screen.blit(self.field_surface, self.field_rect))
+            self.field_moved = False
+        elif len(changed) > 0:
+            offsets = [self.get_tile_offset(i) for i in changed]
+            x_min = min(offset[0] for offset in offsets)
+            x_max = max(offset[0] for offset in offsets) + size
+            y_min = min(offset[1] for offset in offsets)
+            y_max = max(offset[1] for offset in offsets) + size
+            # copy the area around the changes in one blit if it is mostly changed tiles, such as an opening
+            if 2*len(changed)*size*size >= (x_max - x_min) * (y_max - y_min):
+                area = pygame.Rect(x_min, y_min, x_max - x_min, y_max - y_min)
+                dirty_rects.append(self.screen.blit(self.field_surface, area.move(self.field_rect.topleft), area))
+            else:
+                for offset in offsets:
+                    area = pygame.Rect(offset, (size, size))
+                    dirty_rects.append(self.screen.blit(self.field_surface, area.move(self.field_rect.topleft), area))
+        if redrawn:
+            for i in pressed:
+                self.screen.blit(self.tile_surfaces[TileStates.UNCOVERED], self.field_rect.move(self.get_tile_offset(i)).topleft)
+            self.tiles_drawn += len(pressed)
+        self.drawn_pressed = pressed
+
+    def draw_counters(self, dirty_rects: list[pygame.Rect]):
+        """
+        Draws the flag counter and timer in the top banner if their text changed.
+
+        Params:
+            list[Rect]: The list of screen areas to update, which is extended with the redrawn counters.
+        """
+        flags_remaining = self.board.flags_remaining
         text = str(abs(flags_remaining))
         if flags_remaining >= 0:
             text = text.rjust(3, '0')
         else:
             text = '-' + text.rjust(2, '0')
-        text_surface = self.banner_font.render(text, False, BANNER_FONT_COLOR, BANNER_FONT_BG)
-        flag_counter = Sprite(text_surface,
-                              (MARGIN*TILE_SIZE + 2*self.flag_image.get_width(), (BANNER_HEIGHT - BANNER_FONT_SIZE)/2))
-        # timer
-        timer_text = time_to_str(self.time)
-        text_surface = self.banner_font.render(timer_text, False, BANNER_FONT_COLOR, BANNER_FONT_BG)
-        timer = Sprite(text_surface,
-                        (self.screen_width - MARGIN*TILE_SIZE - text_surface.get_width(), (BANNER_HEIGHT - BANNER_FONT_SIZE)/2))
-        banner_group = pygame.sprite.Group()
-        for element in self.banner_sprites:
-            banner_group.add(element)
-        banner_group.add(flag_counter, timer)
-
-        footer_group = pygame.sprite.Group()
-        for element in self.footer_sprites:
-            footer_group.add(element)
-
-        # display game elements
-        self.screen.fill(BG_COLOR)
-        tile_group.draw(self.screen)
-        banner_group.draw(self.screen)
-        footer_group.draw(self.screen)
-        if self.game_over and self.face_button.state == FaceExpressions.WIN:
-            self.screen.blit(self.win_screen_bg, self.win_screen_rect)
-            win_screen_group = pygame.sprite.Group()
-            for element in self.win_screen_sprites:
-                win_screen_group.add(element)
+        self.draw_counter('flags', text, MARGIN*TILE_SIZE + 2*self.flag_image.get_width(), False, dirty_rects)
+        self.draw_counter('timer', time_to_str(self.time), self.screen_width - MARGIN*TILE_SIZE, True, dirty_rects)
 
-            # load dynamic win screen elements
-            text_surface = self.win_font_md.render(timer_text, False, WIN_FONT_COLOR)
-            pos_x = self.win_screen_rect.x + (WIN_SCREEN_SIZE[0] - text_surface.get_width())/2
-            pos_y = self.win_screen_sprites[0].rect.y + self.win_screen_sprites[0].rect.height
-            time_display = Sprite(text_surface, (pos_x, pos_y))
-            text = f'%s High Scores' % self.difficulty.capitalize()
-            text_surface = self.win_font_sm.render(text, False, WIN_FONT_COLOR)
+    def draw_counter(self, key: str, text: str, x: float, align_right: bool, dirty_rects: list[pygame.Rect]):
+        """
+        Draws a banner counter, erasing its previous text first.
+
+        Params:
+            str: The name under which the counter's drawn text and area are recorded.
+            str: The text to display.
+            float: The x position of the left edge of the counter, or the right edge if right aligned.
+            bool: True iff the counter should be aligned to the right of x.
+            list[Rect]: The list of screen areas to update, which is extended with the redrawn counter.
+        """
+        previous = self.drawn_counters.get(key)
+        if previous is not None and previous[0] == text:
+            return
+
+        text_surface = self.text_cache.render(self.banner_font, text, BANNER_FONT_COLOR, BANNER_FONT_BG)
+        if align_right:
+            x -= text_surface.get_width()
+        rect = text_surface.get_rect(topleft=(x, (BANNER_HEIGHT - BANNER_FONT_SIZE)/2))
+        if previous is not None:
+            self.screen.fill(BANNER_COLOR, previous[1])
+            dirty_rects.append(previous[1])
+        self.screen.blit(text_surface, rect)
+        dirty_rects.append(rect)
+        self.drawn_counters[key] = (text, rect)
+
+    def draw_buttons(self, dirty_rects: list[pygame.Rect]):
+        """
+        Draws the Buttons whose textures changed since they were last drawn.
+
+        Params:
+            list[Rect]: The list of screen areas to update, which is extended with the redrawn Buttons.
+        """
+        for button in self.buttons:
+            if self.drawn_images.get(button) is not button.image:
+                dirty_rects.append(self.screen.blit(button.image, button.rect))
+                self.drawn_images[button] = button.image
+
+    def draw_win_screen(self) -> pygame.Rect:
+        """
+        Draws the win screen with the final time and high scores on top of the field.
+
+        Returns:
+            Rect: The screen area covered by the win screen.
+        """
+        self.screen.blit(self.win_screen_bg, self.win_screen_rect)
+        win_screen_group = pygame.sprite.Group()
+        for element in self.win_screen_sprites:
+            win_screen_group.add(element)
+
+        # load dynamic win screen elements
+        text_surface = self.text_cache.render(self.win_font_md, time_to_str(self.time), WIN_FONT_COLOR)
+        pos_x = self.win_screen_rect.x + (WIN_SCREEN_SIZE[0] - text_surface.get_width())/2
+        pos_y = self.win_screen_sprites[0].rect.y + self.win_screen_sprites[0].rect.height
+        time_display = Sprite(text_surface, (pos_x, pos_y))
+        text = f'%s High Scores' % self.difficulty.capitalize()
+        text_surface = self.text_cache.render(self.win_font_sm, text, WIN_FONT_COLOR)
+        pos_x = self.win_screen_rect.x + (WIN_SCREEN_SIZE[0] - text_surface.get_width())/2
+        pos_y += time_display.rect.height + WIN_PAD_Y
+        high_score_title = Sprite(text_surface, (pos_x, pos_y))
+
+        # display high scores
+        pos_y += high_score_title.rect.height + WIN_PAD_Y
+        scores = self.file_io.get_scores(self.difficulty)
+        if len(scores) > 0:
+            to_display = NUM_HIGH_SCORES if NUM_HIGH_SCORES <= len(scores) else len(scores)
+            for i in range(to_display):
+                score = scores[i]
+                name_text = score[0].ljust(MAX_NAME_LENGTH)
+                time_text = time_to_str(score[1])
+                font_color = HIGH_SCORE_FONT_COLOR if self.player_rank == i else WIN_FONT_COLOR
+                # rank and name (left justified)
+                left_text = f'%s. %s' % (i + 1, name_text)
+                left_text_surface = self.text_cache.render(self.win_font_sm, left_text, font_color)
+                pos_x_left = self.win_screen_rect.x + TILE_SIZE
+                left_text_sprite = Sprite(left_text_surface, (pos_x_left, pos_y))
+                # time (right justified)
+                right_text_surface = self.text_cache.render(self.win_font_sm, time_text, font_color)
+                pos_x_right = self.win_screen_rect.x + self.win_screen_rect.width - TILE_SIZE - right_text_surface.get_width()
+                right_text_sprite = Sprite(right_text_surface, (pos_x_right, pos_y))
+                win_screen_group.add(left_text_sprite, right_text_sprite)
+                pos_y += left_text_sprite.rect.height
+
+        # display win rate and best time from the statistics database
+        stats = self.file_io.get_statistics(self.difficulty, self.player_name)
+        if stats.get('games', 0) > 0:
+            best = stats['personal_best'] if stats['personal_best'] is not None else stats['best']
+            text = f'%d%% won, best %s' % (round(100 * stats['win_rate']), time_to_str(best))
+            text_surface = self.text_cache.render(self.win_font_sm, text, WIN_FONT_COLOR)
             pos_x = self.win_screen_rect.x + (WIN_SCREEN_SIZE[0] - text_surface.get_width())/2
-            pos_y += time_display.rect.height + WIN_PAD_Y
-            high_score_title = Sprite(text_surface, (pos_x, pos_y))
-
-            # display high scores
-            pos_y += high_score_title.rect.height + WIN_PAD_Y
-            all_scores = self.file_io.get_all_scores()
-            if self.difficulty in all_scores.keys():
-                scores = all_scores[self.difficulty]
-                to_display = NUM_HIGH_SCORES if NUM_HIGH_SCORES <= len(scores) else len(scores)
-                for i in range(to_display):
-                    score = scores[i]
-                    name_text = score[0].ljust(MAX_NAME_LENGTH)
-                    time_text = time_to_str(score[1])
-                    font_color = HIGH_SCORE_FONT_COLOR if self.player_rank == i else WIN_FONT_COLOR
-                    # rank and name (left justified)
-                    left_text = f'%s. %s' % (i + 1, name_text)
-                    left_text_surface = self.win_font_sm.render(left_text, False, font_color)
-                    pos_x_left = self.win_screen_rect.x + TILE_SIZE
-                    left_text_sprite = Sprite(left_text_surface, (pos_x_left, pos_y))
-                    # time (right justified)
-                    right_text_surface = self.win_font_sm.render(time_text, False, font_color)
-                    pos_x_right = self.win_screen_rect.x + self.win_screen_rect.width - TILE_SIZE - right_text_surface.get_width()
-                    right_text_sprite = Sprite(right_text_surface, (pos_x_right, pos_y))
-                    win_screen_group.add(left_text_sprite, right_text_sprite)
-                    pos_y += left_text_sprite.rect.height
-
-            win_screen_group.add(time_display, high_score_title)
-            win_screen_group.draw(self.screen)
-        
-        pygame.display.flip()
+            pos_y = self.win_screen_rect.bottom - text_surface.get_height() - WIN_PAD_Y
+            win_screen_group.add(Sprite(text_surface, (pos_x, pos_y)))
+
+        win_screen_group.add(time_display, high_score_title)
+        win_screen_group.draw(self.screen)
+        self.win_screen_drawn = True
+        return self.win_screen_rect
+
+    def toggle_profiler(self):
+        """
+        Starts or stops the frame profiler, which shows its measurements in an overlay while it runs.
+        """
+        self.profiler.set_enabled(not self.profiler.enabled)
+        self.overlay_surface = None
+        self.overlay_drawn = False
+        # the window is redrawn to remove the overlay
+        if not self.profiler.enabled:
+            self.full_redraw = True
+
+    def draw_overlay(self, dirty_rects: list[pygame.Rect]):
+        """
+        Draws the frame profiler overlay over the top-left corner of the field. Its text is only rendered again
+            every OVERLAY_INTERVAL milliseconds, and is not rendered through the text cache so that it is not counted.
+
+        Params:
+            list[Rect]: The list of screen areas to update, which is extended with the overlay if it was drawn.
+        """
+        ticks = pygame.time.get_ticks()
+        if self.overlay_surface is None or ticks - self.overlay_ticks >= OVERLAY_INTERVAL:
+            summary = self.profiler.get_summary()
+            lines = ['frame %.2f ms  p95 %.2f  max %.2f' % (summary['frame']['mean'], summary['frame']['p95'],
+                                                           summary['frame']['max'])]
+            for name in PROFILED_PHASES:
+                times = summary['phases'].get(name, {'mean': 0.0, 'p95': 0.0})
+                lines.append('%s %.2f ms  p95 %.2f' % (name, times['mean'], times['p95']))
+            for name in PROFILED_COUNTERS:
+                lines.append('%s %.1f / frame' % (name, summary['counters'][name]['mean']))
+
+            line_height = self.win_font_sm.get_linesize()
+            self.overlay_surface = pygame.Surface((OVERLAY_WIDTH, line_height*len(lines) + 2*WIN_PAD_Y))
+            self.overlay_surface.fill(OVERLAY_COLOR)
+            for n, line in enumerate(lines):
+                text_surface = self.win_font_sm.render(line, False, OVERLAY_FONT_COLOR)
+                self.overlay_surface.blit(text_surface, (WIN_PAD_Y, WIN_PAD_Y + n*line_height))
+            self.overlay_ticks = ticks
+            self.overlay_drawn = False
+
+        # the overlay always covers the same area, so it only needs drawing again when something was drawn under it
+        rect = self.overlay_surface.get_rect(topleft=self.field_rect.topleft)
+        if not self.overlay_drawn or rect.collidelist(dirty_rects) >= 0:
+            dirty_rects.append(self.screen.blit(self.overlay_surface, rect))
+            self.overlay_drawn = True
+
+    def check_wheel(self, event: pygame.event.Event):
+        """
+        Zooms around the tile under the cursor if Ctrl is held, and otherwise pans the view,
+            horizontally if Shift is held.
+
+        Params:
+            Event: A pygame mouse wheel event (MOUSEWHEEL).
+        """
+        mods = pygame.key.get_mods()
+        if mods & KMOD_CTRL:
+            self.zoom(event.y, self.get_tile_at(pygame.mouse.get_pos()))
+        elif mods & KMOD_SHIFT:
+            self.pan(-event.y*SCROLL_TILES, 0)
+        else:
+            self.pan(event.x*SCROLL_TILES, -event.y*SCROLL_TILES)
+
+    def get_tile_at(self, pos: tuple[int, int]) -> tuple[int, int] | None:
+        """
+        Finds the tile at a location in the window.
+
+        Params:
+            tuple[int, int]: A position relative to the window.
+
+        Returns:
+            tuple[int, int] | None: The tile position within the field, or None if the location is outside the field.
+        """
+        if self.field_rect.collidepoint(pos):
+            return (self.view_origin[0] + (pos[0] - self.field_rect.x) // self.tile_size,
+                    self.view_origin[1] + (pos[1] - self.field_rect.y) // self.tile_size)
+        return None
 
     def check_tile_click(self, event: pygame.event.Event):
         """
@@ -369,202 +964,118 @@ class Game():
         Params:
             Event: A pygame mouse click event (MOUSEBUTTONUP).
         """
-        tile_x = (event.pos[0] - self.field_top_left[0]) / TILE_SIZE
-        tile_y = (event.pos[1] - self.field_top_left[1]) / TILE_SIZE
-        if tile_x >= 0 and tile_x < self.cols and tile_y >= 0 and tile_y < self.rows:
-            x = int(tile_x)
-            y = int(tile_y)
-            tile = self.tiles[x][y]
-            if tile.check_click(event.pos, event.button):
-                if event.button == BUTTON_LEFT:
-                    self.tile_left_click((x, y))
-                elif event.button == BUTTON_RIGHT:
-                    self.tile_right_click((x, y))
-                return
+        self.pressed_tiles = set()
+        self.press_key = None
+        pos = self.get_tile_at(event.pos)
+        if pos is not None:
+            if event.button == BUTTON_LEFT:
+                self.tile_left_click(pos)
+            elif event.button == BUTTON_RIGHT:
+                self.tile_right_click(pos)
     
     def tile_left_click(self, pos: tuple[int, int]):
         """
         Tile left click mechanics, including chording if the right mouse button is also pressed.
 
         Params:
-            tuple[int, int]: The Tile position within the 2D array.
+            tuple[int, int]: The Tile position within the field.
         """
-        tile = self.tiles[pos[0]][pos[1]]
         pressed = pygame.mouse.get_pressed()
         # right mouse button also pressed
         if pressed[2]:
-            if tile.state != TileStates.HIDDEN and tile.state != TileStates.FLAG:
-                self.chord(pos, tile.state)
-        elif tile.state == TileStates.HIDDEN:
-            if tile.is_mine:
-                tile.update_state(TileStates.MINE_HIT)
-                self.loss()
-            else:
-                if self.sound_enabled:
-                    self.click_sound.play()
-                self.uncover(pos)
+            self.make_move('chord', pos)
+        else:
+            self.make_move('reveal', pos)
     
     def tile_right_click(self, pos: tuple[int, int]):
         """
         Toggles whether the Tile is flagged, or chords if left mouse button is also pressed.
 
         Params:
-            tuple[int, int]: The Tile position within the 2D array.
+            tuple[int, int]: The Tile position within the field.
         """
-        tile = self.tiles[pos[0]][pos[1]]
         pressed = pygame.mouse.get_pressed()
         # left mouse button also pressed
         if pressed[0]:
-            if tile.state != TileStates.HIDDEN and tile.state != TileStates.FLAG:
-                self.chord(pos, tile.state)
-        elif tile.state == TileStates.HIDDEN:
-            tile.update_state(TileStates.FLAG)
-            self.flags.append(pos)
-            if self.sound_enabled:
-                self.flag_sound.play()
-        elif tile.state == TileStates.FLAG:
-            tile.update_state(TileStates.HIDDEN)
-            self.flags.remove(pos)
+            self.make_move('chord', pos)
+        else:
+            self.make_move('flag', pos)
 
-    def check_tile_press(self):
+    def make_move(self, action: str, pos: tuple[int, int]):
         """
-        Checks whether each Tile Sprite is currently being clicked and executes subsequent functions.
-        """
-        pressed = pygame.mouse.get_pressed()
-        for x in range(self.cols):
-            for y in range(self.rows):
-                tile = self.tiles[x][y]
-                if tile not in self.to_chord:
-                    if tile.check_mouse_press(pygame.mouse.get_pos()):
-                        # right mouse button also pressed
-                        if pressed[2]:
-                            self.press_chord((x, y), tile.state)
-        self.to_chord = []
+        Records a move in the Replay and applies it to the Board, which publishes the tiles it changed.
 
-    def get_chord_info(self, pos: tuple[int, int], num_flags: int) -> tuple[bool, list[Tile]]:
+        Params:
+            str: The action to take ('reveal', 'flag' or 'chord').
+            tuple[int, int]: The Tile position within the field.
         """
-        Checks if a tile can be chorded and gets the list of tiles that would be uncovered with a chord
-            (left and right click simultaneously).
+        # the same timestamp is recorded and used by the timer, so that replays reproduce the time exactly
+        ticks = pygame.time.get_ticks()
+        self.replay.record(ticks, action, pos)
+        apply_move(self.board, action, pos, self.replay.no_guess)
+        self.update_board(ticks)
 
-        Params:
-            tuple[int, int]: The Tile position within the 2D array.
-            int: The number of flags that must be adjacent to the Tile in order to chord.
-        
-        Returns:
-            tuple[bool, list[Tile]]: A boolean representing whether the Tile can currently be chorded
-                and the list of tiles that would be uncovered if the chord is valid.
-        """
-        flag_count = 0
-        neighbors = []
-        x_min = pos[0] - 1 if pos[0] - 1 >= 0 else 0
-        y_min = pos[1] - 1 if pos[1] - 1 >= 0 else 0
-        x_max = pos[0] + 1 if pos[0] + 1 < self.cols else self.cols - 1
-        y_max = pos[1] + 1 if pos[1] + 1 < self.rows else self.rows - 1
-        for x in range(x_min, x_max + 1):
-            for y in range(y_min, y_max + 1):
-                if (x, y) != (pos[0], pos[1]):
-                    neighbor = self.tiles[x][y]
-                    if neighbor.state == TileStates.FLAG:
-                        flag_count += 1
-                    elif neighbor.state == TileStates.HIDDEN:
-                        neighbors.append(neighbor)
-
-        return (flag_count == num_flags, neighbors)
-
-    def chord(self, pos: tuple[int, int], num_flags: int):
-        """
-        If the correct number of adjacent Tiles has been flagged, uncovers all adjacent hidden Tiles.
+    def on_board_change(self, change_set: ChangeSet):
+        """
+        Subscribed to the Board. Marks the changed tiles for redrawing and plays the sound of the change.
 
         Params:
-            tuple[int, int]: The position within the 2D array of the center Tile.
-            int: The number of flags that must be adjacent to the center Tile in order to chord.
-        """
-        chord_info = self.get_chord_info(pos, num_flags)
-        self.to_chord = chord_info[1]
-
-        if chord_info[0]:
-            for tile in self.to_chord:
-                if tile.is_mine:
-                    tile.update_state(TileStates.MINE_HIT)
-                    self.loss()
-                    return
-            
-            for tile in self.to_chord:
-                if not self.visited[tile.position[0]][tile.position[1]]:
-                    self.uncover(tile.position)
-            if len(self.to_chord) > 0 and self.sound_enabled:
-                self.click_sound.play()
-
-    def press_chord(self, pos: tuple[int, int], num_flags: int):
-        """
-        Displays the pressed texture for all tiles that may be chorded.
+            ChangeSet: The tiles changed by a Board mutation.
         """
-        self.to_chord = self.get_chord_info(pos, num_flags)[1]
-        for tile in self.to_chord:
-            if tile.state == TileStates.HIDDEN:
-                tile.image = tile.surfaces[TileStates.UNCOVERED]
+        if change_set.kind == 'reset':
+            self.view_dirty = True
+        elif not self.view_dirty:
+            # once more tiles changed than are in view, comparing the view is cheaper
+            if len(self.changed_tiles) + len(change_set.indices) > self.view_cols * self.view_rows:
+                self.view_dirty = True
+                self.changed_tiles = set()
+            else:
+                self.changed_tiles.update(change_set.indices)
+        self.tiles_dirty = True
+        if change_set.kind in CHANGE_SOUNDS:
+            self.play_sound(CHANGE_SOUNDS[change_set.kind])
 
-    def plant_mines(self, pos: tuple[int, int]):
+    def check_tile_press(self, pressed: tuple[bool, bool, bool] | None = None, mouse_pos: tuple[int, int] | None = None):
         """
-        Randomly populates the field with mines, excluding the first Tile clicked.
+        Finds the Tile currently being clicked, if any, and displays it and any Tiles that may be chorded as pressed.
+        Only the Tile under the cursor is hit-tested, so the cost does not depend on the size of the field.
 
         Params:
-            tuple[int, int]: The position within the 2D array of the clicked Tile.
+            tuple[bool, bool, bool] | None: The pressed state of the left, middle and right mouse buttons.
+                Defaults to the current state.
+            tuple[int, int] | None: The mouse position relative to the window. Defaults to the current position.
         """
-        open_tiles = []
-        for x in range(self.cols):
-            for y in range(self.rows):
-                if (x, y) != pos:
-                    open_tiles.append((x, y))
-        for i in range(self.num_mines):
-            rand_index = random.randint(0, len(open_tiles) - 1)
-            tile_pos = open_tiles[rand_index]
-            self.tiles[tile_pos[0]][tile_pos[1]].is_mine = True
-            self.mines.append((tile_pos[0], tile_pos[1]))
-            del open_tiles[rand_index]
+        if pressed is None:
+            pressed = pygame.mouse.get_pressed()
+        if mouse_pos is None:
+            mouse_pos = pygame.mouse.get_pos()
+        pos = self.get_tile_at(mouse_pos) if pressed[0] else None
+        # the pressed Tiles can only change if the cursor Tile, the mouse buttons or the Board changed
+        press_key = (pos, pressed)
+        if press_key == self.press_key and not self.tiles_dirty:
+            return
+        self.press_key = press_key
+
+        self.pressed_tiles = set()
+        if pos is not None:
+            if not pressed[1] and self.board.get_state(pos) == TileStates.HIDDEN:
+                self.pressed_tiles.add(self.board.index(pos))
+            # right mouse button also pressed
+            if pressed[2]:
+                self.pressed_tiles.update(self.board.index(neighbor) for neighbor in self.board.get_chord_info(pos)[1])
 
-    def uncover(self, pos: tuple[int, int]):
+    def update_board(self, ticks: int | None = None):
         """
-        Uncovers the Tile and its surroundings at a given position.
+        Updates the timer after a Board move and ends the game if the move won or lost it.
 
         Params:
-            tuple[int, int]: The Tile position within the 2D array.
-        """
-        if len(self.mines) == 0:
-            self.plant_mines(pos)
-
-        # perform breadth first search starting at the clicked tile
-        bfs_queue = [pos]
-        self.visited[pos[0]][pos[1]] = True
-        while len(bfs_queue) > 0:
-            current = bfs_queue.pop(0)
-            mine_count = 0
-            neighbors = []
-            x_min = current[0] - 1 if current[0] - 1 >= 0 else 0
-            y_min = current[1] - 1 if current[1] - 1 >= 0 else 0
-            x_max = current[0] + 1 if current[0] + 1 < self.cols else self.cols - 1
-            y_max = current[1] + 1 if current[1] + 1 < self.rows else self.rows - 1
-            for x in range(x_min, x_max + 1):
-                for y in range(y_min, y_max + 1):
-                    if (x, y) != (current[0], current[1]):
-                        candidate = self.tiles[x][y]
-                        if not self.visited[x][y] and candidate.state == TileStates.HIDDEN:
-                            neighbors.append((x, y))
-                        if candidate.is_mine:
-                            mine_count += 1
-            
-            self.tiles[current[0]][current[1]].update_state(TileStates.UNCOVERED + mine_count)
-            self.uncovered_tiles += 1
-
-            if self.uncovered_tiles == self.rows*self.cols - self.num_mines:
-                self.win()
-                return
-
-            # stop searching along edges with neighboring mines
-            if mine_count == 0:
-                bfs_queue.extend(neighbors)
-                for position in neighbors:
-                    self.visited[position[0]][position[1]] = True
+            int | None: The time of the move in milliseconds. Will read the pygame clock if not provided.
+        """
+        self.update_timer(ticks)
+        if self.board.won:
+            self.win()
+        elif self.board.lost:
+            self.loss()
 
     def update_face_button(self):
         """
@@ -573,11 +1084,7 @@ class Game():
         pressed = pygame.mouse.get_pressed()
         # left mouse button
         if pressed[0]:
-            click_loc = pygame.mouse.get_pos()
-            bottom_right = (self.field_top_left[0] + TILE_SIZE*self.cols,
-                            self.field_top_left[1] + TILE_SIZE*self.rows)
-            if click_loc[0] >= self.field_top_left[0] and click_loc[1] >= self.field_top_left[1] \
-                and click_loc[0] <= bottom_right[0] and click_loc[1] <= bottom_right[1]:
+            if self.field_rect.collidepoint(pygame.mouse.get_pos()):
                 self.face_button.state = FaceExpressions.SHOCKED
             else:
                 self.face_button.state = FaceExpressions.HAPPY
@@ -586,29 +1093,76 @@ class Game():
 
     def win(self):
         """
-        Ends the game, saves the time to ../data/highscores.txt, and updates the face Button to signify a win.
+        Ends the game, saves the time to ../data/highscores.log, and updates the face Button to signify a win.
         """
         self.game_over = True
         self.face_button.state = FaceExpressions.WIN
-        if self.sound_enabled:
-            self.victory_sound.play()
-        self.player_rank = self.file_io.add_score(self.time, self.difficulty, self.player_name)
+        self.play_sound('victory')
+        self.player_rank = -1
+        if not self.from_code:
+            self.player_rank = self.file_io.add_score(self.time, self.difficulty, self.player_name)
+        # keep a replay of every win so that its time can be verified
+        self.replay.won = True
+        self.replay.time = self.time
+        self.file_io.write_replay(self.replay.to_dict())
+        self.summarize_game()
 
     def loss(self):
         """
-        Ends the game, reveals mistakes and remaining mines, and updates the face Button to signify a loss.
+        Ends the game, displays the revealed mines, and updates the face Button to signify a loss.
         """
         self.game_over = True
         self.face_button.state = FaceExpressions.LOSE
-        if self.sound_enabled:
-            self.explosion_sound.play()
-        for pos in self.mines:
-            self.tiles[pos[0]][pos[1]].reveal()
-        for pos in self.flags:
-            self.tiles[pos[0]][pos[1]].reveal()
-        for x in range(self.cols):
-            for y in range(self.rows):
-                self.tiles[x][y].mouse_unpress()
+        self.pressed_tiles = set()
+        self.press_key = None
+        self.summarize_game()
+
+    def summarize_game(self):
+        """
+        Starts computing the 3BV and board code of the finished game on the worker thread, from a copy of its mines,
+            so that the window stays responsive on large boards. The game is recorded in the statistics database and
+            its code shown once they are ready.
+        """
+        board = self.board
+        seed = self.seed if not self.from_code else None
+        record = (get_difficulty_key(self.difficulty, self.rows, self.cols, self.num_mines), self.player_name, seed,
+                  board.won, self.time, len(self.replay.events))
+        self.summary = self.summary_executor.submit(summarize_layout, board.rows, board.cols, bytes(board.mines),
+                                                    bytes(board.counts), board.first_click)
+        self.pending_summaries.append((self.summary, record))
+        self.summary.add_done_callback(post_summary_event)
+
+    def record_summaries(self, wait: bool = False):
+        """
+        Records the finished games whose summaries are ready, and shows the board code of the current game.
+
+        Params:
+            bool: True iff summaries still being computed should be waited for.
+        """
+        pending = []
+        for summary, record in self.pending_summaries:
+            if not wait and not summary.done():
+                pending.append((summary, record))
+                continue
+            bbbv, code = summary.result()
+            difficulty, name, seed, won, time, clicks = record
+            self.file_io.record_game(difficulty, name, seed, won, time, bbbv, clicks)
+            if summary is self.summary and not self.quitting:
+                self.show_board_code(code)
+        self.pending_summaries = pending
+
+    def show_board_code(self, code: str):
+        """
+        Shows the code of the finished board in the window caption if it fits, so that it can be shared and replayed.
+
+        Params:
+            str: The board code.
+        """
+        self.board_code = code
+        if len(self.board_code) <= MAX_CAPTION_CODE_LENGTH:
+            pygame.display.set_caption('Minesweeper - ' + self.board_code)
+        else:
+            pygame.display.set_caption('Minesweeper - press Ctrl+C to copy the board code')
 
     def quit(self):
         """
@@ -627,15 +1181,50 @@ class Game():
     
     def toggle_sound(self):
         """
-        Enables/disables sound.
+        Enables/disables sound, and starts loading the sounds in the background when it is enabled.
         """
         self.sound_enabled = not self.sound_enabled
+        if self.sound_enabled:
+            self.assets.preload_sounds()
     
     def save_settings(self):
         """
-        Uses the Data class to write settings data to ../data/settings.txt.
+        Uses the Data class to write settings data to ../data/settings.txt and any buffered game records.
         """
         data = {
-            'sound_enabled': self.sound_enabled
+            'sound_enabled': self.sound_enabled,
+            'no_guess': self.no_guess
         }
         self.file_io.write_settings(data)
+        self.file_io.flush_statistics()
+
+
+def summarize_layout(rows: int, cols: int, mines: bytes, counts: bytes, first_click: int | None) -> tuple[int, str]:
+    """
+    Computes the 3BV and board code of a finished game. Runs on the worker thread.
+
+    Params:
+        int: The number of rows in the field.
+        int: The number of columns in the field.
+        bytes: 1 for every tile holding a mine, else 0.
+        bytes: The number of adjacent mines of every tile.
+        int | None: The index of the first tile clicked, or None if no tile was clicked.
+
+    Returns:
+        tuple[int, str]: The 3BV and the board code.
+    """
+    return (count_3bv(mines, counts, rows, cols), encode_layout(rows, cols, mines, first_click))
+
+
+def post_summary_event(summary: Future):
+    """
+    Wakes the game loop once a summary is ready. Runs on the worker thread.
+
+    Params:
+        Future: The finished summary.
+    """
+    try:
+        pygame.event.post(pygame.event.Event(SUMMARY_EVENT))
+    # the window has been closed; summaries left are recorded when the game loop ends
+    except pygame.error:
+        pass
@@ -0,0 +1,264 @@
+import random
+
+from board import Board, sample_mines
+from enums import TileStates
+from solver import solve
+
+
+# limits on how long to repair a layout before starting again, and how many layouts to try
+MAX_REPAIRS = 200
+MAX_ATTEMPTS = 20
+
+
+def plant_no_guess(board: Board, pos: tuple[int, int]) -> bool:
+    """
+    Plants mines on a Board so that, starting from the given first click, every safe tile can be found by logic alone.
+
+    A random layout is played on a scratch Board with the solver. Whenever the solver gets stuck, a mine it cannot
+        place is moved to a tile away from it, and the game is taken back to just before the first number
+        that changed was uncovered. Everything solved before that point never saw the moved mine, so it stays valid
+        and only the rest of the game is solved again. A layout whose game is won this way needs no guesses.
+
+    Params:
+        Board: The Board to plant mines on. Its random number generator is used.
+        tuple[int, int]: The position within the field of the first tile clicked.
+
+    Returns:
+        bool: True iff a layout without guesses was found. Otherwise the last layout tried is planted.
+    """
+    rng = board.rng
+    scratch = Board(board.rows, board.cols, board.num_mines, rng)
+    # keep the area around the first click clear so that it opens
+    excluded = board.get_safe_zone(pos)
+    neighbors = [scratch.get_neighbor_indices(i) for i in range(scratch.size)]
+
+    mines = []
+    for attempt in range(MAX_ATTEMPTS):
+        mines = sample_mines(board.size, board.num_mines, excluded, rng)
+        scratch.reset()
+        scratch.load_mines(mines)
+        if LayoutRepair(scratch, excluded, neighbors, rng).run(scratch.index(pos)):
+            board.load_mines(scratch.get_mine_indices())
+            return True
+    board.load_mines(mines)
+    return False
+
+
+class LayoutRepair:
+    """
+    Solves a scratch Board from the first click, moving mines whenever the solver gets stuck.
+        Keeps the order tiles were solved in, so that a repair only undoes the part of the game it affects,
+        and the set of tiles a mine can be moved to, so that a repair does not scan the field.
+    """
+
+    def __init__(self, scratch: Board, excluded: set[int], neighbors: list[list[int]], rng: random.Random):
+        """
+        Initializes a LayoutRepair object.
+
+        Params:
+            Board: A Board with mines planted and no tiles uncovered.
+            set[int]: The indices of tiles that must not hold a mine.
+            list[list[int]]: The indices of the neighbors of every tile.
+            Random: The random number generator used to choose repairs.
+        """
+        self.scratch: Board = scratch
+        self.excluded: set[int] = excluded
+        self.neighbors: list[list[int]] = neighbors
+        self.rng: random.Random = rng
+        # indices of numbers to check with local deductions
+        self.queue: set[int] = set()
+        # enumerated frontier components, which stay valid across repairs since they only depend on the constraints
+        self.components: dict[frozenset, tuple[list[int], dict[int, int], dict[int, list[int]]]] = {}
+        # indices of tiles uncovered or flagged in order, and the position of each in that order
+        self.history: list[int] = []
+        self.steps: dict[int, int] = {}
+        # hidden tiles without a mine that no uncovered tile is next to, where a stuck mine can be moved
+        self.destinations: set[int] = set(range(scratch.size)) - scratch.mine_indices - excluded
+
+    def run(self, start: int) -> bool:
+        """
+        Plays the Board from the first click, repairing the layout until the game is won or too many repairs are made.
+
+        Params:
+            int: The index of the first tile clicked.
+
+        Returns:
+            bool: True iff the Board now holds a layout that can be solved without guessing.
+        """
+        scratch = self.scratch
+        self.reveal_tile(start)
+        repairs = 0
+        while not scratch.game_over:
+            # cheap local deductions first, the full solver only once they run out
+            self.deduce_locally()
+            if scratch.game_over:
+                break
+            result = solve(scratch, cache=self.components)
+            for i in result.mines:
+                self.flag_tile(i)
+            for i in result.safe:
+                self.reveal_tile(i)
+            if len(self.queue) > 0:
+                continue
+            if repairs == MAX_REPAIRS or not self.move_stuck_mine():
+                return False
+            repairs += 1
+            if len(self.history) == 0:
+                self.reveal_tile(start)
+        return scratch.won
+
+    def reveal_tile(self, index: int):
+        """
+        Reveals a hidden tile, records the tiles it uncovered and queues the uncovered numbers whose surroundings changed.
+
+        Params:
+            int: The index of the tile to reveal.
+        """
+        scratch = self.scratch
+        states = scratch.states
+        if states[index] != TileStates.HIDDEN:
+            return
+        scratch.reveal(scratch.position(index))
+        # new tiles are found through the opening, and tiles uncovered earlier are already in the history
+        region = [index]
+        seen = {index}
+        for i in region:
+            opening = states[i] == TileStates.UNCOVERED
+            if not opening:
+                self.queue.add(i)
+            for j in self.neighbors[i]:
+                if j in seen or states[j] > TileStates.UNCOVERED + 8:
+                    continue
+                if j in self.steps:
+                    self.queue.add(j)
+                elif opening:
+                    seen.add(j)
+                    region.append(j)
+        step = len(self.history)
+        for i in region:
+            self.steps[i] = step
+            self.destinations.discard(i)
+            self.destinations.difference_update(self.neighbors[i])
+        self.history.extend(region)
+
+    def flag_tile(self, index: int):
+        """
+        Flags a hidden tile proven to be a mine, records it and queues the uncovered numbers around it.
+
+        Params:
+            int: The index of the tile to flag.
+        """
+        scratch = self.scratch
+        if scratch.states[index] != TileStates.HIDDEN:
+            return
+        scratch.toggle_flag(scratch.position(index))
+        self.steps[index] = len(self.history)
+        self.history.append(index)
+        for j in self.neighbors[index]:
+            if scratch.states[j] <= TileStates.UNCOVERED + 8:
+                self.queue.add(j)
+
+    def deduce_locally(self):
+        """
+        Reveals or flags the hidden neighbors of queued numbers that are already satisfied by flags
+            or need every hidden neighbor to be a mine, until the queue is empty.
+        """
+        scratch = self.scratch
+        states = scratch.states
+        queue = self.queue
+        while len(queue) > 0 and not scratch.game_over:
+            i = queue.pop()
+            number = states[i] - TileStates.UNCOVERED
+            if number > 8:
+                continue
+            hidden = []
+            flag_count = 0
+            for j in self.neighbors[i]:
+                if states[j] == TileStates.HIDDEN:
+                    hidden.append(j)
+                elif states[j] == TileStates.FLAG:
+                    flag_count += 1
+            if len(hidden) == 0:
+                continue
+            if flag_count == number:
+                for j in hidden:
+                    self.reveal_tile(j)
+            elif flag_count + len(hidden) == number:
+                for j in hidden:
+                    self.flag_tile(j)
+
+    def move_stuck_mine(self) -> bool:
+        """
+        Moves a mine the solver could not place from the edge of the uncovered area to a tile away from it,
+            then takes the game back to just before the first number next to either tile was uncovered.
+
+        Returns:
+            bool: True iff a mine was moved.
+        """
+        scratch = self.scratch
+        states = scratch.states
+        # only mines can be stuck, so there is no need to look at the rest of the field
+        stuck_mines = [i for i in scratch.mine_indices if states[i] == TileStates.HIDDEN
+                       and self.first_step(i) < len(self.history)]
+        if len(stuck_mines) == 0:
+            return False
+
+        # moving a mine whose numbers were uncovered last undoes the least of the game
+        steps = {i: self.first_step(i) for i in stuck_mines}
+        latest = max(steps.values())
+        source = self.rng.choice(sorted(i for i in stuck_mines if steps[i] == latest))
+        if len(self.destinations) > 0:
+            destination = self.rng.choice(sorted(self.destinations))
+            step = latest
+        else:
+            # late in the game every hidden tile may be next to the uncovered area, so the mine goes under a tile
+            # solved earlier instead, which undoes more of the game but does not start it again
+            destinations = [i for i in self.history if not scratch.mines[i] and i not in self.excluded
+                            and i != source and i not in self.neighbors[source]]
+            if len(destinations) == 0:
+                return False
+            destination = self.rng.choice(destinations)
+            step = min(latest, self.steps[destination], self.first_step(destination))
+        scratch.move_mine(source, destination)
+        self.destinations.discard(destination)
+        self.rewind(step)
+        return True
+
+    def first_step(self, index: int) -> int:
+        """
+        Params:
+            int: The index of a tile.
+
+        Returns:
+            int: The position in the history of the first uncovered number next to the tile,
+                or the length of the history if there is none.
+        """
+        states = self.scratch.states
+        return min((self.steps[j] for j in self.neighbors[index] if states[j] <= TileStates.UNCOVERED + 8),
+                   default=len(self.history))
+
+    def rewind(self, step: int):
+        """
+        Hides every tile uncovered or flagged since a given point in the game, and queues the numbers next to them,
+            whose surroundings changed.
+
+        Params:
+            int: The position in the history of the first tile to hide.
+        """
+        scratch = self.scratch
+        states = scratch.states
+        covered = self.history[step:]
+        del self.history[step:]
+        scratch.cover(covered)
+        self.queue.clear()
+        changed = set()
+        for i in covered:
+            del self.steps[i]
+            changed.add(i)
+            changed.update(self.neighbors[i])
+        for i in changed:
+            if states[i] <= TileStates.UNCOVERED + 8:
+                self.queue.add(i)
+            elif (states[i] == TileStates.HIDDEN and not scratch.mines[i] and i not in self.excluded
+                  and all(states[j] > TileStates.UNCOVERED + 8 for j in self.neighbors[i])):
+                self.destinations.add(i)
@@ -0,0 +1,345 @@
+import argparse
+import asyncio
+import base64
+import json
+import random
+import sys
+import time
+
+from board import Board
+from broadcast import apply_delta, decode_snapshot
+from const import DIFFICULTIES
+from profiler import summarize_times
+from server import DEFAULT_HOST, DEFAULT_PORT, GameServer, encode_message
+from simulate import random_strategy, simple_strategy
+
+
+# strategies selectable from the command line; the solver is left out so that the clients do not need the CPU
+# the server is measured on
+STRATEGIES = {
+    'random': random_strategy,
+    'simple': simple_strategy
+}
+# responses list every tile a move changed, so a flood fill on a large board can be a long line
+MAX_RESPONSE_LENGTH = 1 << 24
+
+
+class LoadStats:
+    """
+    Aggregated results of a load test: counts of sessions, games and moves, the round trip time of every move,
+        and the frames received by spectators.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty LoadStats object.
+        """
+        self.sessions: int = 0
+        self.games: int = 0
+        self.wins: int = 0
+        self.moves: int = 0
+        self.errors: int = 0
+        self.move_times: list[float] = []
+        self.session_times: list[float] = []
+        self.spectators: int = 0
+        self.frames: int = 0
+        self.frame_bytes: int = 0
+        self.spectator_mismatches: int = 0
+
+    def summary(self, elapsed: float) -> dict:
+        """
+        Params:
+            float: The duration of the load test in seconds.
+
+        Returns:
+            dict: The counts, the rates of sessions, games and moves per second, the round trip times of moves
+                and durations of sessions in milliseconds, and the number and mean size of spectator frames.
+        """
+        return {
+            'sessions': self.sessions,
+            'games': self.games,
+            'wins': self.wins,
+            'moves': self.moves,
+            'errors': self.errors,
+            'elapsed': elapsed,
+            'sessions_per_sec': self.sessions / elapsed if elapsed > 0 else 0.0,
+            'games_per_sec': self.games / elapsed if elapsed > 0 else 0.0,
+            'moves_per_sec': self.moves / elapsed if elapsed > 0 else 0.0,
+            'move_latency': summarize_times(self.move_times),
+            'session_time': summarize_times(self.session_times),
+            'spectators': self.spectators,
+            'frames': self.frames,
+            'bytes_per_frame': self.frame_bytes / self.frames if self.frames > 0 else 0.0,
+            'spectator_mismatches': self.spectator_mismatches
+        }
+
+
+async def send_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, request: dict) -> dict:
+    """
+    Helper function to send a request and wait for its response.
+
+    Params:
+        StreamReader: The connection's incoming stream.
+        StreamWriter: The connection's outgoing stream.
+        dict: The request.
+
+    Returns:
+        dict: The response.
+
+    Raises:
+        ConnectionError: If the server closed the connection.
+    """
+    writer.write(encode_message(request))
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError('connection closed by server')
+    return json.loads(line)
+
+
+async def watch_game(host: str, port: int, game_id: int, ready: asyncio.Event, stats: LoadStats) -> bytearray:
+    """
+    Watches a session's games as a spectator until the session ends, rebuilding its tiles from the frames received.
+
+    Params:
+        str: The host of the server.
+        int: The port of the server.
+        int: The ID of the session to watch.
+        Event: An event set once the spectator is watching, or has failed to.
+        LoadStats: The results to add to.
+
+    Returns:
+        bytearray: The TileStates value of every tile when the session ended.
+
+    Raises:
+        ConnectionError: If the server closed the connection before the session ended.
+        ValueError: If the server refused the request or sent an invalid frame.
+    """
+    states = bytearray()
+    writer = None
+    try:
+        reader, writer = await asyncio.open_connection(host, port, limit=MAX_RESPONSE_LENGTH)
+        writer.write(encode_message({'op': 'watch', 'game': game_id}))
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError('connection closed by server')
+            message = json.loads(line)
+            if 'ok' in message:
+                if not message['ok']:
+                    raise ValueError(message['error'])
+                stats.spectators += 1
+                ready.set()
+                continue
+            stats.frames += 1
+            stats.frame_bytes += len(line)
+            if message['frame'] == 'end':
+                return states
+            data = base64.b64decode(message['data'])
+            if message['frame'] == 'snapshot':
+                states = decode_snapshot(data, message['rows'] * message['cols'])
+            else:
+                apply_delta(states, data)
+    finally:
+        ready.set()
+        if writer is not None:
+            writer.close()
+
+
+async def play_session(host: str, port: int, difficulty: str, strategy, games: int, spectators: int,
+                       rng: random.Random, stats: LoadStats):
+    """
+    Opens a session and plays games on it until they are won or lost, one request at a time.
+        The client keeps its own copy of the visible tiles from the changes in each response and chooses moves from it.
+        Spectators start watching before the first move, and must end up with the same tiles as the player.
+
+    Params:
+        str: The host of the server.
+        int: The port of the server.
+        str: The difficulty to play.
+        Any: The strategy function that chooses the next moves.
+        int: The number of games to play.
+        int: The number of spectators watching the session.
+        Random: The random number generator of the session.
+        LoadStats: The results to add to.
+    """
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_RESPONSE_LENGTH)
+    watchers = []
+    visible = Board(0, 0, 0)
+    try:
+        for game in range(games):
+            response = await send_request(reader, writer, {'op': 'new', 'difficulty': difficulty,
+                                                           'seed': rng.getrandbits(32)})
+            if not response['ok']:
+                raise ValueError(response['error'])
+            visible = Board(response['rows'], response['cols'], response['mines'])
+            if game == 0 and spectators > 0:
+                events = [asyncio.Event() for _ in range(spectators)]
+                watchers = [asyncio.create_task(watch_game(host, port, response['game'], event, stats))
+                            for event in events]
+                for event in events:
+                    await event.wait()
+            game_over = False
+            while not game_over:
+                for action, pos in strategy(visible, rng):
+                    move_start = time.perf_counter()
+                    response = await send_request(reader, writer, {'op': 'move', 'action': action,
+                                                                   'x': pos[0], 'y': pos[1]})
+                    stats.move_times.append(time.perf_counter() - move_start)
+                    if not response['ok']:
+                        raise ValueError(response['error'])
+                    stats.moves += 1
+                    for i, state in response['changes']:
+                        visible.states[i] = state
+                    if response['won'] or response['lost']:
+                        game_over = True
+                        stats.wins += response['won']
+                        break
+            stats.games += 1
+    finally:
+        # closing the session ends the spectators' broadcast
+        writer.close()
+        watched = await asyncio.gather(*watchers, return_exceptions=True)
+    for states in watched:
+        if isinstance(states, Exception):
+            raise states
+        if states != visible.states:
+            stats.spectator_mismatches += 1
+    stats.sessions += 1
+    stats.session_times.append(time.perf_counter() - start)
+
+
+async def run_load_test(host: str, port: int, num_sessions: int, concurrency: int, difficulty: str,
+                        strategy_name: str, games: int, seed: int, spectators: int = 0, progress=None) -> LoadStats:
+    """
+    Plays a number of sessions against a server, keeping a fixed number of them open at once.
+        Each session is seeded from the base seed and its own index, so the games played do not depend on timing.
+
+    Params:
+        str: The host of the server.
+        int: The port of the server.
+        int: The total number of sessions to play.
+        int: The number of sessions open at once.
+        str: The difficulty to play.
+        str: The name of the strategy in STRATEGIES.
+        int: The number of games per session.
+        int: The base seed of the load test.
+        int: The number of spectators watching each session.
+        Any | None: A function called with the LoadStats after each session ends.
+
+    Returns:
+        LoadStats: The aggregated results of all sessions.
+    """
+    stats = LoadStats()
+    strategy = STRATEGIES[strategy_name]
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < num_sessions:
+            index = next_index
+            next_index += 1
+            try:
+                await play_session(host, port, difficulty, strategy, games, spectators,
+                                   random.Random(f'{seed}-{index}'), stats)
+            except (OSError, ValueError, KeyError) as e:
+                stats.errors += 1
+                if stats.errors == 1:
+                    print(f'Session %d failed: %s' % (index, e), file=sys.stderr)
+            if progress is not None:
+                progress(stats)
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, num_sessions))))
+    return stats
+
+
+async def get_server_stats(host: str, port: int) -> dict:
+    """
+    Params:
+        str: The host of the server.
+        int: The port of the server.
+
+    Returns:
+        dict: The counters of the server.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return (await send_request(reader, writer, {'op': 'stats'}))['stats']
+    finally:
+        writer.close()
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """
+    Runs the load test described by the command line arguments, starting a server in the same process if requested.
+
+    Params:
+        Namespace: The parsed command line arguments.
+
+    Returns:
+        dict: The summary of the load test and the counters of the server.
+    """
+    server = None
+    port = args.port
+    if args.local:
+        server = GameServer(args.host, 0)
+        port = await server.start()
+    try:
+        def progress(stats: LoadStats):
+            done = stats.sessions + stats.errors
+            # report every percent of the sessions
+            if done % max(args.sessions // 100, 1) == 0:
+                print(f'\r%d/%d sessions' % (done, args.sessions), end='', file=sys.stderr)
+        start = time.perf_counter()
+        stats = await run_load_test(args.host, port, args.sessions, args.concurrency, args.difficulty,
+                                    args.strategy, args.games, args.seed, args.spectators, progress)
+        elapsed = time.perf_counter() - start
+        print(file=sys.stderr)
+        result = stats.summary(elapsed)
+        result['server'] = await get_server_stats(args.host, port)
+    finally:
+        if server is not None:
+            await server.close()
+    return result
+
+
+def main():
+    """
+    Runs the load test from the command line and prints its summary.
+    """
+    parser = argparse.ArgumentParser(description='Play many concurrent sessions against a Minesweeper game server.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('-n', '--sessions', type=int, default=1000, help='total number of sessions')
+    parser.add_argument('-c', '--concurrency', type=int, default=100, help='number of sessions open at once')
+    parser.add_argument('-d', '--difficulty', choices=DIFFICULTIES.keys(), default='expert')
+    parser.add_argument('-s', '--strategy', choices=STRATEGIES.keys(), default='simple')
+    parser.add_argument('-g', '--games', type=int, default=1, help='number of games per session')
+    parser.add_argument('--spectators', type=int, default=0, help='number of spectators watching each session')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--local', action='store_true',
+                        help='start a server in this process on a free port instead of connecting to one')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        latency = result['move_latency']
+        print(f'%d sessions (%d failed), %d games, %d moves in %.2fs'
+              % (result['sessions'], result['errors'], result['games'], result['moves'], result['elapsed']))
+        print(f'%.1f sessions/s, %.1f moves/s' % (result['sessions_per_sec'], result['moves_per_sec']))
+        server_time = result['server']['request_time']
+        print(f'Move latency: mean %.2f ms, p50 %.2f ms, p99 %.2f ms, max %.2f ms'
+              % (latency['mean'], latency['p50'], latency['p99'], latency['max']))
+        print(f'Server time per request: mean %.3f ms, p99 %.3f ms' % (server_time['mean'], server_time['p99']))
+        if result['spectators'] > 0:
+            print(f'%d spectators received %d frames, %.1f bytes per frame, %d ended on a different board'
+                  % (result['spectators'], result['frames'], result['bytes_per_frame'], result['spectator_mismatches']))
+    if result['errors'] > 0 or result['spectator_mismatches'] > 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
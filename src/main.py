@@ -1,18 +1,43 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import time
 import tkinter as tk
 import tkinter.font as tkFont
+from tkinter import messagebox
+from typing import TYPE_CHECKING
 
-from const import MAX_NAME_LENGTH, NUM_HIGH_SCORES, ROOT_DIR
+from codes import decode_board
+from const import DIFFICULTIES, MAX_CUSTOM_SIDE, MAX_NAME_LENGTH, NUM_HIGH_SCORES, ROOT_DIR
 from data import Data
-from game import Game
+from stats import get_difficulty_key
 from utils import time_to_str
 
+if TYPE_CHECKING:
+    from game import Game
+
 
 TK_WIDTH = 400
-TK_HEIGHT = 400
+TK_HEIGHT = 520
 SCORE_TEXT_WIDTH = 12 + MAX_NAME_LENGTH
 
+
+def create_game(file_io: Data) -> 'Game':
+    """
+    Imports pygame and creates the Game, which starts loading its assets.
+
+    Params:
+        Data: The Data object shared with the startup menu.
+
+    Returns:
+        Game: The created Game.
+    """
+    from game import Game
+    return Game(file_io)
+
+
+launch_time = time.perf_counter()
 file_io = Data()
-game = Game(file_io)
+# pygame is imported and the game created in the background, so that the startup menu does not wait for them
+game_future: Future = ThreadPoolExecutor(max_workers=1).submit(create_game, file_io)
 
 
 class Menu(tk.Frame):
@@ -55,16 +80,36 @@ class Menu(tk.Frame):
         tk.Label(choice_frame, text='Select Difficulty', font=subtitle_font).pack()
         self.difficulty: tk.StringVar = tk.StringVar(difficulty_frame, value='beginner')
         tk.Radiobutton(choice_frame, text='Beginner', font=body_font, variable=self.difficulty, value='beginner',
-                       command=lambda: self.update_high_scores('beginner')).pack(anchor=tk.W)
+                       command=lambda: self.select_difficulty('beginner')).pack(anchor=tk.W)
         tk.Radiobutton(choice_frame, text='Intermediate', font=body_font, variable=self.difficulty, value='intermediate',
-                       command=lambda: self.update_high_scores('intermediate')).pack(anchor=tk.W)
+                       command=lambda: self.select_difficulty('intermediate')).pack(anchor=tk.W)
         tk.Radiobutton(choice_frame, text='Expert', font=body_font, variable=self.difficulty, value='expert',
-                       command=lambda: self.update_high_scores('expert')).pack(anchor=tk.W)
+                       command=lambda: self.select_difficulty('expert')).pack(anchor=tk.W)
+        tk.Radiobutton(choice_frame, text='Custom', font=body_font, variable=self.difficulty, value='custom',
+                       command=lambda: self.select_difficulty('custom')).pack(anchor=tk.W)
+        # rows, columns and mines of a custom board
+        custom_frame = tk.Frame(choice_frame)
+        custom_frame.pack(anchor=tk.W)
+        self.custom_entries: list[tk.Entry] = []
+        for default in (100, 100, 1500):
+            entry = tk.Entry(custom_frame, font=body_font, width=5)
+            entry.insert(0, str(default))
+            entry['state'] = tk.DISABLED
+            entry.pack(side=tk.LEFT)
+            self.custom_entries.append(entry)
+        self.no_guess_settings: dict[str, bool] = dict(file_io.get_settings()['no_guess'])
+        self.no_guess: tk.BooleanVar = tk.BooleanVar(choice_frame, value=self.no_guess_settings.get('beginner', False))
+        self.no_guess_button: tk.Checkbutton = tk.Checkbutton(choice_frame, text='No guessing', font=body_font,
+                                                              variable=self.no_guess, command=self.update_no_guess)
+        self.no_guess_button.pack(anchor=tk.W)
         score_label_frame = tk.LabelFrame(difficulty_frame, font=scores_font)
         score_label_frame.grid(row=0, column=1, padx=padding)
         self.score_label: tk.Label = tk.Label(score_label_frame, text=self.get_high_scores_text(self.difficulty.get()), font=scores_font,
                                               width=SCORE_TEXT_WIDTH, height=NUM_HIGH_SCORES, anchor=tk.W)
         self.score_label.pack()
+        self.stats_label: tk.Label = tk.Label(difficulty_frame, text=self.get_statistics_text(self.difficulty.get()),
+                                              font=body_font)
+        self.stats_label.grid(row=1, column=0, columnspan=2)
 
         name_frame = tk.Frame(self.root)
         name_frame.pack(pady=padding)
@@ -72,14 +117,21 @@ class Menu(tk.Frame):
         player_name = tk.StringVar()
         reg = self.root.register(self.validate_name) 
         tk.Entry(name_frame, textvariable=player_name, font=body_font, width=12, validate="key", validatecommand=(reg, '%P')).pack()
+        tk.Label(name_frame, text='Board Code (optional)', font=body_font).pack()
+        board_code = tk.StringVar()
+        tk.Entry(name_frame, textvariable=board_code, font=body_font, width=30).pack()
         
         button_frame = tk.Frame(self.root)
         button_frame.pack(side='bottom', pady=padding*2)
         tk.Button(button_frame, text='Start', font=subtitle_font, width=15, height=2, bg='lime',
-                command=lambda: self.start_game(self.root, {'difficulty': self.difficulty.get(), 'name': player_name.get()})).pack()
+                command=lambda: self.start_game(self.root, {'difficulty': self.difficulty.get(), 'name': player_name.get(),
+                                                             'code': board_code.get().strip()})).pack()
         tk.Button(button_frame, text='Quit', font=subtitle_font, width=8, height=1, bg='red',
                 command=self.root.quit).pack(pady=padding)
 
+        # the time taken to show the menu is measured from when the program started
+        self.root.update()
+        self.startup_time: float = time.perf_counter() - launch_time
         self.root.mainloop()
 
     def validate_name(self, input: str) -> bool:
@@ -100,25 +152,82 @@ class Menu(tk.Frame):
 
         Params:
             tk.Tk: The top level widget representing the main window.
-            tuple[str, str]: A tuple containing the game difficulty and player's entered name.
+            tuple[str, str]: A tuple containing the game difficulty, player's entered name and board code.
         """
-        self.root.withdraw() # temporarily close the tkinter window
+        code = game_info['code']
+        if code != '':
+            # decoding also rejects boards larger than custom boards can be
+            try:
+                decode_board(code)
+            except ValueError:
+                messagebox.showerror('Minesweeper', 'The board code is not valid, or its board is larger than %dx%d.'
+                                     % (MAX_CUSTOM_SIDE, MAX_CUSTOM_SIDE))
+                return
         difficulty = game_info['difficulty']
+        dimensions = None
+        if difficulty == 'custom':
+            dimensions = self.get_custom_dimensions()
+            if dimensions is None:
+                messagebox.showerror('Minesweeper', 'Custom boards need 1 to %d rows and columns and fewer mines than tiles.'
+                                     % MAX_CUSTOM_SIDE)
+                return
+        self.root.withdraw() # temporarily close the tkinter window
         player_name = game_info['name']
-        if game.start(difficulty, player_name):
+        game = game_future.result()
+        # the game saves the no guessing options chosen in the menu, and the startup time with its profiler report
+        game.no_guess = self.no_guess_settings
+        game.startup_time = self.startup_time
+        if game.start(difficulty, player_name, self.no_guess.get() and dimensions is None, code, dimensions=dimensions):
             self.update_high_scores(self.difficulty.get())
             root.deiconify() # reopen the tkinter window
         else:
             root.destroy() # quit tkinter
     
+    def select_difficulty(self, difficulty: str):
+        """
+        Updates the high scores and no guessing option to match the selected difficulty.
+
+        Params:
+            str: The difficulty selected.
+        """
+        self.update_high_scores(difficulty)
+        self.no_guess.set(self.no_guess_settings.get(difficulty, False))
+        # no guessing boards take too long to generate at custom sizes
+        custom = difficulty == 'custom'
+        self.no_guess_button['state'] = tk.DISABLED if custom else tk.NORMAL
+        for entry in self.custom_entries:
+            entry['state'] = tk.NORMAL if custom else tk.DISABLED
+
+    def get_custom_dimensions(self) -> tuple[int, int, int] | None:
+        """
+        Reads the custom board Entry fields.
+
+        Returns:
+            tuple[int, int, int] | None: The number of rows, columns and mines, or None if they are not valid.
+        """
+        try:
+            rows, cols, num_mines = (int(entry.get()) for entry in self.custom_entries)
+        except ValueError:
+            return None
+        if not (0 < rows <= MAX_CUSTOM_SIDE and 0 < cols <= MAX_CUSTOM_SIDE and 0 <= num_mines < rows*cols):
+            return None
+        return (rows, cols, num_mines)
+
+    def update_no_guess(self):
+        """
+        Records the no guessing option for the selected difficulty.
+        """
+        self.no_guess_settings[self.difficulty.get()] = self.no_guess.get()
+
     def update_high_scores(self, difficulty: str):
         """
-        Updates the high scores Label to show the high scores of the selected difficulty.
+        Updates the high scores and statistics Labels to show those of the selected difficulty.
 
         Params:
             str: The difficulty selected.
         """
         self.score_label['text'] = self.get_high_scores_text(difficulty)
+        self.stats_label['text'] = self.get_statistics_text(difficulty)
     
     def get_high_scores_text(self, difficulty: str):
         """
@@ -130,10 +239,9 @@ class Menu(tk.Frame):
         Returns:
             str: Formatted text of the high scores.
         """
-        high_scores = file_io.get_all_scores()
+        scores = file_io.get_scores(difficulty)
         text = ''
-        if difficulty in high_scores.keys():
-            scores = high_scores[difficulty]
+        if difficulty in DIFFICULTIES.keys():
             for i in range(NUM_HIGH_SCORES):
                 position = i + 1
                 position_text = f'%s. ' % position
@@ -152,6 +260,28 @@ class Menu(tk.Frame):
                     text += '\n'
             return text
 
+    def get_statistics_text(self, difficulty: str) -> str:
+        """
+        Gets the win rate and winning times of the current difficulty from the statistics database.
+            Custom games are summarized for the board size entered.
+
+        Params:
+            str: The difficulty selected.
+
+        Returns:
+            str: Formatted text of the statistics, or '' if no games have been recorded.
+        """
+        if difficulty == 'custom':
+            dimensions = self.get_custom_dimensions()
+            if dimensions is None:
+                return ''
+            difficulty = get_difficulty_key(difficulty, *dimensions)
+        stats = file_io.get_statistics(difficulty)
+        if stats.get('games', 0) == 0:
+            return ''
+        return f'Played %d, won %d%%  |  Median %s, best %s' % (stats['games'], round(100 * stats['win_rate']),
+                                                              time_to_str(stats['p50']), time_to_str(stats['best']))
+
 
 if __name__ == '__main__':
     root = tk.Tk()
@@ -0,0 +1,161 @@
+from collections import deque
+import math
+import time
+from typing import Callable
+
+
+# the number of recent frames kept, about 10 seconds at the frame rate of the game
+FRAME_HISTORY = 300
+
+
+class FrameProfiler:
+    """
+    Measures how long each phase of a frame takes and how much work it does, keeping the most recent frames.
+
+    The profiler starts disabled, and every method returns at once while it is disabled, so the main loop can
+        call it unconditionally. Counters are read from running totals kept by other objects, such as the
+        number of tiles drawn, and each frame records how much they increased during it.
+    """
+
+    def __init__(self, history: int = FRAME_HISTORY):
+        """
+        Initializes a disabled FrameProfiler object.
+
+        Params:
+            int: The number of recent frames to keep.
+        """
+        self.enabled: bool = False
+        self.frames: deque[tuple[float, dict[str, float], dict[str, int]]] = deque(maxlen=history)
+        self.num_frames: int = 0
+        self.counter_sources: dict[str, Callable[[], int]] = {}
+        self.counter_totals: dict[str, int] = {}
+        self.frame_start: float = 0.0
+        self.phase_start: float = 0.0
+        self.phase_times: dict[str, float] = {}
+
+    def watch(self, name: str, source: Callable[[], int]):
+        """
+        Adds a counter, read from a running total at the end of every frame.
+
+        Params:
+            str: The name of the counter.
+            Callable[[], int]: A function returning the running total.
+        """
+        self.counter_sources[name] = source
+        self.counter_totals[name] = source()
+
+    def set_enabled(self, enabled: bool):
+        """
+        Starts or stops profiling. Work done while the profiler was disabled is not counted,
+            so a frame in which it is enabled is measured from when it was enabled.
+
+        Params:
+            bool: True iff frames should be profiled.
+        """
+        self.enabled = enabled
+        for name, source in self.counter_sources.items():
+            self.counter_totals[name] = source()
+        self.frame_start = self.phase_start = time.perf_counter()
+        self.phase_times = {}
+
+    def reset(self):
+        """
+        Discards every profiled frame.
+        """
+        self.frames.clear()
+        self.num_frames = 0
+        self.set_enabled(self.enabled)
+
+    def begin_frame(self):
+        """
+        Marks the start of a frame and of its first phase.
+        """
+        if not self.enabled:
+            return
+        self.frame_start = self.phase_start = time.perf_counter()
+        self.phase_times = {}
+
+    def end_phase(self, name: str):
+        """
+        Marks the end of a phase, adding the time since the previous phase ended to it. The next phase starts now.
+
+        Params:
+            str: The name of the phase.
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phase_times[name] = self.phase_times.get(name, 0.0) + now - self.phase_start
+        self.phase_start = now
+
+    def end_frame(self):
+        """
+        Marks the end of a frame and records its time, phase times and counters.
+        """
+        if not self.enabled:
+            return
+        frame_time = time.perf_counter() - self.frame_start
+        counters = {}
+        for name, source in self.counter_sources.items():
+            total = source()
+            counters[name] = total - self.counter_totals[name]
+            self.counter_totals[name] = total
+        self.frames.append((frame_time, self.phase_times, counters))
+        self.num_frames += 1
+
+    def get_summary(self) -> dict:
+        """
+        Summarizes the kept frames.
+
+        Returns:
+            dict: The number of frames profiled and kept, the mean, median, 95th and 99th percentile and maximum times
+                in milliseconds of whole frames and of each phase, and the total and mean per frame of each counter.
+        """
+        phase_samples = {}
+        counter_samples = {name: [] for name in self.counter_sources.keys()}
+        for _, phase_times, counters in self.frames:
+            for name, seconds in phase_times.items():
+                phase_samples.setdefault(name, []).append(seconds)
+            for name, count in counters.items():
+                counter_samples.setdefault(name, []).append(count)
+        return {
+            'frames': self.num_frames,
+            'kept': len(self.frames),
+            'frame': summarize_times([frame[0] for frame in self.frames]),
+            'phases': {name: summarize_times(samples) for name, samples in phase_samples.items()},
+            'counters': {name: {'total': sum(samples), 'mean': sum(samples) / len(samples) if len(samples) > 0 else 0.0}
+                         for name, samples in counter_samples.items()}
+        }
+
+    def get_report(self) -> dict:
+        """
+        Returns:
+            dict: The summary of the kept frames, with the time in milliseconds, phase times and counters of each.
+        """
+        report = self.get_summary()
+        report['history'] = [{'time': 1000 * frame_time,
+                              'phases': {name: 1000 * seconds for name, seconds in phase_times.items()},
+                              'counters': counters}
+                             for frame_time, phase_times, counters in self.frames]
+        return report
+
+
+def summarize_times(samples: list[float]) -> dict:
+    """
+    Params:
+        list[float]: Durations in seconds.
+
+    Returns:
+        dict: The mean, median, 95th and 99th percentile (by nearest rank) and maximum durations in milliseconds,
+            which are all 0 if there are no durations.
+    """
+    if len(samples) == 0:
+        return {'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    ordered = sorted(samples)
+    return {
+        'mean': 1000 * sum(ordered) / len(ordered),
+        'p50': 1000 * ordered[max(math.ceil(0.5 * len(ordered)), 1) - 1],
+        'p95': 1000 * ordered[max(math.ceil(0.95 * len(ordered)), 1) - 1],
+        'p99': 1000 * ordered[max(math.ceil(0.99 * len(ordered)), 1) - 1],
+        'max': 1000 * ordered[-1]
+    }
@@ -0,0 +1,239 @@
+import argparse
+import json
+import sys
+import time
+
+from board import Board
+from codes import decode_board
+from const import DIFFICULTIES, MAX_CUSTOM_SIDE
+from generator import plant_no_guess
+
+
+REPLAY_VERSION = 1
+ACTIONS = ('reveal', 'flag', 'chord')
+
+
+class Replay:
+    """
+    An input log of a single game: the seed the mines were planted from and every move made, with its timestamp.
+        Replaying the moves on a Board reset with the same seed reproduces the game exactly.
+    """
+
+    def __init__(self, rows: int, cols: int, num_mines: int, seed: int, difficulty: str = 'custom',
+                 no_guess: bool = False, code: str = ''):
+        """
+        Initializes a Replay object with no moves recorded.
+
+        Params:
+            int: The number of rows in the field.
+            int: The number of columns in the field.
+            int: The number of mines in the field.
+            int: The seed the Board was reset with.
+            str: The difficulty played, under which the time is added to the high scores.
+            bool: True iff mines were planted so that the board can be solved without guessing.
+            str: The board code the mines were loaded from, or '' if they were planted from the seed.
+        """
+        self.rows: int = rows
+        self.cols: int = cols
+        self.num_mines: int = num_mines
+        self.seed: int = seed
+        self.difficulty: str = difficulty
+        self.no_guess: bool = no_guess
+        self.code: str = code
+        self.name: str = ''
+        self.won: bool = False
+        self.time: float | None = None
+        self.events: list[tuple[int, str, int, int]] = []
+
+    def record(self, ticks: int, action: str, pos: tuple[int, int]):
+        """
+        Records a move.
+
+        Params:
+            int: The time of the move in milliseconds, on the same clock as the game timer.
+            str: The action taken ('reveal', 'flag' or 'chord').
+            tuple[int, int]: The tile position within the field.
+        """
+        self.events.append((ticks, action, pos[0], pos[1]))
+
+    def to_dict(self) -> dict:
+        """
+        Returns:
+            dict: The Replay as JSON-serializable data.
+        """
+        return {
+            'version': REPLAY_VERSION,
+            'rows': self.rows,
+            'cols': self.cols,
+            'num_mines': self.num_mines,
+            'seed': self.seed,
+            'difficulty': self.difficulty,
+            'no_guess': self.no_guess,
+            'code': self.code,
+            'name': self.name,
+            'won': self.won,
+            'time': self.time,
+            'events': [list(event) for event in self.events]
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> 'Replay':
+        """
+        Params:
+            dict: Data created by to_dict.
+
+        Returns:
+            Replay: The Replay described by the data.
+
+        Raises:
+            ValueError: If the data is not a valid replay.
+        """
+        try:
+            if data['version'] != REPLAY_VERSION:
+                raise ValueError('Unsupported replay version')
+            replay = Replay(int(data['rows']), int(data['cols']), int(data['num_mines']), int(data['seed']),
+                            str(data['difficulty']), bool(data['no_guess']), str(data['code']))
+            replay.name = str(data['name'])
+            replay.won = bool(data['won'])
+            replay.time = float(data['time']) if data['time'] is not None else None
+            replay.events = [(int(ticks), str(action), int(x), int(y)) for ticks, action, x, y in data['events']]
+        except (KeyError, TypeError, OverflowError):
+            raise ValueError('Invalid replay')
+        return replay
+
+
+def apply_move(board: Board, action: str, pos: tuple[int, int], no_guess: bool = False) -> bool:
+    """
+    Applies a move to a Board the same way the game does.
+
+    Params:
+        Board: The Board being played.
+        str: The action to take ('reveal', 'flag' or 'chord').
+        tuple[int, int]: The tile position within the field.
+        bool: True iff mines should be planted so that the board can be solved without guessing.
+
+    Returns:
+        bool: True iff a safe tile was uncovered or a flag was placed.
+    """
+    if action == 'reveal':
+        if no_guess and not board.started:
+            plant_no_guess(board, pos)
+        return board.reveal(pos)
+    elif action == 'flag':
+        return board.toggle_flag(pos)
+    elif action == 'chord':
+        return board.chord(pos)
+    return False
+
+
+def verify_replay(replay: Replay, ranked: bool = False) -> dict:
+    """
+    Replays the moves of a Replay on a new Board and checks that they produce the recorded outcome and time.
+        The time is measured from the first reveal to the last move, the same way the game timer measures it.
+
+    A Replay of a board loaded from a code is never ranked, as the code lets the player choose where the mines are;
+        the game does not add its time to the high scores either.
+
+    Params:
+        Replay: The Replay to verify.
+        bool: True iff the Replay is being validated for the high scores, so that unranked Replays are invalid.
+
+    Returns:
+        dict: Whether the Replay is valid, whether its time can be ranked, the outcome and time found by replaying it,
+            and the reason it is invalid, or '' if it is valid.
+    """
+    result = {'valid': False, 'ranked': False, 'won': False, 'time': None, 'reason': ''}
+    if not (0 < replay.rows <= MAX_CUSTOM_SIDE and 0 < replay.cols <= MAX_CUSTOM_SIDE
+            and 0 <= replay.num_mines < replay.rows*replay.cols):
+        result['reason'] = 'invalid dimensions'
+        return result
+    if ranked and replay.code != '':
+        result['reason'] = 'board code is unranked'
+        return result
+    difficulty_data = DIFFICULTIES.get(replay.difficulty)
+    if difficulty_data is not None and (replay.rows, replay.cols, replay.num_mines) != \
+            (difficulty_data['rows'], difficulty_data['cols'], difficulty_data['num_mines']):
+        result['reason'] = 'dimensions do not match difficulty'
+        return result
+
+    board = Board(replay.rows, replay.cols, replay.num_mines)
+    board.reset(replay.seed)
+    if replay.code != '':
+        try:
+            rows, cols, mines, first_click = decode_board(replay.code)
+        except ValueError:
+            result['reason'] = 'invalid board code'
+            return result
+        if (rows, cols, len(mines)) != (replay.rows, replay.cols, replay.num_mines):
+            result['reason'] = 'board code does not match dimensions'
+            return result
+        board.load_mines(mines)
+
+    start_ticks = None
+    last_ticks = None
+    for ticks, action, x, y in replay.events:
+        if board.game_over:
+            result['reason'] = 'moves after the game ended'
+            return result
+        if action not in ACTIONS or not board.in_bounds((x, y)):
+            result['reason'] = 'invalid move'
+            return result
+        if last_ticks is not None and ticks < last_ticks:
+            result['reason'] = 'timestamps out of order'
+            return result
+        last_ticks = ticks
+        apply_move(board, action, (x, y), replay.no_guess)
+        # the game timer starts on the first reveal
+        if start_ticks is None and board.first_click is not None:
+            start_ticks = ticks
+
+    result['won'] = board.won
+    if start_ticks is not None:
+        result['time'] = (last_ticks - start_ticks) / 1000
+    if board.won != replay.won:
+        result['reason'] = 'outcome does not match'
+    elif replay.won and result['time'] != replay.time:
+        result['reason'] = 'time does not match'
+    else:
+        result['valid'] = True
+        result['ranked'] = replay.code == ''
+    return result
+
+
+def main():
+    """
+    Verifies replay files from the command line and prints the result of each.
+    """
+    parser = argparse.ArgumentParser(description='Verify Minesweeper replays by replaying them headlessly.')
+    parser.add_argument('paths', nargs='+', help='replay files to verify')
+    parser.add_argument('--ranked', action='store_true',
+                        help='reject replays that cannot be ranked, such as boards loaded from a code')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = {}
+    start = time.perf_counter()
+    for path in args.paths:
+        try:
+            file = open(path, 'r', encoding='utf-8')
+            data = json.loads(file.read())
+            file.close()
+            results[path] = verify_replay(Replay.from_dict(data), args.ranked)
+        except (OSError, ValueError) as e:
+            results[path] = {'valid': False, 'ranked': False, 'won': False, 'time': None, 'reason': str(e)}
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for path, result in results.items():
+            status = 'INVALID (%s)' % result['reason']
+            if result['valid']:
+                status = 'valid' if result['ranked'] else 'valid (unranked)'
+            outcome = 'won in %.3fs' % result['time'] if result['won'] else 'lost'
+            print(f'%s: %s, %s' % (path, status, outcome))
+    print(f'Verified %d replays in %.3fs' % (len(results), elapsed), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+from bisect import bisect_right
+import json
+import os
+
+from const import DIFFICULTIES, NUM_HIGH_SCORES
+
+
+# the number of records appended to the log before it is rewritten with only the kept scores
+COMPACT_INTERVAL = 1000
+
+
+class ScoreStore:
+    """
+    High scores kept in memory as a sorted index per difficulty and saved to an append-only log.
+
+    Each new score is appended to the log as a single JSON line and flushed to disk, so adding a score never
+        rewrites the file. The index only keeps the best scores of each difficulty, so adding a score and
+        reading the top scores take constant time however many games have been played. Once enough records
+        have been appended, the log is compacted by atomically replacing it with the kept scores.
+    """
+
+    def __init__(self, path: str, keep: int = NUM_HIGH_SCORES):
+        """
+        Initializes a ScoreStore object and loads the scores saved in the log, if it exists.
+
+        Params:
+            str: The path of the log file.
+            int: The number of scores kept for each difficulty.
+        """
+        self.path: str = path
+        self.keep: int = keep
+        self.index: dict[str, list[tuple[float, int, str]]] = {}
+        self.sequence: int = 0
+        # the number of records appended since the log was last compacted
+        self.appended: int = 0
+        self.load()
+
+    def load(self):
+        """
+        Rebuilds the index from the log. A record left incomplete by an interrupted write is ignored,
+            and the log is compacted so that the next record starts on a new line.
+        """
+        self.index = {difficulty: [] for difficulty in DIFFICULTIES.keys()}
+        self.sequence = 0
+        self.appended = 0
+        try:
+            file = open(self.path, 'r', encoding='utf-8')
+            text = file.read()
+            file.close()
+        except OSError:
+            return
+
+        for line in text.splitlines():
+            try:
+                record = json.loads(line)
+                self.insert(float(record['time']), record['difficulty'], str(record['name']))
+            except (ValueError, KeyError, TypeError):
+                continue
+            self.appended += 1
+        if len(text) > 0 and not text.endswith('\n') or self.appended >= COMPACT_INTERVAL:
+            self.compact()
+
+    def insert(self, time: float, difficulty: str, name: str) -> int:
+        """
+        Helper function to add a score to the index of its difficulty, dropping the worst score if there are too many.
+
+        Params:
+            float: The time to add.
+            str: The difficulty for which the time was achieved.
+            str: The player name associated with the time.
+
+        Returns:
+            int: The position (0-based indexing) of the score within its difficulty.
+                Returns -1 if the difficulty is unknown or the score is not good enough to be kept.
+        """
+        scores = self.index.get(difficulty)
+        if scores is None:
+            return -1
+        # equal times are ordered by when they were added, so a new score goes after them
+        entry = (time, self.sequence, name)
+        self.sequence += 1
+        position = bisect_right(scores, entry)
+        if position >= self.keep:
+            return -1
+        scores.insert(position, entry)
+        if len(scores) > self.keep:
+            scores.pop()
+        return position
+
+    def add(self, time: float, difficulty: str, name: str) -> int:
+        """
+        Adds a score to the index and appends it to the log.
+
+        Params:
+            float: The time to add.
+            str: The difficulty for which the time was achieved.
+            str: The player name associated with the time.
+
+        Returns:
+            int: The position (0-based indexing) of the score within its difficulty.
+                Returns -1 if the score was not added.
+        """
+        position = self.insert(time, difficulty, name)
+        if position < 0:
+            return -1
+
+        record = json.dumps({'difficulty': difficulty, 'name': name, 'time': time})
+        try:
+            self.append(record + '\n')
+        except OSError:
+            return -1
+        self.appended += 1
+        if self.appended >= COMPACT_INTERVAL:
+            self.compact()
+        return position
+
+    def get(self, difficulty: str, count: int | None = None) -> list[tuple[str, float]]:
+        """
+        Params:
+            str: The difficulty to get scores for.
+            int | None: The maximum number of scores to get. Defaults to every kept score.
+
+        Returns:
+            list[tuple[str, float]]: Name-time pairs in ascending order of time.
+        """
+        scores = self.index.get(difficulty, [])
+        if count is not None:
+            scores = scores[:count]
+        return [(name, time) for time, _, name in scores]
+
+    def get_all(self) -> dict[str, list[tuple[str, float]]]:
+        """
+        Returns:
+            dict[str, list[tuple[str, float]]]: Name-time pairs for each difficulty, in ascending order of time.
+        """
+        return {difficulty: self.get(difficulty) for difficulty in self.index.keys()}
+
+    def append(self, text: str):
+        """
+        Helper function to append text to the log and wait until it is written to disk.
+
+        Params:
+            str: The text to append.
+        """
+        file = open(self.path, mode='a', encoding='utf-8')
+        try:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        finally:
+            file.close()
+
+    def compact(self):
+        """
+        Rewrites the log with only the kept scores. The new log is written to a temporary file first
+            and then moved over the old one, so the log is never left partially written.
+        """
+        entries = []
+        for difficulty, scores in self.index.items():
+            for time, sequence, name in scores:
+                entries.append((sequence, difficulty, name, time))
+        # keep records in the order they were added, so equal times keep their order when loaded
+        entries.sort()
+        text = ''.join(json.dumps({'difficulty': difficulty, 'name': name, 'time': time}) + '\n'
+                       for _, difficulty, name, time in entries)
+
+        temp_path = self.path + '.tmp'
+        try:
+            file = open(temp_path, mode='w', encoding='utf-8')
+            try:
+                try:
+                    file.write(text)
+                    file.flush()
+                    os.fsync(file.fileno())
+                finally:
+                    file.close()
+            except OSError:
+                # a partially written temporary file would otherwise be left in the data folder
+                os.remove(temp_path)
+                raise
+            os.replace(temp_path, self.path)
+            # the rename itself is only durable once the folder is written to disk, which is not possible on Windows
+            if hasattr(os, 'O_DIRECTORY'):
+                folder = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(folder)
+                finally:
+                    os.close(folder)
+        except OSError:
+            return
+        self.appended = 0
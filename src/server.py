@@ -0,0 +1,440 @@
+import argparse
+import asyncio
+from collections import deque
+import json
+import random
+import sys
+import time
+
+from board import Board, ChangeSet
+from broadcast import Broadcast, Spectator
+from const import DIFFICULTIES
+from profiler import summarize_times
+from generator import plant_no_guess
+from replay import ACTIONS, apply_move
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# limits that keep one process responsive with thousands of sessions, since moves run on the event loop
+# (opening and encoding MAX_TILES tiles takes tens of milliseconds)
+MAX_SESSIONS = 10000
+MAX_TILES = 10000
+# no-guess generation runs on worker threads, but still competes for the interpreter with the event loop, and slows
+# down steeply with density (on MAX_NO_GUESS_TILES tiles, typically 0.2 s at expert density but 2 s at 0.25),
+# so it is limited to the density of the hardest difficulty
+MAX_NO_GUESS_TILES = 2500
+MAX_NO_GUESS_DENSITY = max(data['num_mines'] / (data['rows'] * data['cols']) for data in DIFFICULTIES.values())
+MAX_LINE_LENGTH = 4096
+# sessions that send nothing for IDLE_TIMEOUT seconds are closed, checked every IDLE_CHECK_INTERVAL seconds
+IDLE_TIMEOUT = 60.0
+IDLE_CHECK_INTERVAL = 1.0
+# bytes of responses buffered for a client before the session stops reading its requests
+WRITE_BUFFER_LIMIT = 64 * 1024
+# the number of recent requests whose handling times are kept for the server counters
+REQUEST_HISTORY = 10000
+
+
+class Session:
+    """
+    A single client's game, played on its own Board with the same rules as the desktop game.
+
+    The Board's change-sets are collected while a move is applied, so every response carries only the tiles
+        the move changed, and are broadcast to the session's spectators. The session's connection can in turn
+        watch the games of other sessions.
+    """
+
+    def __init__(self, session_id: int, spectator: Spectator, last_active: float):
+        """
+        Initializes a Session object with no game started.
+
+        Params:
+            int: The ID the session's games are watched by.
+            Spectator: The session's connection, for watching other games.
+            float: The event loop time at which the session was opened.
+        """
+        self.id: int = session_id
+        self.board: Board | None = None
+        self.seed: int = 0
+        self.no_guess: bool = False
+        self.moves: int = 0
+        self.changes: list[ChangeSet] = []
+        self.broadcast: Broadcast = Broadcast(session_id)
+        self.spectator: Spectator = spectator
+        self.watching: set[Broadcast] = set()
+        self.last_active: float = last_active
+
+    def on_board_change(self, change_set: ChangeSet):
+        """
+        Subscribed to the Board. Keeps the change-sets of the move being applied.
+
+        Params:
+            ChangeSet: The tiles changed by a Board mutation.
+        """
+        if change_set.kind != 'reset':
+            self.changes.append(change_set)
+
+    def new_game(self, request: dict, max_tiles: int) -> dict:
+        """
+        Starts a new game, replacing any game in progress.
+
+        Params:
+            dict: The request, with either a difficulty or the rows, cols and mines of a custom board,
+                and optionally a seed and whether the board must be solvable without guessing.
+            int: The largest number of tiles allowed on a board.
+
+        Returns:
+            dict: The response, with the ID, dimensions and seed of the new game.
+
+        Raises:
+            ValueError: If the board is invalid or too large.
+        """
+        if 'difficulty' in request:
+            if request['difficulty'] not in DIFFICULTIES:
+                raise ValueError('unknown difficulty')
+            difficulty_data = DIFFICULTIES[request['difficulty']]
+            rows, cols, num_mines = difficulty_data['rows'], difficulty_data['cols'], difficulty_data['num_mines']
+        else:
+            rows, cols, num_mines = int(request['rows']), int(request['cols']), int(request['mines'])
+        if rows < 1 or cols < 1 or rows * cols > max_tiles:
+            raise ValueError('board too large' if rows * cols > max_tiles else 'invalid board size')
+        # the first click is always safe
+        if num_mines < 0 or num_mines >= rows * cols:
+            raise ValueError('invalid number of mines')
+
+        no_guess = bool(request.get('no_guess', False))
+        if no_guess and rows * cols > MAX_NO_GUESS_TILES:
+            raise ValueError('board too large to generate without guessing')
+        if no_guess and num_mines > MAX_NO_GUESS_DENSITY * rows * cols:
+            raise ValueError('too many mines to generate without guessing')
+        seed = request.get('seed')
+        self.seed = int(seed) if seed is not None else random.getrandbits(32)
+        self.no_guess = no_guess
+        if self.board is None or (self.board.rows, self.board.cols, self.board.num_mines) != (rows, cols, num_mines):
+            self.board = Board(rows, cols, num_mines)
+            self.board.subscribe(self.on_board_change)
+            self.broadcast.set_board(self.board)
+        self.board.reset(self.seed)
+        self.moves = 0
+        return {'ok': True, 'game': self.id, 'rows': rows, 'cols': cols, 'mines': num_mines, 'seed': self.seed}
+
+    async def move(self, request: dict) -> dict:
+        """
+        Applies a move to the game in progress. The mines of a no-guess board are planted on a worker thread,
+            so that generating them does not hold up other sessions.
+
+        Params:
+            dict: The request, with the action ('reveal', 'flag' or 'chord') and the x and y position of the tile.
+
+        Returns:
+            dict: The response, with the index and new state of every changed tile,
+                the number of flags remaining and whether the game was won or lost.
+
+        Raises:
+            ValueError: If there is no game in progress or the move is invalid.
+        """
+        board = self.board
+        if board is None:
+            raise ValueError('no game started')
+        if board.game_over:
+            raise ValueError('game over')
+        action = request['action']
+        pos = (int(request['x']), int(request['y']))
+        if action not in ACTIONS or not board.in_bounds(pos):
+            raise ValueError('invalid move')
+
+        if self.no_guess and action == 'reveal' and not board.started:
+            # planting publishes no change-sets, and this session sends no other request until it is answered
+            await asyncio.get_running_loop().run_in_executor(None, plant_no_guess, board, pos)
+        self.changes = []
+        apply_move(board, action, pos, self.no_guess)
+        self.moves += 1
+        states = board.states
+        return {
+            'ok': True,
+            'changes': [[i, states[i]] for change_set in self.changes for i in change_set.indices],
+            'flags': board.flags_remaining,
+            'won': board.won,
+            'lost': board.lost
+        }
+
+    def watch(self, broadcast: Broadcast):
+        """
+        Starts watching the games of another session.
+
+        Params:
+            Broadcast: The broadcast of the session to watch.
+        """
+        self.watching.add(broadcast)
+        broadcast.add(self.spectator)
+
+    def unwatch(self, broadcast: Broadcast):
+        """
+        Stops watching the games of another session.
+
+        Params:
+            Broadcast: The broadcast of the watched session.
+        """
+        self.watching.discard(broadcast)
+        broadcast.remove(self.spectator)
+
+    def close(self):
+        """
+        Stops watching other sessions and ends the broadcast of this session's games.
+        """
+        for broadcast in self.watching:
+            broadcast.remove(self.spectator)
+        self.watching = set()
+        self.broadcast.close()
+
+
+class GameServer:
+    """
+    An asyncio server hosting independent Minesweeper sessions over TCP, one per connection.
+
+    Clients send one JSON object per line and receive one JSON object per line in reply, in order:
+        {"op": "new", "difficulty": "expert"} or {"op": "new", "rows": 16, "cols": 30, "mines": 99} starts a game,
+        {"op": "move", "action": "reveal", "x": 3, "y": 4} makes a move and {"op": "stats"} returns the server counters.
+        Failed requests are answered with {"ok": false, "error": "..."}.
+
+    {"op": "watch", "game": 7} makes the connection a spectator of session 7's games until {"op": "unwatch", "game": 7}.
+        Spectators are sent frames, tagged with "frame" instead of "ok", as the game changes: a snapshot of every tile,
+        then deltas of the changed tiles (see broadcast.py), and an end frame when the session closes. The first
+        snapshot is sent just before the reply to the watch request. Spectators are not evicted while they are watching.
+
+    Each session reads its next request only after its last response has been handed to the transport and the
+        transport's buffer has drained below WRITE_BUFFER_LIMIT, so a client that stops reading stops being served
+        instead of growing the server's memory.
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, max_sessions: int = MAX_SESSIONS,
+                 idle_timeout: float = IDLE_TIMEOUT, max_tiles: int = MAX_TILES):
+        """
+        Initializes a GameServer object without starting it.
+
+        Params:
+            str: The host to listen on.
+            int: The port to listen on, or 0 to choose a free port.
+            int: The largest number of sessions open at once. Further connections are refused with an error.
+            float: The number of seconds without a request after which a session is closed.
+            int: The largest number of tiles allowed on a board.
+        """
+        self.host: str = host
+        self.port: int = port
+        self.max_sessions: int = max_sessions
+        self.idle_timeout: float = idle_timeout
+        self.max_tiles: int = max_tiles
+        self.server: asyncio.Server | None = None
+        self.sweeper: asyncio.Task | None = None
+        self.sessions: dict[Session, asyncio.StreamWriter] = {}
+        self.session_ids: dict[int, Session] = {}
+        self.next_session_id: int = 1
+        self.handlers: set[asyncio.Task] = set()
+        self.request_times: deque[float] = deque(maxlen=REQUEST_HISTORY)
+        self.sessions_opened: int = 0
+        self.sessions_refused: int = 0
+        self.sessions_evicted: int = 0
+        self.games: int = 0
+        self.moves: int = 0
+        self.errors: int = 0
+
+    async def start(self) -> int:
+        """
+        Starts listening and evicting idle sessions.
+
+        Returns:
+            int: The port listened on.
+        """
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port, limit=MAX_LINE_LENGTH)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.sweeper = asyncio.create_task(self.evict_idle())
+        return self.port
+
+    async def close(self):
+        """
+        Stops listening and closes every session.
+        """
+        if self.sweeper is not None:
+            self.sweeper.cancel()
+        if self.server is not None:
+            self.server.close()
+        for writer in list(self.sessions.values()):
+            writer.transport.abort()
+        # let every session see its connection end before the event loop stops
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            dict: The number of sessions open, opened, refused and evicted, the number of sessions being watched
+                and of spectators watching them, the number of games, moves and failed requests served,
+                and the time spent handling recent requests in milliseconds.
+        """
+        broadcasts = [session.broadcast for session in self.sessions if len(session.broadcast.spectators) > 0]
+        return {
+            'sessions': len(self.sessions),
+            'sessions_opened': self.sessions_opened,
+            'sessions_refused': self.sessions_refused,
+            'sessions_evicted': self.sessions_evicted,
+            'watched': len(broadcasts),
+            'spectators': sum(len(broadcast.spectators) for broadcast in broadcasts),
+            'games': self.games,
+            'moves': self.moves,
+            'errors': self.errors,
+            'request_time': summarize_times(list(self.request_times))
+        }
+
+    async def evict_idle(self):
+        """
+        Closes sessions that have sent no request for longer than the idle timeout and are not watching a game,
+            including sessions whose responses are waiting for the client to read them.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(min(IDLE_CHECK_INTERVAL, self.idle_timeout))
+            deadline = loop.time() - self.idle_timeout
+            for session, writer in list(self.sessions.items()):
+                if session.last_active < deadline and len(session.watching) == 0:
+                    self.sessions_evicted += 1
+                    # aborting discards buffered responses, so a session blocked on a full buffer is released too
+                    writer.transport.abort()
+
+    async def handle_request(self, session: Session, line: bytes) -> dict:
+        """
+        Params:
+            Session: The session the request was sent on.
+            bytes: A line sent by the client.
+
+        Returns:
+            dict: The response to the request.
+        """
+        try:
+            request = json.loads(line)
+            op = request['op']
+            if op == 'move':
+                response = await session.move(request)
+                self.moves += 1
+                return response
+            if op == 'new':
+                response = session.new_game(request, self.max_tiles)
+                self.games += 1
+                return response
+            if op == 'watch' or op == 'unwatch':
+                target = self.session_ids.get(request['game'])
+                if target is None or target is session:
+                    raise ValueError('unknown game')
+                if op == 'watch':
+                    session.watch(target.broadcast)
+                else:
+                    session.unwatch(target.broadcast)
+                return {'ok': True, 'game': target.id}
+            if op == 'stats':
+                return {'ok': True, 'stats': self.get_stats()}
+            raise ValueError('unknown op')
+        except (KeyError, TypeError, ValueError, OverflowError) as e:
+            self.errors += 1
+            # JSON, type and overflow errors have messages about the request's encoding rather than the game
+            message = str(e) if type(e) is ValueError else 'invalid request'
+            return {'ok': False, 'error': message}
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serves a single connection as a session until the client disconnects or the session is evicted.
+
+        Params:
+            StreamReader: The connection's incoming stream.
+            StreamWriter: The connection's outgoing stream.
+        """
+        if len(self.sessions) >= self.max_sessions:
+            self.sessions_refused += 1
+            writer.write(encode_message({'ok': False, 'error': 'server full'}))
+            writer.close()
+            return
+
+        loop = asyncio.get_running_loop()
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_LIMIT)
+        session = Session(self.next_session_id, Spectator(writer), loop.time())
+        self.next_session_id += 1
+        handler = asyncio.current_task()
+        self.sessions[session] = writer
+        self.session_ids[session.id] = session
+        self.handlers.add(handler)
+        self.sessions_opened += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # the line exceeded MAX_LINE_LENGTH, so the rest of the stream cannot be framed
+                    self.errors += 1
+                    writer.write(encode_message({'ok': False, 'error': 'request too long'}))
+                    break
+                if not line:
+                    break
+                session.last_active = loop.time()
+                start = time.perf_counter()
+                message = encode_message(await self.handle_request(session, line))
+                self.request_times.append(time.perf_counter() - start)
+                writer.write(message)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            session.close()
+            del self.sessions[session]
+            del self.session_ids[session.id]
+            self.handlers.discard(handler)
+            writer.close()
+
+
+def encode_message(message: dict) -> bytes:
+    """
+    Params:
+        dict: A request or response.
+
+    Returns:
+        bytes: The message as a line of compact JSON.
+    """
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+
+async def serve(server: GameServer):
+    """
+    Runs a GameServer until the task is cancelled.
+
+    Params:
+        GameServer: The server to run.
+    """
+    port = await server.start()
+    print(f'Serving Minesweeper sessions on %s:%d' % (server.host, port), file=sys.stderr)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main():
+    """
+    Runs the game server from the command line until interrupted, then prints its counters.
+    """
+    parser = argparse.ArgumentParser(description='Host Minesweeper sessions over TCP with one JSON message per line.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--max-sessions', type=int, default=MAX_SESSIONS, help='largest number of open sessions')
+    parser.add_argument('--idle-timeout', type=float, default=IDLE_TIMEOUT,
+                        help='seconds without a request before a session is closed')
+    parser.add_argument('--max-tiles', type=int, default=MAX_TILES, help='largest number of tiles on a board')
+    args = parser.parse_args()
+
+    server = GameServer(args.host, args.port, args.max_sessions, args.idle_timeout, args.max_tiles)
+    try:
+        asyncio.run(serve(server))
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(server.get_stats()), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
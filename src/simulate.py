@@ -0,0 +1,315 @@
+import argparse
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+import json
+import os
+import random
+import sys
+
+from board import Board
+from const import DIFFICULTIES
+from enums import TileStates
+from replay import apply_move
+from solver import solve
+
+
+def random_strategy(board: Board, rng: random.Random) -> list[tuple[str, tuple[int, int]]]:
+    """
+    Reveals a random hidden tile.
+
+    Params:
+        Board: The Board being played.
+        Random: The random number generator of the worker.
+
+    Returns:
+        list[tuple[str, tuple[int, int]]]: The moves to make, as actions ('reveal', 'flag' or 'chord')
+            and the tile positions to apply them to.
+    """
+    hidden = [i for i, state in enumerate(board.states) if state == TileStates.HIDDEN]
+    return [('reveal', board.position(rng.choice(hidden)))]
+
+
+def simple_strategy(board: Board, rng: random.Random) -> list[tuple[str, tuple[int, int]]]:
+    """
+    Flags or chords around any number whose remaining neighbors are certain, and otherwise reveals a random hidden tile.
+
+    Params:
+        Board: The Board being played.
+        Random: The random number generator of the worker.
+
+    Returns:
+        list[tuple[str, tuple[int, int]]]: The moves to make, as actions ('reveal', 'flag' or 'chord')
+            and the tile positions to apply them to.
+    """
+    for i, state in enumerate(board.states):
+        if state > TileStates.UNCOVERED + 8 or state == TileStates.UNCOVERED:
+            continue
+        hidden = []
+        flag_count = 0
+        for j in board.get_neighbor_indices(i):
+            if board.states[j] == TileStates.HIDDEN:
+                hidden.append(j)
+            elif board.states[j] == TileStates.FLAG:
+                flag_count += 1
+        if len(hidden) > 0:
+            if flag_count == state - TileStates.UNCOVERED:
+                return [('chord', board.position(i))]
+            if flag_count + len(hidden) == state - TileStates.UNCOVERED:
+                return [('flag', board.position(hidden[0]))]
+    return random_strategy(board, rng)
+
+
+def solver_strategy(board: Board, rng: random.Random) -> list[tuple[str, tuple[int, int]]]:
+    """
+    Reveals every tile the solver proves safe, or the tile with the lowest mine probability if there are none.
+
+    Params:
+        Board: The Board being played.
+        Random: The random number generator of the worker.
+
+    Returns:
+        list[tuple[str, tuple[int, int]]]: The moves to make, as actions ('reveal', 'flag' or 'chord')
+            and the tile positions to apply them to.
+    """
+    if not board.started:
+        return random_strategy(board, rng)
+    result = solve(board)
+    if len(result.safe) > 0:
+        return [('reveal', board.position(i)) for i in sorted(result.safe)]
+    return [('reveal', board.position(result.best_guess()))]
+
+
+# strategies selectable from the command line, each called with the Board and a random number generator
+STRATEGIES = {
+    'random': random_strategy,
+    'simple': simple_strategy,
+    'solver': solver_strategy
+}
+
+
+class Stats:
+    """
+    Aggregated results of many simulated games. Results are kept as counts and histograms,
+    so memory use does not grow with the number of games.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty Stats object.
+        """
+        self.games: int = 0
+        self.wins: int = 0
+        self.moves: int = 0
+        self.openings: Counter = Counter()
+        self.bbbv: Counter = Counter()
+        self.bbbv_wins: Counter = Counter()
+
+    def add_game(self, won: bool, moves: int, opening: int, bbbv: int):
+        """
+        Records the result of a single game.
+
+        Params:
+            bool: True iff the game was won.
+            int: The number of moves made.
+            int: The number of tiles uncovered by the first click.
+            int: The 3BV of the board.
+        """
+        self.games += 1
+        self.wins += won
+        self.moves += moves
+        self.openings[opening] += 1
+        self.bbbv[bbbv] += 1
+        if won:
+            self.bbbv_wins[bbbv] += 1
+
+    def merge(self, other: 'Stats'):
+        """
+        Adds the results of another Stats object to this one.
+
+        Params:
+            Stats: The results to add.
+        """
+        self.games += other.games
+        self.wins += other.wins
+        self.moves += other.moves
+        self.openings.update(other.openings)
+        self.bbbv.update(other.bbbv)
+        self.bbbv_wins.update(other.bbbv_wins)
+
+    def summary(self) -> dict:
+        """
+        Returns:
+            dict: Win rate, averages and percentiles of the recorded games.
+        """
+        return {
+            'games': self.games,
+            'wins': self.wins,
+            'win_rate': self.wins / self.games if self.games > 0 else 0.0,
+            'mean_moves': self.moves / self.games if self.games > 0 else 0.0,
+            'opening': histogram_summary(self.openings),
+            '3bv': histogram_summary(self.bbbv),
+            '3bv_won': histogram_summary(self.bbbv_wins)
+        }
+
+
+def histogram_summary(histogram: Counter) -> dict:
+    """
+    Helper function to compute the mean and percentiles of a histogram.
+
+    Params:
+        Counter: Counts of each observed value.
+
+    Returns:
+        dict: The mean, minimum, median, 90th and 99th percentile and maximum.
+    """
+    total = sum(histogram.values())
+    if total == 0:
+        return {}
+    values = sorted(histogram.items())
+    summary = {
+        'mean': sum(value*count for value, count in values) / total,
+        'min': values[0][0],
+        'max': values[-1][0]
+    }
+    for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)):
+        target = fraction * total
+        seen = 0
+        for value, count in values:
+            seen += count
+            if seen >= target:
+                summary[name] = value
+                break
+    return summary
+
+
+def play_game(board: Board, strategy, rng: random.Random, no_guess: bool = False) -> tuple[bool, int, int]:
+    """
+    Plays a single game on a reset Board until it is won or lost.
+
+    Params:
+        Board: The Board to play on.
+        Any: The strategy function that chooses the next moves.
+        Random: The random number generator passed to the strategy.
+        bool: True iff mines should be planted so that the board can be solved without guessing.
+
+    Returns:
+        tuple[bool, int, int]: Whether the game was won, the number of moves made
+            and the number of tiles uncovered by the first click.
+    """
+    moves = 0
+    opening = 0
+    while not board.game_over:
+        for action, pos in strategy(board, rng):
+            if board.game_over:
+                break
+            apply_move(board, action, pos, no_guess)
+            moves += 1
+            if moves == 1:
+                opening = board.uncovered_tiles
+    return (board.won, moves, opening)
+
+
+def run_chunk(difficulty: str, strategy_name: str, seed: int, chunk_index: int, num_games: int,
+              no_guess: bool = False) -> Stats:
+    """
+    Plays a chunk of games in a worker process. The chunk is seeded from the base seed and its own index,
+        so results do not depend on which worker runs it or in which order.
+
+    Params:
+        str: The difficulty to play.
+        str: The name of the strategy in STRATEGIES.
+        int: The base seed of the simulation.
+        int: The index of the chunk within the simulation.
+        int: The number of games to play.
+        bool: True iff boards should be generated so that they can be solved without guessing.
+
+    Returns:
+        Stats: The aggregated results of the chunk.
+    """
+    rng = random.Random(f'{seed}-{difficulty}-{chunk_index}')
+    difficulty_data = DIFFICULTIES[difficulty]
+    board = Board(difficulty_data['rows'], difficulty_data['cols'], difficulty_data['num_mines'], rng)
+    strategy = STRATEGIES[strategy_name]
+    stats = Stats()
+    for i in range(num_games):
+        board.reset()
+        won, moves, opening = play_game(board, strategy, rng, no_guess)
+        stats.add_game(won, moves, opening, board.get_3bv())
+    return stats
+
+
+def simulate(difficulty: str, strategy_name: str, num_games: int, seed: int, chunk_size: int,
+             executor: ProcessPoolExecutor, max_pending: int, progress=None, no_guess: bool = False) -> Stats:
+    """
+    Distributes games across a process pool in chunks and merges their results as they complete.
+        At most max_pending chunks are queued at a time, so memory use does not grow with the number of games.
+
+    Params:
+        str: The difficulty to play.
+        str: The name of the strategy in STRATEGIES.
+        int: The total number of games to play.
+        int: The base seed of the simulation.
+        int: The number of games per chunk.
+        ProcessPoolExecutor: The pool to run chunks on.
+        int: The maximum number of chunks submitted but not yet merged.
+        Any | None: A function called with the merged Stats after each chunk completes.
+        bool: True iff boards should be generated so that they can be solved without guessing.
+
+    Returns:
+        Stats: The aggregated results of all games.
+    """
+    total = Stats()
+    pending: set[Future] = set()
+    chunk_index = 0
+    submitted = 0
+    while submitted < num_games or len(pending) > 0:
+        while submitted < num_games and len(pending) < max_pending:
+            size = min(chunk_size, num_games - submitted)
+            pending.add(executor.submit(run_chunk, difficulty, strategy_name, seed, chunk_index, size, no_guess))
+            submitted += size
+            chunk_index += 1
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            total.merge(future.result())
+        if progress is not None:
+            progress(total)
+    return total
+
+
+def main():
+    """
+    Runs the simulator from the command line and prints a summary for each difficulty.
+    """
+    parser = argparse.ArgumentParser(description='Play many Minesweeper games headlessly and report statistics.')
+    parser.add_argument('-d', '--difficulty', choices=list(DIFFICULTIES.keys()) + ['all'], default='all')
+    parser.add_argument('-n', '--games', type=int, default=10000, help='number of games per difficulty')
+    parser.add_argument('-s', '--strategy', choices=STRATEGIES.keys(), default='simple')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count())
+    parser.add_argument('-c', '--chunk-size', type=int, default=500)
+    parser.add_argument('--no-guess', action='store_true', help='generate boards that can be solved without guessing')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    difficulties = list(DIFFICULTIES.keys()) if args.difficulty == 'all' else [args.difficulty]
+    results = {}
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for difficulty in difficulties:
+            def progress(stats: Stats):
+                print(f'\r%s: %d/%d games' % (difficulty, stats.games, args.games), end='', file=sys.stderr)
+            stats = simulate(difficulty, args.strategy, args.games, args.seed, args.chunk_size,
+                             executor, 2*args.workers, progress, args.no_guess)
+            print(file=sys.stderr)
+            results[difficulty] = stats.summary()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for difficulty, summary in results.items():
+            print(f'%s: %.2f%% won over %d games, mean opening %.1f tiles, mean 3BV %.1f'
+                  % (difficulty.capitalize(), 100*summary['win_rate'], summary['games'],
+                     summary['opening'].get('mean', 0.0), summary['3bv'].get('mean', 0.0)))
+
+
+if __name__ == '__main__':
+    main()
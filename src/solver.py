@@ -0,0 +1,411 @@
+import math
+
+from board import Board
+from enums import TileStates
+
+
+# limits on enumerating one component before falling back to an estimate
+MAX_ENUMERATION_NODES = 200000
+MAX_ENUMERATION_VARS = 400
+
+
+class SolverResult:
+    """
+    The result of analysing a board position: tiles that are certainly safe or certainly mines,
+    and the estimated mine probability of every other hidden tile.
+    """
+
+    def __init__(self, safe: set[int], mines: set[int], probabilities: dict[int, float], interior_probability: float):
+        """
+        Initializes a SolverResult object.
+
+        Params:
+            set[int]: Indices of hidden tiles that are provably safe.
+            set[int]: Indices of hidden tiles that are provably mines.
+            dict[int, float]: The mine probability of every hidden, unflagged tile.
+            float: The mine probability shared by hidden tiles not adjacent to any uncovered number.
+        """
+        self.safe: set[int] = safe
+        self.mines: set[int] = mines
+        self.probabilities: dict[int, float] = probabilities
+        self.interior_probability: float = interior_probability
+
+    def best_guess(self) -> int | None:
+        """
+        Returns:
+            int | None: The index of a hidden tile with the lowest mine probability, or None if there are none.
+        """
+        if len(self.probabilities) == 0:
+            return None
+        return min(self.probabilities, key=self.probabilities.get)
+
+
+def solve(board: Board, trust_flags: bool = True,
+          cache: dict[frozenset, tuple[list[int], dict[int, int], dict[int, list[int]]]] | None = None) -> SolverResult:
+    """
+    Analyses the visible state of a Board: uncovered numbers, flags and the total number of mines.
+        The positions of unrevealed mines are never read.
+
+    Tiles are first deduced with single and pairwise constraint rules. The remaining frontier is split
+        into independent components whose mine configurations are enumerated, and configurations are weighted
+        by the number of ways to place the remaining mines among tiles away from the frontier.
+
+    Params:
+        Board: The Board to analyse.
+        bool: True iff flagged tiles should be treated as known mines rather than as hidden tiles.
+        dict[frozenset, tuple] | None: Enumerated components by their constraints, kept between calls on the same
+            game so that only components whose constraints changed since an earlier call are enumerated again.
+
+    Returns:
+        SolverResult: The provably safe tiles, provably mine tiles and mine probabilities.
+    """
+    states = board.states
+    hidden = int(TileStates.HIDDEN)
+    flag = int(TileStates.FLAG)
+    max_number = int(TileStates.UNCOVERED) + 8
+    unknown = set()
+    known_mines = set()
+    numbers = []
+    for i, state in enumerate(states):
+        if state <= max_number:
+            numbers.append(i)
+        elif state == hidden or (state == flag and not trust_flags):
+            unknown.add(i)
+        elif state == flag:
+            known_mines.add(i)
+
+    # only numbers next to unknown tiles give constraints, so find them from whichever side is smaller
+    if len(unknown) < len(numbers):
+        numbers = {j for i in unknown for j in board.get_neighbor_indices(i) if states[j] <= max_number}
+
+    # build one constraint per uncovered number: its unknown neighbors contain exactly `count` mines
+    constraints = []
+    if board.started:
+        for i in numbers:
+            variables = set()
+            count = states[i] - TileStates.UNCOVERED
+            for j in board.get_neighbor_indices(i):
+                if j in unknown:
+                    variables.add(j)
+                elif j in known_mines:
+                    count -= 1
+            if len(variables) > 0:
+                constraints.append((frozenset(variables), count))
+
+    safe, mines, constraints = propagate(constraints)
+    frontier = set()
+    for variables, count in constraints:
+        frontier |= variables
+    interior = unknown - frontier - safe - mines
+    mines_left = board.num_mines - len(known_mines) - len(mines)
+
+    # enumerate each independent component, recording solution counts and per-tile mine counts by mine total
+    components = []
+    for component_vars, component_constraints in split_components(frontier, constraints):
+        if cache is None:
+            components.append(enumerate_component(component_vars, component_constraints))
+            continue
+        key = frozenset(component_constraints)
+        if key not in cache:
+            cache[key] = enumerate_component(component_vars, component_constraints)
+        components.append(cache[key])
+
+    probabilities, interior_probability = combine(components, len(interior), mines_left)
+    for i in interior:
+        probabilities[i] = interior_probability
+    for i in safe:
+        probabilities[i] = 0.0
+    for i in mines:
+        probabilities[i] = 1.0
+    for i, probability in probabilities.items():
+        if probability == 0.0:
+            safe.add(i)
+        elif probability == 1.0:
+            mines.add(i)
+    return SolverResult(safe, mines, probabilities, interior_probability)
+
+
+def propagate(constraints: list[tuple[frozenset, int]]) -> tuple[set[int], set[int], list[tuple[frozenset, int]]]:
+    """
+    Deduces safe tiles and mines from constraints whose count is 0 or equal to their size,
+        and from pairs of constraints where one is a subset of the other, until nothing changes.
+
+    Params:
+        list[tuple[frozenset, int]]: Constraints as (tile indices, number of mines among them).
+
+    Returns:
+        tuple[set[int], set[int], list[tuple[frozenset, int]]]: Deduced safe tiles, deduced mines
+            and the remaining constraints over undetermined tiles.
+    """
+    safe = set()
+    mines = set()
+    pending = set(constraints)
+    changed = True
+    while changed:
+        changed = False
+        reduced = set()
+        for variables, count in pending:
+            count -= len(variables & mines)
+            variables = variables - safe - mines
+            if len(variables) == 0:
+                continue
+            if count == 0:
+                safe |= variables
+                changed = True
+            elif count == len(variables):
+                mines |= variables
+                changed = True
+            else:
+                reduced.add((variables, count))
+        pending = reduced
+        if changed:
+            continue
+
+        # subset rule: if A is contained in B, B - A holds count(B) - count(A) mines
+        by_tile: dict[int, list[tuple[frozenset, int]]] = {}
+        for constraint in pending:
+            for i in constraint[0]:
+                by_tile.setdefault(i, []).append(constraint)
+        derived = set()
+        for small in pending:
+            for large in by_tile[next(iter(small[0]))]:
+                if large is small or len(large[0]) <= len(small[0]) or not small[0] < large[0]:
+                    continue
+                difference = (large[0] - small[0], large[1] - small[1])
+                if difference not in pending:
+                    derived.add(difference)
+        if len(derived) > 0:
+            pending |= derived
+            changed = True
+    return (safe, mines, list(pending))
+
+
+def split_components(frontier: set[int], constraints: list[tuple[frozenset, int]]) \
+        -> list[tuple[list[int], list[tuple[frozenset, int]]]]:
+    """
+    Splits frontier tiles into groups that share no constraints, so that each can be enumerated separately.
+
+    Params:
+        set[int]: The frontier tile indices.
+        list[tuple[frozenset, int]]: Constraints over the frontier tiles.
+
+    Returns:
+        list[tuple[list[int], list[tuple[frozenset, int]]]]: The tiles of each component, ordered so that
+            neighboring tiles are adjacent, and the constraints over them.
+    """
+    by_tile: dict[int, list[int]] = {}
+    for c, (variables, count) in enumerate(constraints):
+        for i in variables:
+            by_tile.setdefault(i, []).append(c)
+
+    components = []
+    seen_tiles = set()
+    for start in frontier:
+        if start in seen_tiles:
+            continue
+        seen_tiles.add(start)
+        ordered = [start]
+        constraint_ids = set()
+        # breadth first order keeps constraints tight during enumeration
+        for i in ordered:
+            for c in by_tile[i]:
+                if c in constraint_ids:
+                    continue
+                constraint_ids.add(c)
+                for j in constraints[c][0]:
+                    if j not in seen_tiles:
+                        seen_tiles.add(j)
+                        ordered.append(j)
+        components.append((ordered, [constraints[c] for c in sorted(constraint_ids)]))
+    return components
+
+
+def enumerate_component(variables: list[int], constraints: list[tuple[frozenset, int]]) \
+        -> tuple[list[int], dict[int, int], dict[int, list[int]]]:
+    """
+    Counts every assignment of mines to a component's tiles that satisfies its constraints.
+
+    Params:
+        list[int]: The tile indices of the component, in search order.
+        list[tuple[frozenset, int]]: The constraints over the component.
+
+    Returns:
+        tuple[list[int], dict[int, int], dict[int, list[int]]]: The tile indices, the number of solutions
+            for each total number of mines, and the number of those solutions in which each tile is a mine.
+    """
+    num_vars = len(variables)
+    if num_vars > MAX_ENUMERATION_VARS:
+        return estimate_component(variables, constraints)
+    position = {i: n for n, i in enumerate(variables)}
+    tile_constraints = [[] for i in range(num_vars)]
+    needed = []
+    remaining = []
+    for c, (tiles, count) in enumerate(constraints):
+        needed.append(count)
+        remaining.append(len(tiles))
+        for i in tiles:
+            tile_constraints[position[i]].append(c)
+
+    # a constraint is active at step n if it has tiles on both sides of n; only active constraints
+    # carry state into the rest of the search, so equal states are solved once and memoized
+    active = [[] for i in range(num_vars + 1)]
+    for c, (tiles, count) in enumerate(constraints):
+        positions = [position[i] for i in tiles]
+        for n in range(min(positions) + 1, max(positions) + 1):
+            active[n].append(c)
+
+    memo: dict[tuple, tuple[dict[int, int], dict[int, list[int]]]] = {}
+    nodes = 0
+
+    def search(n: int) -> tuple[dict[int, int], dict[int, list[int]]] | None:
+        """
+        Returns the number of completions of tiles n onwards for each number of mines among them,
+            and how many of those completions make each of those tiles a mine.
+        """
+        nonlocal nodes
+        if n == num_vars:
+            return ({0: 1}, {0: []})
+        key = (n, tuple(needed[c] for c in active[n]))
+        if key in memo:
+            return memo[key]
+        nodes += 1
+        if nodes > MAX_ENUMERATION_NODES:
+            return None
+
+        solutions = {}
+        mine_counts = {}
+        for value in (0, 1):
+            valid = True
+            for c in tile_constraints[n]:
+                needed[c] -= value
+                remaining[c] -= 1
+                if needed[c] < 0 or needed[c] > remaining[c]:
+                    valid = False
+            result = search(n + 1) if valid else ({}, {})
+            for c in tile_constraints[n]:
+                needed[c] += value
+                remaining[c] += 1
+            if result is None:
+                return None
+            for k, count in result[0].items():
+                total = k + value
+                solutions[total] = solutions.get(total, 0) + count
+                counts = mine_counts.get(total)
+                if counts is None:
+                    mine_counts[total] = [value*count] + result[1][k]
+                else:
+                    counts[0] += value*count
+                    for v, tile_count in enumerate(result[1][k]):
+                        counts[v + 1] += tile_count
+        memo[key] = (solutions, mine_counts)
+        return memo[key]
+
+    result = search(0)
+    if result is None:
+        return estimate_component(variables, constraints)
+    solutions, mine_counts = result
+    return (variables, solutions, mine_counts)
+
+
+def estimate_component(variables: list[int], constraints: list[tuple[frozenset, int]]) \
+        -> tuple[list[int], dict[int, int], dict[int, list[int]]]:
+    """
+    Approximates a component that is too large to enumerate, giving each tile the average mine density
+        of its constraints. No tile of the component is reported as certain.
+
+    Params:
+        list[int]: The tile indices of the component.
+        list[tuple[frozenset, int]]: The constraints over the component.
+
+    Returns:
+        tuple[list[int], dict[int, int], dict[int, list[int]]]: The component in the format of enumerate_component,
+            as a single weighted pseudo-solution.
+    """
+    densities: dict[int, list[float]] = {}
+    for tiles, count in constraints:
+        for i in tiles:
+            densities.setdefault(i, []).append(count / len(tiles))
+    scale = 1000000
+    counts = []
+    for i in variables:
+        probability = sum(densities[i]) / len(densities[i])
+        counts.append(min(max(round(probability*scale), 1), scale - 1))
+    expected = round(sum(counts) / scale)
+    return (variables, {expected: scale}, {expected: counts})
+
+
+def log_comb(n: int, k: int) -> float:
+    """
+    Helper function to compute the natural logarithm of n choose k.
+    """
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+
+def combine(components: list[tuple[list[int], dict[int, int], dict[int, list[int]]]], num_interior: int,
+            mines_left: int) -> tuple[dict[int, float], float]:
+    """
+    Combines independent components with the global mine count to find exact mine probabilities.
+
+    Params:
+        list: The enumerated components.
+        int: The number of hidden tiles not adjacent to any constraint.
+        int: The number of mines not yet accounted for.
+
+    Returns:
+        tuple[dict[int, float], float]: The mine probability of each frontier tile and of each interior tile.
+    """
+    def convolve(a: dict[int, float], b: dict[int, int]) -> dict[int, float]:
+        result = {}
+        for k1, w1 in a.items():
+            for k2, w2 in b.items():
+                if k1 + k2 <= mines_left:
+                    result[k1 + k2] = result.get(k1 + k2, 0.0) + w1*w2
+        return result
+
+    # weight of placing the remaining mines among interior tiles, relative to the largest such weight
+    def interior_weights(totals: dict[int, float]) -> dict[int, float]:
+        logs = {k: log_comb(num_interior, mines_left - k) for k in totals if 0 <= mines_left - k <= num_interior}
+        if len(logs) == 0:
+            return {}
+        top = max(logs.values())
+        return {k: math.exp(value - top) for k, value in logs.items()}
+
+    totals = {0: 1.0}
+    for component in components:
+        totals = convolve(totals, component[1])
+    weights = interior_weights(totals)
+    z = sum(totals[k]*w for k, w in weights.items())
+    if z == 0.0:
+        # the visible state is inconsistent (e.g. a wrong flag), so fall back to uniform probabilities
+        total_tiles = num_interior + sum(len(component[0]) for component in components)
+        uniform = min(max(mines_left / total_tiles, 0.0), 1.0) if total_tiles > 0 else 0.0
+        probabilities = {i: uniform for component in components for i in component[0]}
+        return (probabilities, uniform)
+
+    interior_probability = 0.0
+    if num_interior > 0:
+        interior_probability = sum(totals[k]*w*(mines_left - k)/num_interior for k, w in weights.items()) / z
+
+    probabilities = {}
+    for c, (variables, solutions, mine_counts) in enumerate(components):
+        others = {0: 1.0}
+        for d, component in enumerate(components):
+            if d != c:
+                others = convolve(others, component[1])
+        tile_weights = [0.0]*len(variables)
+        for k, counts in mine_counts.items():
+            # total weight of configurations in which this component holds k mines
+            factor = sum(w_other*weights.get(k + k_other, 0.0) for k_other, w_other in others.items())
+            if factor == 0.0:
+                continue
+            for v, count in enumerate(counts):
+                tile_weights[v] += count*factor
+        # certainty is decided exactly from solution counts so rounding cannot hide a safe tile
+        feasible = [k for k in mine_counts if any(k + k_other in weights for k_other in others)]
+        for v, i in enumerate(variables):
+            probabilities[i] = tile_weights[v] / z
+            if all(mine_counts[k][v] == 0 for k in feasible):
+                probabilities[i] = 0.0
+            elif all(mine_counts[k][v] == solutions[k] for k in feasible):
+                probabilities[i] = 1.0
+    return (probabilities, interior_probability)
@@ -0,0 +1,168 @@
+import math
+import time
+
+# sqlite3 is missing from some minimal Python builds, in which case statistics are not recorded
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+
+# the number of game records held in memory before they are inserted in a single transaction
+BATCH_SIZE = 64
+
+# queries are kept as constants so that sqlite3 reuses their prepared statements between calls
+CREATE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS games (
+        id INTEGER PRIMARY KEY,
+        played_at REAL NOT NULL,
+        difficulty TEXT NOT NULL,
+        name TEXT NOT NULL,
+        seed INTEGER,
+        won INTEGER NOT NULL,
+        time REAL NOT NULL,
+        bbbv INTEGER NOT NULL,
+        clicks INTEGER NOT NULL,
+        efficiency REAL
+    )
+'''
+# won is part of the index so that win counts and ordered winning times are both read from it
+CREATE_INDEX = 'CREATE INDEX IF NOT EXISTS games_difficulty_time ON games (difficulty, won, time)'
+CREATE_PLAYER_INDEX = 'CREATE INDEX IF NOT EXISTS games_player_time ON games (difficulty, name, won, time)'
+INSERT_GAME = '''
+    INSERT INTO games (played_at, difficulty, name, seed, won, time, bbbv, clicks, efficiency)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+SELECT_COUNTS = 'SELECT COUNT(*), COALESCE(SUM(won), 0) FROM games WHERE difficulty = ?'
+SELECT_BEST = 'SELECT MIN(time) FROM games WHERE difficulty = ? AND won = 1'
+SELECT_PERSONAL_BEST = 'SELECT MIN(time) FROM games WHERE difficulty = ? AND won = 1 AND name = ?'
+SELECT_NTH_TIME = 'SELECT time FROM games WHERE difficulty = ? AND won = 1 ORDER BY time LIMIT 1 OFFSET ?'
+
+
+def get_difficulty_key(difficulty: str, rows: int, cols: int, num_mines: int) -> str:
+    """
+    Gets the difficulty a game is recorded under. Custom games are recorded separately for each board size,
+        so that games on boards of different sizes are not summarized together.
+
+    Params:
+        str: The difficulty played.
+        int: The number of rows in the field.
+        int: The number of columns in the field.
+        int: The number of mines in the field.
+
+    Returns:
+        str: The difficulty, or 'custom' followed by the board size for custom games.
+    """
+    if difficulty != 'custom':
+        return difficulty
+    return f'custom %dx%d %d' % (rows, cols, num_mines)
+
+
+class StatsDatabase:
+    """
+    A history of every game played, stored in an SQLite database.
+
+    The database uses write-ahead logging, so reads do not block writes. Records are buffered and inserted
+        in batches, and are always inserted before a query runs, so queries see every recorded game.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initializes a StatsDatabase object, creating the database and its tables if they do not exist.
+
+        Params:
+            str: The path of the database file.
+
+        Raises:
+            sqlite3.Error: If the database cannot be opened.
+        """
+        self.path: str = path
+        self.pending: list[tuple] = []
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        # with write-ahead logging, a crash can only lose the last transactions, never corrupt the database
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        with self.connection:
+            self.connection.execute(CREATE_TABLE)
+            self.connection.execute(CREATE_INDEX)
+            self.connection.execute(CREATE_PLAYER_INDEX)
+
+    def record_game(self, difficulty: str, name: str, seed: int | None, won: bool, time_taken: float,
+                    bbbv: int, clicks: int):
+        """
+        Records a finished game, inserting it once BATCH_SIZE records are pending.
+
+        Params:
+            str: The difficulty played.
+            str: The player name.
+            int | None: The seed the mines were planted from, or None if they were not planted from a seed.
+            bool: True iff the game was won.
+            float: The time taken, in seconds.
+            int: The 3BV of the board.
+            int: The number of clicks made.
+        """
+        efficiency = bbbv / clicks if won and clicks > 0 else None
+        self.pending.append((time.time(), difficulty, name, seed, int(won), time_taken, bbbv, clicks, efficiency))
+        if len(self.pending) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """
+        Inserts all pending records in a single transaction.
+        """
+        if len(self.pending) == 0:
+            return
+        with self.connection:
+            self.connection.executemany(INSERT_GAME, self.pending)
+        self.pending = []
+
+    def get_summary(self, difficulty: str, name: str = '') -> dict:
+        """
+        Gets aggregate statistics for a difficulty.
+
+        Params:
+            str: The difficulty to summarize.
+            str: The player whose personal best to include. Defaults to no player.
+
+        Returns:
+            dict: The number of games and wins, the win rate, the best time, the player's best time,
+                and the median and 90th percentile winning times. Times are None if there are no wins.
+        """
+        self.flush()
+        games, wins = self.connection.execute(SELECT_COUNTS, (difficulty,)).fetchone()
+        summary = {
+            'games': games,
+            'wins': wins,
+            'win_rate': wins / games if games > 0 else 0.0,
+            'best': self.connection.execute(SELECT_BEST, (difficulty,)).fetchone()[0],
+            'personal_best': None
+        }
+        if name != '':
+            summary['personal_best'] = self.connection.execute(SELECT_PERSONAL_BEST, (difficulty, name)).fetchone()[0]
+        for key, fraction in (('p50', 0.5), ('p90', 0.9)):
+            summary[key] = self.get_percentile(difficulty, fraction, wins)
+        return summary
+
+    def get_percentile(self, difficulty: str, fraction: float, wins: int) -> float | None:
+        """
+        Gets a percentile of winning times by the nearest rank, counting along the index without reading the table.
+
+        Params:
+            str: The difficulty to query.
+            float: The fraction of wins at or below the percentile, between 0 and 1.
+            int: The number of wins of the difficulty.
+
+        Returns:
+            float | None: The winning time at the percentile, or None if there are no wins.
+        """
+        if wins == 0:
+            return None
+        rank = max(math.ceil(fraction * wins), 1)
+        return self.connection.execute(SELECT_NTH_TIME, (difficulty, rank - 1)).fetchone()[0]
+
+    def close(self):
+        """
+        Inserts all pending records and closes the database.
+        """
+        self.flush()
+        self.connection.close()
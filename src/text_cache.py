@@ -0,0 +1,54 @@
+from collections import OrderedDict
+
+from pygame import Surface
+from pygame.font import Font
+
+
+# the number of rendered texts kept, enough for every counter value and win screen line shown at once
+MAX_CACHED_TEXTS = 256
+
+
+class TextCache:
+    """
+    A least recently used cache of rendered text, so that counters and score lines showing the same text
+    again are blitted from memory instead of being rendered by the font.
+    """
+
+    def __init__(self, max_size: int = MAX_CACHED_TEXTS):
+        """
+        Initializes an empty TextCache object.
+
+        Params:
+            int: The maximum number of rendered texts to keep.
+        """
+        self.max_size: int = max_size
+        self.surfaces: OrderedDict[tuple, Surface] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def render(self, font: Font, text: str, color: tuple, background: tuple | None = None) -> Surface:
+        """
+        Renders text without antialiasing, reusing the Surface from an earlier call with the same arguments.
+
+        Params:
+            Font: The font to render with.
+            str: The text to render.
+            tuple: The text color.
+            tuple | None: The background color, or None for a transparent background.
+
+        Returns:
+            Surface: The rendered text. It is shared between calls and must not be drawn on.
+        """
+        key = (font, text, color, background)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, False, color, background)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface